@@ -17,3 +17,6 @@ from .lvm import LVM
 from .vg import VolumeGroup
 from .pv import PhysicalVolume
 from .lv import LogicalVolume
+from .diff import InventoryDiff
+from .info import VGInfo, PVInfo, LVInfo
+from .util import Size
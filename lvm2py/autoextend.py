@@ -0,0 +1,272 @@
+#This file is part of lvm2py.
+
+#lvm2py is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#lvm2py is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with lvm2py. If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+import threading
+import time
+from collections import namedtuple
+from ctypes import c_ulonglong
+from conversion import *
+from exception import *
+from util import *
+from properties import get_properties
+
+log = logging.getLogger(__name__)
+
+# An extension decided by an AutoExtender poll. percent is the fill percentage
+# that triggered it, sizes are Size instances. applied is False for dry runs.
+Extension = namedtuple("Extension", ["vg", "lv", "percent", "old_size", "new_size",
+                                     "applied"])
+
+
+def _fill(lvh):
+    # Returns the data fill percentage of a thin pool, thin volume or snapshot,
+    # None for logical volumes that have none.
+    for name in ("data_percent", "snap_percent"):
+        try:
+            percent = get_properties("lv", lvh, [name])[name]
+        except HandleError:
+            continue
+        if percent is not None:
+            return percent
+    return None
+
+
+class AutoExtender(threading.Thread):
+    """
+    *The AutoExtender class extends logical volumes that are filling up.*
+
+    Thin pools, thin volumes and snapshots report how full they are. On every poll
+    the extender reads the fill percentage of the chosen logical volumes of a
+    volume group, with a single lvm handle and one read-only open of the volume
+    group. Sizes and free space are only re-read when the volume group sequence
+    number moved. Every logical volume at or above threshold percent is grown by
+    extend_by percent of its size, rounded up to whole extents, as long as the
+    volume group keeps reserve bytes free, and all the extensions of a poll are
+    applied with the same vg_t handle::
+
+        from lvm2py import *
+        from lvm2py.autoextend import AutoExtender
+
+        extender = AutoExtender(LVM(), "myvg", ["pool"], threshold=80, extend_by=20)
+        extender.start()
+        ...
+        extender.stop()
+
+    A logical volume is extended at most once every min_delay seconds, which
+    leaves the time for the new space to show in the fill percentage and bounds
+    the growth rate. With dry_run nothing is changed, the decisions (rate limit
+    included) are only reported to the callback.
+
+    A poll that fails (the volume group locked by another process, a failed
+    extension) or a callback that raises doesn't stop the extender: the error is
+    logged, kept in last_error, and the delay before the next poll doubles up to
+    max_interval until a poll succeeds again.
+
+    *Args:*
+
+    *       lvm (obj):              An LVM instance used only by this extender.
+    *       vg (str):               The volume group name.
+    *       lvs (list):             Names of the logical volumes to watch.
+    *       threshold (float):      Fill percentage triggering an extension.
+    *       extend_by (float):      Growth in percent of the current size.
+    *       reserve (int):          Bytes of the volume group to keep free.
+    *       interval (float):       Delay between polls in seconds.
+    *       max_interval (float):   Maximum delay between polls after errors in
+                                    seconds. Default is 16 times interval.
+    *       min_delay (float):      Minimum delay between two extensions of the same
+                                    logical volume in seconds.
+    *       dry_run (bool):         Only report what would be extended.
+    *       callback (callable):    Called with the list of Extension tuples of
+                                    each poll that decided any.
+
+    *Raises:*
+
+    *       ValueError, ReadOnlyError
+    """
+    def __init__(self, lvm, vg, lvs, threshold=80.0, extend_by=20.0, reserve=0,
+                 interval=10.0, min_delay=60.0, dry_run=False, callback=None,
+                 max_interval=None):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        if not (0 < threshold <= 100) or extend_by <= 0 or interval <= 0:
+            raise ValueError("Invalid policy.")
+        if not dry_run:
+            lvm._check_writable()
+        self.__lvm = lvm
+        self.__vg = vg
+        self.__lvs = list(lvs)
+        self.__threshold = threshold
+        self.__extend_by = extend_by
+        self.__reserve = Size(reserve)
+        self.__interval = interval
+        if max_interval is None:
+            max_interval = interval * 16
+        self.__max_interval = max(interval, max_interval)
+        self.__last_error = None
+        self.__min_delay = min_delay
+        self.__dry_run = dry_run
+        self.__callback = callback
+        self.__seqno = None
+        self.__sizes = {}
+        self.__free = 0
+        self.__extent_size = 0
+        self.__extended = {}
+        self.__stop = threading.Event()
+
+    @property
+    def lvm(self):
+        """
+        Returns the LVM instance holding the extender lvm handle.
+        """
+        return self.__lvm
+
+    @property
+    def dry_run(self):
+        """
+        Returns True if the extender only reports what it would do.
+        """
+        return self.__dry_run
+
+    @property
+    def last_error(self):
+        """
+        Returns the exception raised by the last failed poll or callback, None if
+        there was none since the extender started or the last successful poll.
+        """
+        return self.__last_error
+
+    def _read(self, vgh):
+        # Returns the fill percentage of each watched logical volume, re-reading
+        # the sizes and free space only if the sequence number moved.
+        seqno = lvm_vg_get_seqno(vgh)
+        refresh = seqno != self.__seqno
+        if refresh:
+            self.__seqno = seqno
+            self.__sizes = {}
+            self.__free = Size(lvm_vg_get_free_size(vgh))
+            self.__extent_size = Size(lvm_vg_get_extent_size(vgh))
+        fill = {}
+        for name in self.__lvs:
+            lvh = lvm_lv_from_name(vgh, name)
+            if not bool(lvh):
+                # removed, or not created yet
+                continue
+            if refresh:
+                self.__sizes[name] = Size(lvm_lv_get_size(lvh))
+            fill[name] = _fill(lvh)
+        return fill
+
+    def _decide(self, fill, now):
+        extensions = []
+        budget = Size(max(int(self.__free) - int(self.__reserve), 0))
+        for name in self.__lvs:
+            percent = fill.get(name)
+            if percent is None or percent < self.__threshold:
+                continue
+            last = self.__extended.get(name)
+            if last is not None and now - last < self.__min_delay:
+                continue
+            old = self.__sizes[name]
+            grow = Size(int(int(old) * self.__extend_by / 100)).round_to(self.__extent_size)
+            grow = max(grow, self.__extent_size)
+            if grow > budget:
+                continue
+            budget -= grow
+            extensions.append(Extension(self.__vg, name, percent, old, old + grow,
+                                        not self.__dry_run))
+        return extensions
+
+    def _apply(self, extensions, now):
+        vgh = lvm_vg_open(self.lvm.handle, self.__vg, "w")
+        if not bool(vgh):
+            raise HandleError("Failed to initialize VG Handle.")
+        try:
+            for ext in extensions:
+                lvh = lvm_lv_from_name(vgh, ext.lv)
+                if not bool(lvh):
+                    raise HandleError("Failed to initialize LV Handle.")
+                if lvm_lv_resize(lvh, c_ulonglong(ext.new_size)) != 0:
+                    raise CommitError("Failed to resize LV %s." % ext.lv)
+                # only extensions that happened count for the rate limit
+                self.__extended[ext.lv] = now
+        except BaseException:
+            # a failed close must not hide the original error
+            lvm_vg_close(vgh)
+            raise
+        if lvm_vg_close(vgh) != 0:
+            raise HandleError("Failed to close VG handle.")
+
+    def poll(self):
+        """
+        Polls the logical volumes once, applies the extensions needed (unless this
+        is a dry run) and returns them as a list of Extension tuples.
+
+        *Raises:*
+
+        *       HandleError, CommitError
+        """
+        self.lvm.open()
+        vgh = lvm_vg_open(self.lvm.handle, self.__vg, "r")
+        if not bool(vgh):
+            raise HandleError("Failed to initialize VG Handle.")
+        try:
+            fill = self._read(vgh)
+        except BaseException:
+            # a failed close must not hide the original error
+            lvm_vg_close(vgh)
+            raise
+        if lvm_vg_close(vgh) != 0:
+            raise HandleError("Failed to close VG handle.")
+        now = time.time()
+        extensions = self._decide(fill, now)
+        if self.__dry_run:
+            for ext in extensions:
+                self.__extended[ext.lv] = now
+        elif extensions:
+            self._apply(extensions, now)
+        return extensions
+
+    def run(self):
+        delay = self.__interval
+        try:
+            while not self.__stop.is_set():
+                try:
+                    extensions = self.poll()
+                    if extensions and self.__callback is not None:
+                        self.__callback(extensions)
+                except Exception as e:
+                    log.exception("Polling %s failed.", self.__vg)
+                    self.__last_error = e
+                    delay = min(delay * 2, self.__max_interval)
+                    # start over with a new lvm handle
+                    try:
+                        self.lvm.release()
+                    except HandleError:
+                        pass
+                else:
+                    self.__last_error = None
+                    delay = self.__interval
+                self.__stop.wait(delay)
+        finally:
+            self.lvm.release()
+
+    def stop(self):
+        """
+        Stops the extender and waits for it to release its lvm handle.
+        """
+        self.__stop.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join()
@@ -0,0 +1,253 @@
+#This file is part of lvm2py.
+
+#lvm2py is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#lvm2py is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with lvm2py. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Command line inventory tool, run it with ``python -m lvm2py``::
+
+    python -m lvm2py vgs
+    python -m lvm2py lvs -o name,vg,size --units GiB --format csv myvg
+    python -m lvm2py report
+    python -m lvm2py export /var/lib/node_exporter/lvm.prom --interval 60
+    python -m lvm2py daemon /run/lvm2py.sock
+
+Records are written as they are read from the lvm handle, one JSON object per
+line (ndjson) or as csv rows, so output starts before the scan finishes. The
+whole run uses a single lvm handle. The export command writes Prometheus metrics
+for the node_exporter textfile collector instead, see exporter.TextfileExporter,
+and the daemon command serves the inventory over a Unix socket, see
+daemon.InventoryDaemon.
+"""
+
+import argparse
+import csv
+import json
+import logging
+import sys
+import time
+from conversion import *
+from exception import *
+from util import *
+from lvm import LVM
+from inventory import vg_names, vg_attrs, iter_pvs, iter_lvs
+from exporter import TextfileExporter
+from daemon import InventoryDaemon
+from properties import SIZE_PROPERTIES
+
+FIELDS = {
+    "vg": ["name", "uuid", "seqno", "size", "free_size", "extent_size",
+           "extent_count", "free_extent_count", "pv_count", "is_clustered",
+           "is_exported", "is_partial", "tags"],
+    "pv": ["name", "uuid", "vg", "size", "free", "dev_size", "mda_count"],
+    "lv": ["name", "uuid", "vg", "size", "is_active", "is_suspended", "tags"],
+}
+
+SIZE_FIELDS = frozenset(["size", "free_size", "extent_size", "free", "dev_size"])
+
+COMMANDS = {
+    "vgs": ("vg",),
+    "pvs": ("pv",),
+    "lvs": ("lv",),
+    "report": ("vg", "pv", "lv"),
+}
+
+
+def scan(lvmh, kinds, names=None):
+    """
+    Yields (kind, record) tuples for the requested kinds ("vg", "pv", "lv") of
+    each volume group, opening one volume group at a time with the given lvm
+    handle. Volume groups that can't be opened are skipped, unless they were
+    explicitly named in which case HandleError is raised.
+    """
+    explicit = bool(names)
+    for name in names or vg_names(lvmh):
+        vgh = lvm_vg_open(lvmh, name, "r")
+        if not bool(vgh):
+            if explicit:
+                raise HandleError("Failed to initialize VG Handle for %s." % name)
+            continue
+        try:
+            if "vg" in kinds:
+                yield "vg", vg_attrs(vgh, name)
+            if "pv" in kinds:
+                for pv in iter_pvs(vgh, name):
+                    yield "pv", pv
+            if "lv" in kinds:
+                for lv in iter_lvs(vgh, name):
+                    yield "lv", lv
+        except BaseException:
+            # a failed close must not hide the original error (or the
+            # GeneratorExit of a consumer that stopped early)
+            lvm_vg_close(vgh)
+            raise
+        if lvm_vg_close(vgh) != 0:
+            raise HandleError("Failed to close VG handle.")
+
+
+def _columns(kinds, selected):
+    columns = []
+    for kind in kinds:
+        for field in FIELDS[kind]:
+            if field not in columns and (not selected or field in selected):
+                columns.append(field)
+    if selected:
+        unknown = [f for f in selected if f not in columns]
+        if unknown:
+            raise ValueError("Unknown field(s): %s" % ", ".join(unknown))
+        columns.sort(key=selected.index)
+    return columns
+
+
+def _row(rec, columns, units):
+    row = {}
+    for field in columns:
+        if field not in rec.fields:
+            continue
+        value = getattr(rec, field)
+        if units and field in SIZE_FIELDS:
+            value = size_convert(value, units)
+        elif isinstance(value, tuple):
+            # tags, comma separated like the lvm tools print them
+            value = ",".join(value)
+        row[field] = value
+    return row
+
+
+def _parser():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("-o", "--fields", default="",
+                        help="comma separated list of fields to output")
+    common.add_argument("-p", "--properties", default="",
+                        help="comma separated list of lvm properties to output "
+                             "instead of the fields, like the -o option of lvs")
+    common.add_argument("--units", choices=[u for u in size_units if u != "%"],
+                        help="size units, sizes are in bytes by default")
+    common.add_argument("--format", choices=["ndjson", "csv"], default="ndjson",
+                        help="output format (default: ndjson)")
+    common.add_argument("vgs", nargs="*", metavar="vg",
+                        help="volume groups to report, all by default")
+    parser = argparse.ArgumentParser(prog="python -m lvm2py",
+                                     description="lvm2py inventory tool.")
+    sub = parser.add_subparsers(dest="command")
+    sub.required = True
+    for command in sorted(COMMANDS):
+        sub.add_parser(command, parents=[common])
+    export = sub.add_parser("export", help="write Prometheus textfile metrics")
+    export.add_argument("path", help="the .prom file to write")
+    export.add_argument("--interval", type=float, default=60.0,
+                        help="delay between exports in seconds (default: 60)")
+    export.add_argument("--min-interval", type=float, default=15.0,
+                        help="minimum delay between scans in seconds (default: 15)")
+    export.add_argument("--once", action="store_true",
+                        help="export once and exit")
+    daemon = sub.add_parser("daemon", help="serve the inventory over a Unix socket")
+    daemon.add_argument("path", help="the Unix socket path")
+    daemon.add_argument("--max-age", type=float, default=1.0,
+                        help="seconds a cached record is served without validation")
+    return parser
+
+
+def _export(args):
+    exporter = TextfileExporter(LVM(), args.path, args.interval, args.min_interval)
+    if args.once:
+        exporter.export()
+        return 0
+    # failed exports are logged and retried, show them on stderr
+    logging.basicConfig(format="%(asctime)s %(name)s: %(message)s")
+    exporter.start()
+    try:
+        while exporter.is_alive():
+            time.sleep(1)
+    except KeyboardInterrupt:
+        exporter.stop()
+        return 0
+    # errors are handled by the exporter, it only ends on its own if it crashed
+    return 1
+
+
+def _report(kind, properties, args, out):
+    if args.format == "csv":
+        writer = csv.writer(out)
+        writer.writerow(properties)
+    lvm = LVM()
+    try:
+        for row in lvm.report(kind, properties, args.vgs):
+            if args.units:
+                for name in properties:
+                    # unset sizes decode to None, output as null (empty in csv)
+                    if name in SIZE_PROPERTIES and row[name] is not None:
+                        row[name] = row[name].to(args.units)
+            if args.format == "csv":
+                writer.writerow([row[name] for name in properties])
+            else:
+                out.write(json.dumps(row, sort_keys=True) + "\n")
+        out.flush()
+    except HandleError as e:
+        sys.stderr.write("%s\n" % e)
+        return 5
+    return 0
+
+
+def main(argv=None, out=None):
+    """
+    Runs the command line tool and returns the exit status.
+    """
+    parser = _parser()
+    args = parser.parse_args(argv)
+    if args.command == "export":
+        return _export(args)
+    if args.command == "daemon":
+        InventoryDaemon(args.path, max_age=args.max_age).serve_forever()
+        return 0
+    out = out or sys.stdout
+    kinds = COMMANDS[args.command]
+    selected = [f for f in args.fields.split(",") if f]
+    properties = [p for p in args.properties.split(",") if p]
+    if properties:
+        if len(kinds) > 1 or selected:
+            parser.error("--properties only works with vgs, pvs and lvs, without --fields")
+        return _report(kinds[0], properties, args, out)
+    try:
+        columns = _columns(kinds, selected)
+    except ValueError as e:
+        parser.error(str(e))
+    tagged = len(kinds) > 1
+    if args.format == "csv":
+        writer = csv.writer(out)
+        writer.writerow((["type"] if tagged else []) + columns)
+    lvm = LVM()
+    lvm.open()
+    try:
+        current = None
+        for kind, rec in scan(lvm.handle, kinds, args.vgs):
+            vg = rec.name if kind == "vg" else rec.vg
+            if vg != current:
+                # flush what we have so far whenever we move to the next vg
+                out.flush()
+                current = vg
+            row = _row(rec, columns, args.units)
+            if args.format == "csv":
+                values = [row.get(f, "") for f in columns]
+                writer.writerow(([kind] if tagged else []) + values)
+            else:
+                if tagged:
+                    row["type"] = kind
+                out.write(json.dumps(row, sort_keys=True) + "\n")
+        out.flush()
+    except HandleError as e:
+        sys.stderr.write("%s\n" % e)
+        return 5
+    finally:
+        lvm.close()
+    return 0
@@ -0,0 +1,529 @@
+#This file is part of lvm2py.
+
+#lvm2py is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#lvm2py is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with lvm2py. If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import socket
+import threading
+from exception import *
+from util import *
+from info import VGInfo, PVInfo, LVInfo
+
+# Exceptions raised by the daemon that are raised again on the client side,
+# anything else is raised as HandleError.
+_ERRORS = {
+    "HandleError": HandleError,
+    "CommitError": CommitError,
+    "ReadOnlyError": ReadOnlyError,
+    "CallTimeoutError": CallTimeoutError,
+    "ValueError": ValueError,
+    "KeyError": KeyError,
+    "TypeError": TypeError,
+}
+
+
+class InventoryClient(object):
+    """
+    *The InventoryClient class talks to an InventoryDaemon over its Unix socket.*
+
+    It mirrors the read-only parts of LVM, and the VolumeGroup, PhysicalVolume and
+    LogicalVolume instances it returns are replaced by RemoteVolumeGroup,
+    RemotePhysicalVolume and RemoteLogicalVolume instances holding the VGInfo,
+    PVInfo and LVInfo records the daemon returned::
+
+        from lvm2py.client import InventoryClient
+
+        lvm = InventoryClient("/run/lvm2py.sock")
+        vg = lvm.get_vg("myvg")
+        print vg.free_size("GiB")
+        lv = vg.create_lv("mylv", 40, "MiB")
+
+    Write operations are sent to the daemon, which serializes them with every other
+    library call.
+
+    *Args:*
+
+    *       path (str):     The daemon Unix socket path.
+    """
+    def __init__(self, path):
+        self.__path = path
+        self.__sock = None
+        self.__file = None
+        self.__lock = threading.Lock()
+
+    @property
+    def path(self):
+        """
+        Returns the daemon Unix socket path.
+        """
+        return self.__path
+
+    def close(self):
+        """
+        Closes the connection to the daemon, the next call opens a new one.
+        """
+        if self.__sock:
+            self.__file.close()
+            self.__sock.close()
+            self.__sock = None
+            self.__file = None
+
+    def call(self, op, **args):
+        """
+        Sends an operation to the daemon and returns its result. Usually you would
+        never need to use this method.
+
+        *Raises:*
+
+        *       HandleError, CommitError, ValueError, socket.error
+        """
+        request = json.dumps({"op": op, "args": args}).encode("utf-8") + b"\n"
+        with self.__lock:
+            if not self.__sock:
+                self.__sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                self.__sock.connect(self.path)
+                self.__file = self.__sock.makefile("rb")
+            try:
+                self.__sock.sendall(request)
+                line = self.__file.readline()
+            except Exception:
+                self.close()
+                raise
+            if not line:
+                self.close()
+                raise HandleError("Connection to the lvm2py daemon closed.")
+        response = json.loads(line.decode("utf-8"))
+        if not response["ok"]:
+            raise _ERRORS.get(response["error"], HandleError)(response["message"])
+        return response["result"]
+
+    @property
+    def lvm_version(self):
+        """
+        Returns the lvm library version of the daemon.
+        """
+        return self.call("version")
+
+    def get_vg(self, name, mode="r"):
+        """
+        Returns a RemoteVolumeGroup instance for an existing volume group name.
+
+        *Raises:*
+
+        *       HandleError
+        """
+        return RemoteVolumeGroup(self, VGInfo.from_dict(self.call("vg", name=name)), mode)
+
+    def vgscan(self):
+        """
+        Returns a list of RemoteVolumeGroup instances, one per volume group.
+        """
+        inventory = self.call("inventory")
+        return [RemoteVolumeGroup(self, VGInfo.from_dict(inventory[name]))
+                for name in sorted(inventory)]
+
+    def create_vg(self, name, devices):
+        """
+        Creates a volume group with the given devices and returns its
+        RemoteVolumeGroup instance.
+
+        *Raises:*
+
+        *       HandleError, CommitError, ValueError
+        """
+        rec = self.call("create_vg", name=name, devices=devices)
+        return RemoteVolumeGroup(self, VGInfo.from_dict(rec), "w")
+
+    def remove_vg(self, vg):
+        """
+        Removes a volume group given its RemoteVolumeGroup instance.
+
+        *Raises:*
+
+        *       HandleError, CommitError
+        """
+        self.call("remove_vg", name=vg.name)
+
+
+class RemoteVolumeGroup(object):
+    """
+    *The RemoteVolumeGroup class holds a volume group record returned by the daemon.*
+
+    Attributes reflect the volume group at the time the record was fetched, call
+    refresh to fetch it again.
+    """
+    def __init__(self, client, record, mode="r"):
+        self.__client = client
+        self.__record = record
+        self.__mode = mode
+
+    @property
+    def client(self):
+        """
+        Returns the InventoryClient instance.
+        """
+        return self.__client
+
+    @property
+    def record(self):
+        """
+        Returns the VGInfo record.
+        """
+        return self.__record
+
+    @property
+    def mode(self):
+        """
+        Returns the mode the instance is operating on ('r' or 'w').
+        """
+        return self.__mode
+
+    @property
+    def name(self):
+        """
+        Returns the name of the volume group.
+        """
+        return self.__record.name
+
+    @property
+    def uuid(self):
+        """
+        Returns the volume group uuid.
+        """
+        return self.__record.uuid
+
+    @property
+    def extent_count(self):
+        """
+        Returns the volume group extent count.
+        """
+        return self.__record.extent_count
+
+    @property
+    def free_extent_count(self):
+        """
+        Returns the volume group free extent count.
+        """
+        return self.__record.free_extent_count
+
+    @property
+    def pv_count(self):
+        """
+        Returns the physical volume count.
+        """
+        return self.__record.pv_count
+
+    @property
+    def is_clustered(self):
+        """
+        Returns True if the VG is clustered, False otherwise.
+        """
+        return self.__record.is_clustered
+
+    @property
+    def is_exported(self):
+        """
+        Returns True if the VG is exported, False otherwise.
+        """
+        return self.__record.is_exported
+
+    @property
+    def is_partial(self):
+        """
+        Returns True if the VG is partial, False otherwise.
+        """
+        return self.__record.is_partial
+
+    @property
+    def tags(self):
+        """
+        Returns the volume group tags as a list of strings.
+        """
+        return list(self.__record.tags or ())
+
+    @property
+    def sequence(self):
+        """
+        Returns the volume group sequence number.
+        """
+        return self.__record.seqno
+
+    def size(self, units="MiB"):
+        """
+        Returns the volume group size in the given units. Default units are  MiB.
+        """
+        return size_value(self.__record.size, units)
+
+    def free_size(self, units="MiB"):
+        """
+        Returns the volume group free size in the given units. Default units are  MiB.
+        """
+        return size_value(self.__record.free_size, units)
+
+    def extent_size(self, units="MiB"):
+        """
+        Returns the volume group extent size in the given units. Default units are  MiB.
+        """
+        return size_value(self.__record.extent_size, units)
+
+    def refresh(self):
+        """
+        Fetches the volume group record again.
+
+        *Raises:*
+
+        *       HandleError
+        """
+        self.__record = VGInfo.from_dict(self.client.call("vg", name=self.name))
+
+    def set_mode(self, mode):
+        """
+        Sets the volume group in write or read mode.
+        """
+        if mode != "r" and mode != "w":
+            raise ValueError("Invalid mode.")
+        self.__mode = mode
+
+    def pvscan(self):
+        """
+        Returns a list of RemotePhysicalVolume instances.
+        """
+        return [RemotePhysicalVolume(self, pv) for pv in self.__record.pvs]
+
+    def lvscan(self):
+        """
+        Returns a list of RemoteLogicalVolume instances.
+        """
+        return [RemoteLogicalVolume(self, lv) for lv in self.__record.lvs]
+
+    def get_pv(self, device):
+        """
+        Returns the RemotePhysicalVolume instance for the given device.
+
+        *Raises:*
+
+        *       HandleError
+        """
+        for pv in self.__record.pvs:
+            if pv.name == device:
+                return RemotePhysicalVolume(self, pv)
+        raise HandleError("Failed to initialize PV Handle.")
+
+    def get_lv(self, name):
+        """
+        Returns the RemoteLogicalVolume instance for the given logical volume name.
+
+        *Raises:*
+
+        *       HandleError
+        """
+        for lv in self.__record.lvs:
+            if lv.name == name:
+                return RemoteLogicalVolume(self, lv)
+        raise HandleError("Failed to initialize LV Handle.")
+
+    def _write(self, op, **args):
+        if self.mode != "w":
+            raise CommitError("VolumeGroup is not in write mode.")
+        return self.client.call(op, vg=self.name, **args)
+
+    def add_pv(self, device):
+        """
+        Adds a device to the volume group and returns its RemotePhysicalVolume
+        instance.
+
+        *Raises:*
+
+        *       ValueError, CommitError, HandleError
+        """
+        self.__record = VGInfo.from_dict(self._write("add_pv", device=device))
+        return self.get_pv(device)
+
+    def remove_pv(self, pv):
+        """
+        Removes a physical volume from the volume group.
+
+        *Raises:*
+
+        *       HandleError, CommitError
+        """
+        self._write("remove_pv", device=pv.name)
+
+    def create_lv(self, name, length, units):
+        """
+        Creates a logical volume and returns its RemoteLogicalVolume instance.
+
+        *Raises:*
+
+        *       HandleError, CommitError, ValueError
+        """
+        rec = self._write("create_lv", name=name, length=length, units=units)
+        return RemoteLogicalVolume(self, LVInfo.from_dict(rec))
+
+    def remove_lv(self, lv):
+        """
+        Removes a logical volume from the volume group.
+
+        *Raises:*
+
+        *       HandleError, CommitError
+        """
+        self._write("remove_lv", name=lv.name)
+
+    def remove_all_lvs(self):
+        """
+        Removes all logical volumes from the volume group.
+
+        *Raises:*
+
+        *       HandleError, CommitError
+        """
+        for lv in self.lvscan():
+            self.remove_lv(lv)
+
+
+class RemotePhysicalVolume(object):
+    """
+    *The RemotePhysicalVolume class holds a physical volume record returned by the
+    daemon.*
+    """
+    def __init__(self, vg, record):
+        self.__vg = vg
+        self.__record = record
+
+    @property
+    def vg(self):
+        """
+        Returns the RemoteVolumeGroup instance.
+        """
+        return self.__vg
+
+    @property
+    def name(self):
+        """
+        Returns the physical volume device path.
+        """
+        return self.__record.name
+
+    @property
+    def uuid(self):
+        """
+        Returns the physical volume uuid.
+        """
+        return self.__record.uuid
+
+    @property
+    def mda_count(self):
+        """
+        Returns the physical volume mda count.
+        """
+        return self.__record.mda_count
+
+    def size(self, units="MiB"):
+        """
+        Returns the physical volume size in the given units. Default units are  MiB.
+        """
+        return size_value(self.__record.size, units)
+
+    def dev_size(self, units="MiB"):
+        """
+        Returns the device size in the given units. Default units are  MiB.
+        """
+        return size_value(self.__record.dev_size, units)
+
+    def free(self, units="MiB"):
+        """
+        Returns the free size in the given units. Default units are  MiB.
+        """
+        return size_value(self.__record.free, units)
+
+
+class RemoteLogicalVolume(object):
+    """
+    *The RemoteLogicalVolume class holds a logical volume record returned by the
+    daemon.*
+    """
+    def __init__(self, vg, record):
+        self.__vg = vg
+        self.__record = record
+
+    @property
+    def vg(self):
+        """
+        Returns the RemoteVolumeGroup instance.
+        """
+        return self.__vg
+
+    @property
+    def name(self):
+        """
+        Returns the logical volume name.
+        """
+        return self.__record.name
+
+    @property
+    def uuid(self):
+        """
+        Returns the logical volume uuid.
+        """
+        return self.__record.uuid
+
+    @property
+    def is_active(self):
+        """
+        Returns True if the logical volume is active, False otherwise.
+        """
+        return self.__record.is_active
+
+    @property
+    def is_suspended(self):
+        """
+        Returns True if the logical volume is suspended, False otherwise.
+        """
+        return self.__record.is_suspended
+
+    @property
+    def tags(self):
+        """
+        Returns the logical volume tags as a list of strings.
+        """
+        return list(self.__record.tags or ())
+
+    def size(self, units="MiB"):
+        """
+        Returns the logical volume size in the given units. Default units are  MiB.
+        """
+        return size_value(self.__record.size, units)
+
+    def activate(self):
+        """
+        Activates the logical volume.
+
+        *Raises:*
+
+        *       HandleError, CommitError
+        """
+        rec = self.vg.client.call("activate", vg=self.vg.name, name=self.name)
+        self.__record = LVInfo.from_dict(rec)
+
+    def deactivate(self):
+        """
+        Deactivates the logical volume.
+
+        *Raises:*
+
+        *       HandleError, CommitError
+        """
+        rec = self.vg.client.call("deactivate", vg=self.vg.name, name=self.name)
+        self.__record = LVInfo.from_dict(rec)
@@ -0,0 +1,182 @@
+#This file is part of lvm2py.
+
+#lvm2py is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#lvm2py is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with lvm2py. If not, see <http://www.gnu.org/licenses/>.
+
+import sys
+import threading
+from exception import *
+from util import reraise
+from inventory import vg_names, read_vg
+
+
+class _Call(object):
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """
+    *The SingleFlight class makes concurrent calls with the same key share one
+    execution.*
+
+    The first caller for a key runs the function, every caller arriving with the
+    same key before it returns waits and gets the same result (or exception). Once
+    the call returns the key is forgotten, so later callers run it again::
+
+        flight = SingleFlight()
+        result = flight.do(("lvs", "myvg"), read_lvs, "myvg")
+
+    LVM and VolumeGroup use one per LVM instance for their read paths, see LVM.
+    """
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__calls = {}
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Runs fn(*args, **kwargs) unless a call with the same key is in flight, and
+        returns its result.
+        """
+        with self.__lock:
+            call = self.__calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.__calls[key] = _Call()
+        if leader:
+            try:
+                call.result = fn(*args, **kwargs)
+            except BaseException:
+                call.error = sys.exc_info()
+            finally:
+                with self.__lock:
+                    del self.__calls[key]
+                call.event.set()
+        else:
+            call.event.wait()
+        if call.error:
+            reraise(call.error)
+        return call.result
+
+
+class Coalescer(object):
+    """
+    *The Coalescer class coalesces identical concurrent reads of the inventory.*
+
+    Threads asking for the same volume group, or for the whole inventory, at the
+    same time share a single library call and its result, so a burst of identical
+    requests costs one scan. Library calls run one at a time on a single lvm
+    handle, kept open for each of them. Results are VGInfo, PVInfo and LVInfo
+    records, which unlike VolumeGroup, PhysicalVolume and LogicalVolume instances
+    can be shared between threads safely, in lists and dicts of each caller's own::
+
+        from lvm2py import *
+        from lvm2py.coalesce import Coalescer
+
+        reader = Coalescer(LVM())
+
+        # from any number of threads
+        lvs = reader.lvs("myvg")
+
+    *Args:*
+
+    *       lvm (obj):      An LVM instance used only by this coalescer.
+    """
+    def __init__(self, lvm=None):
+        if lvm is None:
+            # lvm uses SingleFlight from this module
+            from lvm import LVM
+            lvm = LVM()
+        self.__lvm = lvm
+        self.__flight = SingleFlight()
+        self.__lock = threading.Lock()
+
+    @property
+    def lvm(self):
+        """
+        Returns the LVM instance holding the lvm handle.
+        """
+        return self.__lvm
+
+    def _locked(self, fn, *args):
+        with self.__lock:
+            with self.__lvm.session():
+                return fn(self.__lvm.handle, *args)
+
+    def _read_vg(self, lvmh, name):
+        rec = read_vg(lvmh, name)
+        if rec is None:
+            raise HandleError("Failed to initialize VG Handle.")
+        return rec
+
+    def _read_inventory(self, lvmh):
+        inventory = {}
+        for name in vg_names(lvmh):
+            rec = read_vg(lvmh, name)
+            if rec is not None:
+                inventory[name] = rec
+        return inventory
+
+    def vg_names(self):
+        """
+        Returns the list of volume group names.
+
+        *Raises:*
+
+        *       HandleError
+        """
+        return list(self.__flight.do(("vg_names",), self._locked, vg_names))
+
+    def inventory(self):
+        """
+        Returns a dict of VGInfo records indexed by name, see the LVM method
+        inventory.
+
+        *Raises:*
+
+        *       HandleError
+        """
+        return dict(self.__flight.do(("inventory",), self._locked, self._read_inventory))
+
+    def vg(self, name):
+        """
+        Returns the VGInfo record of the named volume group.
+
+        *Raises:*
+
+        *       HandleError
+        """
+        return self.__flight.do(("vg", name), self._locked, self._read_vg, name)
+
+    def pvs(self, name):
+        """
+        Returns a list with the PVInfo records of the named volume group.
+
+        *Raises:*
+
+        *       HandleError
+        """
+        return list(self.vg(name).pvs)
+
+    def lvs(self, name):
+        """
+        Returns a list with the LVInfo records of the named volume group.
+
+        *Raises:*
+
+        *       HandleError
+        """
+        return list(self.vg(name).lvs)
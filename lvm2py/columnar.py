@@ -0,0 +1,155 @@
+#This file is part of lvm2py.
+
+#lvm2py is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#lvm2py is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with lvm2py. If not, see <http://www.gnu.org/licenses/>.
+
+from array import array
+from util import *
+from info import VGInfo, PVInfo, LVInfo
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# array.array has no unsigned 64 bit typecode on python 2, where unsigned long
+# is 64 bits wide on the platforms liblvm2app runs on anyway.
+try:
+    array("Q")
+    _U64 = "Q"
+except ValueError:
+    _U64 = "L"
+
+# Record fields that are not columns: the volume group name is replaced by the
+# vg_index column, tags are variable length and pvs and lvs are tables of their own.
+_SKIPPED = frozenset(["vg", "tags", "pvs", "lvs"])
+
+
+def _columns(cls):
+    # (field, kind) for each column of a record class, in field order. kind is
+    # "u64" for sizes and counts, "bool" for flags and "str" for names and uuids
+    # (which are always returned as lists).
+    columns = []
+    for field in cls.__slots__:
+        if field in _SKIPPED:
+            continue
+        if field in ("name", "uuid"):
+            kind = "str"
+        elif field.startswith("is_"):
+            kind = "bool"
+        else:
+            kind = "u64"
+        columns.append((field, kind))
+    return columns
+
+
+VG_COLUMNS = _columns(VGInfo)
+PV_COLUMNS = _columns(PVInfo)
+LV_COLUMNS = _columns(LVInfo)
+
+
+def _column(values, kind, use_numpy):
+    if kind == "str":
+        return values
+    if use_numpy:
+        dtype = {"u64": numpy.uint64, "i64": numpy.int64, "bool": numpy.bool_}[kind]
+        return numpy.array(values, dtype=dtype)
+    code = {"u64": _U64, "i64": "l", "bool": "B"}[kind]
+    return array(code, [int(v) for v in values])
+
+
+def _table(records, columns, vg_index, use_numpy):
+    table = {}
+    for field, kind in columns:
+        table[field] = _column([getattr(r, field) for r in records], kind, use_numpy)
+    if vg_index is not None:
+        table["vg_index"] = _column(vg_index, "i64", use_numpy)
+    return table
+
+
+def to_columns(inventory, use_numpy=None):
+    """
+    Returns an inventory as columnar arrays, one table per object kind::
+
+        from lvm2py import *
+        from lvm2py.columnar import to_columns, convert
+
+        lvm = LVM()
+        tables = to_columns(lvm.inventory())
+        lv_sizes = convert(tables["lv"]["size"], "GiB")
+        free_per_vg = tables["vg"]["free_size"]
+
+    The result is a dict with the "vg", "pv" and "lv" tables, each a dict of
+    equally long columns. Sizes and counts are unsigned 64 bit integers and flags
+    are booleans (or 0/1 bytes without NumPy). Names and uuids are plain lists.
+    The "pv" and "lv" tables also have a "vg_index" column with the row of their
+    volume group in the "vg" table, volume groups are sorted by name. Volume groups
+    read without their volumes (inventory.vg_attrs) add no rows to those tables.
+
+    *Args:*
+
+    *       inventory (dict):       VGInfo records indexed by name, as returned by
+                                    the LVM method inventory.
+    *       use_numpy (bool):       Return NumPy arrays instead of array.array
+                                    instances. Defaults to True when NumPy is
+                                    installed.
+
+    *Raises:*
+
+    *       ImportError
+    """
+    if use_numpy is None:
+        use_numpy = numpy is not None
+    elif use_numpy and numpy is None:
+        raise ImportError("NumPy is not installed.")
+    if hasattr(inventory, "values"):
+        inventory = [inventory[name] for name in sorted(inventory)]
+    vgs = list(inventory)
+    pvs = []
+    pv_index = []
+    lvs = []
+    lv_index = []
+    for i, vg in enumerate(vgs):
+        # None when the volumes were not read, see inventory.vg_attrs
+        vg_pvs = vg.pvs or ()
+        vg_lvs = vg.lvs or ()
+        pvs.extend(vg_pvs)
+        pv_index.extend([i] * len(vg_pvs))
+        lvs.extend(vg_lvs)
+        lv_index.extend([i] * len(vg_lvs))
+    return {
+        "vg": _table(vgs, VG_COLUMNS, None, use_numpy),
+        "pv": _table(pvs, PV_COLUMNS, pv_index, use_numpy),
+        "lv": _table(lvs, LV_COLUMNS, lv_index, use_numpy),
+    }
+
+
+def convert(column, units):
+    """
+    Converts a whole column of byte sizes to the given units at once and returns
+    it as floats, the vectorized counterpart of util.size_convert. NumPy arrays
+    are converted with a single array operation, array.array columns return an
+    array.array of doubles.
+
+    *Args:*
+
+    *       column (array):     A size column returned by to_columns.
+    *       units (str):        Unit label ('MiB', 'GiB', etc...).
+
+    *Raises:*
+
+    *       KeyError
+    """
+    factor = float(size_units[units])
+    if numpy is not None and isinstance(column, numpy.ndarray):
+        return column / factor
+    return array("d", [v / factor for v in column])
@@ -73,6 +73,60 @@ class lvm_lv_list(Structure):
 
 lvm_lv_list_t = lvm_lv_list
 
+class pv_segment(Structure):
+    pass
+
+pvseg_t = POINTER(pv_segment)
+
+class lv_segment(Structure):
+    pass
+
+lvseg_t = POINTER(lv_segment)
+
+class lvm_pvseg_list(Structure):
+    _fields_ = [
+        ('list', dm_list),
+        ('pvseg', pvseg_t),
+    ]
+
+lvm_pvseg_list_t = lvm_pvseg_list
+
+class lvm_lvseg_list(Structure):
+    _fields_ = [
+        ('list', dm_list),
+        ('lvseg', lvseg_t),
+    ]
+
+lvm_lvseg_list_t = lvm_lvseg_list
+
+class lvm_property_value_union(Union):
+    _fields_ = [
+        ('string', c_char_p),
+        ('integer', c_ulonglong),
+    ]
+
+class lvm_property_value(Structure):
+    _fields_ = [
+        ('is_settable', c_uint32, 1),
+        ('is_string', c_uint32, 1),
+        ('is_integer', c_uint32, 1),
+        ('is_valid', c_uint32, 1),
+        ('padding', c_uint32, 28),
+        ('value', lvm_property_value_union),
+    ]
+
+lvm_property_value_t = lvm_property_value
+
+class lvm_lv_create_params(Structure):
+    pass
+
+lv_create_params_t = POINTER(lvm_lv_create_params)
+
+# lvm_thin_discards_t
+LVM_THIN_DISCARDS_IGNORE = 0
+LVM_THIN_DISCARDS_NO_PASSDOWN = 1
+LVM_THIN_DISCARDS_PASSDOWN = 2
+
 # Initialize library
 lvm_init = lvmlib.lvm_init
 lvm_init.argtypes = [c_char_p]
@@ -85,9 +139,18 @@ lvm_quit = lvmlib.lvm_quit
 lvm_quit.argtypes = [lvm_t]
 lvm_scan = lvmlib.lvm_scan
 lvm_scan.argtypes = [lvm_t]
+lvm_config_reload = lvmlib.lvm_config_reload
+lvm_config_reload.argtypes = [lvm_t]
+lvm_config_override = lvmlib.lvm_config_override
+lvm_config_override.argtypes = [lvm_t, c_char_p]
 lvm_list_vg_names = lvmlib.lvm_list_vg_names
 lvm_list_vg_names.argtypes = [lvm_t]
 lvm_list_vg_names.restype = POINTER(dm_list)
+lvm_list_pvs = lvmlib.lvm_list_pvs
+lvm_list_pvs.argtypes = [lvm_t]
+lvm_list_pvs.restype = POINTER(dm_list)
+lvm_list_pvs_free = lvmlib.lvm_list_pvs_free
+lvm_list_pvs_free.argtypes = [POINTER(dm_list)]
 dm_list_empty = lvmlib.dm_list_empty
 dm_list_empty.argtypes = [POINTER(dm_list)]
 lvm_quit.argtypes = [lvm_t]
@@ -150,7 +213,7 @@ lvm_vg_get_max_lv = lvmlib.lvm_vg_get_max_lv
 lvm_vg_get_max_lv.argtypes = [vg_t]
 lvm_vg_get_max_lv.restype = c_ulonglong
 lvm_vgname_from_device = lvmlib.lvm_vgname_from_device
-lvm_vgname_from_device.argtypes = [vg_t, c_char_p]
+lvm_vgname_from_device.argtypes = [lvm_t, c_char_p]
 lvm_vgname_from_device.restype = c_char_p
 lvm_vg_list_pvs = lvmlib.lvm_vg_list_pvs
 lvm_vg_list_pvs.argtypes = [vg_t]
@@ -161,6 +224,16 @@ lvm_vg_list_lvs.restype = POINTER(dm_list)
 lvm_vg_create_lv_linear = lvmlib.lvm_vg_create_lv_linear
 lvm_vg_create_lv_linear.argtypes = [vg_t, c_char_p, c_ulonglong]
 lvm_vg_create_lv_linear.restype = lv_t
+lvm_lv_params_create_thin_pool = lvmlib.lvm_lv_params_create_thin_pool
+lvm_lv_params_create_thin_pool.argtypes = [vg_t, c_char_p, c_ulonglong, c_uint32,
+                                           c_ulonglong, c_int]
+lvm_lv_params_create_thin_pool.restype = lv_create_params_t
+lvm_lv_params_create_thin = lvmlib.lvm_lv_params_create_thin
+lvm_lv_params_create_thin.argtypes = [vg_t, c_char_p, c_char_p, c_ulonglong]
+lvm_lv_params_create_thin.restype = lv_create_params_t
+lvm_lv_create = lvmlib.lvm_lv_create
+lvm_lv_create.argtypes = [lv_create_params_t]
+lvm_lv_create.restype = lv_t
 lvm_vg_remove_lv = lvmlib.lvm_vg_remove_lv
 lvm_vg_remove_lv.argtypes = [lv_t]
 lvm_vg_set_extent_size = lvmlib.lvm_vg_set_extent_size
@@ -174,6 +247,16 @@ lvm_vg_is_partial.argtypes = [vg_t]
 lvm_vg_get_seqno = lvmlib.lvm_vg_get_seqno
 lvm_vg_get_seqno.argtypes = [vg_t]
 lvm_vg_get_seqno.restype = c_ulonglong
+lvm_vg_get_property = lvmlib.lvm_vg_get_property
+lvm_vg_get_property.argtypes = [vg_t, c_char_p]
+lvm_vg_get_property.restype = lvm_property_value
+lvm_vg_add_tag = lvmlib.lvm_vg_add_tag
+lvm_vg_add_tag.argtypes = [vg_t, c_char_p]
+lvm_vg_remove_tag = lvmlib.lvm_vg_remove_tag
+lvm_vg_remove_tag.argtypes = [vg_t, c_char_p]
+lvm_vg_get_tags = lvmlib.lvm_vg_get_tags
+lvm_vg_get_tags.argtypes = [vg_t]
+lvm_vg_get_tags.restype = POINTER(dm_list)
 
 # PV Functions
 lvm_pv_get_name = lvmlib.lvm_pv_get_name
@@ -200,6 +283,9 @@ lvm_pv_from_uuid.restype = pv_t
 lvm_pv_from_name = lvmlib.lvm_pv_from_name
 lvm_pv_from_name.argtypes = [vg_t, c_char_p]
 lvm_pv_from_name.restype = pv_t
+lvm_pv_get_property = lvmlib.lvm_pv_get_property
+lvm_pv_get_property.argtypes = [pv_t, c_char_p]
+lvm_pv_get_property.restype = lvm_property_value
 
 # LV Functions
 lvm_lv_get_name = lvmlib.lvm_lv_get_name
@@ -226,4 +312,33 @@ lvm_lv_from_uuid.argtypes = [vg_t, c_char_p]
 lvm_lv_from_uuid.restype = lv_t
 lvm_lv_from_name = lvmlib.lvm_lv_from_name
 lvm_lv_from_name.argtypes = [vg_t, c_char_p]
-lvm_lv_from_name.restype = lv_t
\ No newline at end of file
+lvm_lv_from_name.restype = lv_t
+lvm_lv_get_property = lvmlib.lvm_lv_get_property
+lvm_lv_get_property.argtypes = [lv_t, c_char_p]
+lvm_lv_get_property.restype = lvm_property_value
+lvm_lv_add_tag = lvmlib.lvm_lv_add_tag
+lvm_lv_add_tag.argtypes = [lv_t, c_char_p]
+lvm_lv_remove_tag = lvmlib.lvm_lv_remove_tag
+lvm_lv_remove_tag.argtypes = [lv_t, c_char_p]
+lvm_lv_get_tags = lvmlib.lvm_lv_get_tags
+lvm_lv_get_tags.argtypes = [lv_t]
+lvm_lv_get_tags.restype = POINTER(dm_list)
+lvm_lv_resize = lvmlib.lvm_lv_resize
+lvm_lv_resize.argtypes = [lv_t, c_ulonglong]
+lvm_lv_snapshot = lvmlib.lvm_lv_snapshot
+lvm_lv_snapshot.argtypes = [lv_t, c_char_p, c_ulonglong]
+lvm_lv_snapshot.restype = lv_t
+lvm_lv_list_lvsegs = lvmlib.lvm_lv_list_lvsegs
+lvm_lv_list_lvsegs.argtypes = [lv_t]
+lvm_lv_list_lvsegs.restype = POINTER(dm_list)
+
+# Segment Functions
+lvm_pv_list_pvsegs = lvmlib.lvm_pv_list_pvsegs
+lvm_pv_list_pvsegs.argtypes = [pv_t]
+lvm_pv_list_pvsegs.restype = POINTER(dm_list)
+lvm_pvseg_get_property = lvmlib.lvm_pvseg_get_property
+lvm_pvseg_get_property.argtypes = [pvseg_t, c_char_p]
+lvm_pvseg_get_property.restype = lvm_property_value
+lvm_lvseg_get_property = lvmlib.lvm_lvseg_get_property
+lvm_lvseg_get_property.argtypes = [lvseg_t, c_char_p]
+lvm_lvseg_get_property.restype = lvm_property_value
@@ -0,0 +1,336 @@
+#This file is part of lvm2py.
+
+#lvm2py is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#lvm2py is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with lvm2py. If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import os
+import stat
+import threading
+import time
+try:
+    import socketserver
+except ImportError:
+    import SocketServer as socketserver
+from conversion import *
+from exception import *
+from inventory import vg_names, refresh_vg
+from lvm import LVM
+
+# The protocol is one JSON object per line in each direction. A request is
+# {"op": name, "args": {...}} and the response is {"ok": true, "result": ...}
+# or {"ok": false, "error": exception class name, "message": text}.
+
+READ_OPS = frozenset(["version", "names", "vg", "inventory"])
+WRITE_OPS = frozenset(["create_vg", "remove_vg", "add_pv", "remove_pv", "create_lv",
+                       "remove_lv", "activate", "deactivate"])
+
+
+def _remove_socket(path):
+    # Removes the socket at path. Returns False, leaving it alone, if something
+    # other than a socket is there.
+    try:
+        mode = os.lstat(path).st_mode
+    except OSError:
+        return True
+    if not stat.S_ISSOCK(mode):
+        return False
+    os.unlink(path)
+    return True
+
+
+class InventoryCache(object):
+    """
+    *The InventoryCache class keeps VGInfo records read with a long-lived lvm handle.*
+
+    A cached record is served as is for max_age seconds. After that, the volume
+    group is opened just long enough to compare its sequence number and is read
+    in full again only if it changed. The list of volume group names is refreshed
+    the same way, with a device rescan every scan_interval seconds to find volume
+    groups created by other hosts or tools.
+
+    *Args:*
+
+    *       lvm (obj):              An LVM instance, it must be kept open (see the
+                                    LVM method session).
+    *       max_age (float):        Seconds a record is served without validation.
+    *       scan_interval (float):  Seconds between device rescans.
+    """
+    def __init__(self, lvm, max_age=1.0, scan_interval=60.0):
+        self.__lvm = lvm
+        self.__max_age = max_age
+        self.__scan_interval = scan_interval
+        self.__lock = threading.RLock()
+        self.__records = {}
+        self.__checked = {}
+        self.__names = None
+        self.__names_checked = 0
+        self.__last_scan = time.time()
+
+    @property
+    def lock(self):
+        """
+        Returns the lock serializing every library call made through the cache.
+        """
+        return self.__lock
+
+    @property
+    def lvm(self):
+        """
+        Returns the LVM instance holding the lvm handle.
+        """
+        return self.__lvm
+
+    def names(self):
+        """
+        Returns the list of volume group names.
+        """
+        with self.__lock:
+            now = time.time()
+            if self.__names is None or now - self.__names_checked >= self.__max_age:
+                if now - self.__last_scan >= self.__scan_interval:
+                    lvm_scan(self.lvm.handle)
+                    self.__last_scan = now
+                self.__names = vg_names(self.lvm.handle)
+                self.__names_checked = now
+            return list(self.__names)
+
+    def get(self, name):
+        """
+        Returns the VGInfo record of the named volume group.
+
+        *Raises:*
+
+        *       HandleError
+        """
+        with self.__lock:
+            now = time.time()
+            rec = self.__records.get(name)
+            if rec is not None and now - self.__checked[name] < self.__max_age:
+                return rec
+            rec = refresh_vg(self.lvm.handle, name, rec)
+            if rec is None:
+                self.invalidate(name)
+                raise HandleError("Failed to initialize VG Handle.")
+            self.__records[name] = rec
+            self.__checked[name] = now
+            return rec
+
+    def inventory(self):
+        """
+        Returns a dict of VGInfo records indexed by name.
+        """
+        with self.__lock:
+            inventory = {}
+            for name in self.names():
+                try:
+                    inventory[name] = self.get(name)
+                except HandleError:
+                    # removed since we listed it
+                    pass
+            return inventory
+
+    def invalidate(self, name=None):
+        """
+        Drops the cached record of the named volume group, or everything (including
+        the volume group names) if no name is given.
+        """
+        with self.__lock:
+            if name is None:
+                self.__records.clear()
+                self.__checked.clear()
+                self.__names = None
+            else:
+                self.__records.pop(name, None)
+                self.__checked.pop(name, None)
+
+
+def _encode(value):
+    # Turns the VGInfo, PVInfo and LVInfo records in a result into dicts.
+    if hasattr(value, "as_dict"):
+        return value.as_dict()
+    if isinstance(value, dict):
+        return dict((k, _encode(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return [_encode(v) for v in value]
+    return value
+
+
+class _Handler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        daemon = self.server.inventory_daemon
+        for line in iter(self.rfile.readline, b""):
+            try:
+                request = json.loads(line.decode("utf-8"))
+                result = daemon.call(request["op"], request.get("args") or {})
+                response = {"ok": True, "result": _encode(result)}
+            except Exception as e:
+                response = {"ok": False, "error": e.__class__.__name__, "message": str(e)}
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class InventoryDaemon(object):
+    """
+    *The InventoryDaemon class serves the volume group inventory to local clients over
+    a Unix socket.*
+
+    The daemon holds one long-lived lvm handle and an InventoryCache, so many agents
+    on the same host share a single set of device scans and volume group locks
+    instead of each creating their own LVM instance. Clients talk to it with
+    InventoryClient::
+
+        from lvm2py import *
+        from lvm2py.daemon import InventoryDaemon
+
+        daemon = InventoryDaemon("/run/lvm2py.sock")
+        daemon.serve_forever()
+
+    Reads are answered from the cache, write operations (creating and removing
+    volume groups, physical and logical volumes, activation) are serialized with
+    every other library call and invalidate the affected volume group.
+
+    *Args:*
+
+    *       path (str):             The Unix socket path.
+    *       lvm (obj):              An LVM instance used only by the daemon.
+    *       max_age (float):        Seconds a cached record is served without
+                                    validating its sequence number.
+
+    .. note::
+
+        Access control is left to the socket file permissions.
+    """
+    def __init__(self, path, lvm=None, max_age=1.0):
+        if lvm is None:
+            lvm = LVM()
+        self.__path = path
+        self.__lvm = lvm
+        self.__cache = InventoryCache(lvm, max_age)
+        self.__server = None
+
+    @property
+    def path(self):
+        """
+        Returns the Unix socket path.
+        """
+        return self.__path
+
+    @property
+    def cache(self):
+        """
+        Returns the InventoryCache instance.
+        """
+        return self.__cache
+
+    def serve_forever(self):
+        """
+        Opens the lvm handle and serves clients until shutdown is called. A socket
+        left at path by a previous run is replaced, anything else there is an
+        error.
+
+        *Raises:*
+
+        *       HandleError, ValueError
+        """
+        if not _remove_socket(self.path):
+            raise ValueError("%s exists and is not a socket." % self.path)
+        self.__server = _Server(self.path, _Handler)
+        self.__server.inventory_daemon = self
+        try:
+            with self.__lvm.session():
+                self.__server.serve_forever()
+        finally:
+            self.__server.server_close()
+            _remove_socket(self.path)
+
+    def shutdown(self):
+        """
+        Stops serving clients, must be called from another thread.
+        """
+        if self.__server:
+            self.__server.shutdown()
+
+    def call(self, op, args):
+        """
+        Runs a protocol operation and returns its result.
+
+        *Raises:*
+
+        *       ValueError, HandleError, CommitError
+        """
+        if op not in READ_OPS and op not in WRITE_OPS:
+            raise ValueError("Unknown operation %s." % op)
+        with self.__cache.lock:
+            return getattr(self, "_op_" + op)(**args)
+
+    def _vg(self, name, mode="w"):
+        self.__cache.invalidate(name)
+        return self.__lvm.get_vg(name, mode)
+
+    def _lv(self, vg, name):
+        for lv in self.__cache.get(vg).lvs:
+            if lv.name == name:
+                return lv
+        raise HandleError("Failed to initialize LV Handle.")
+
+    def _op_version(self):
+        return version()
+
+    def _op_names(self):
+        return self.__cache.names()
+
+    def _op_vg(self, name):
+        return self.__cache.get(name)
+
+    def _op_inventory(self):
+        return self.__cache.inventory()
+
+    def _op_create_vg(self, name, devices):
+        self.__cache.invalidate()
+        self.__lvm.create_vg(name, devices)
+        return self.__cache.get(name)
+
+    def _op_remove_vg(self, name):
+        self.__cache.invalidate()
+        self.__lvm.remove_vg(self.__lvm.get_vg(name, "w"))
+
+    def _op_add_pv(self, vg, device):
+        self._vg(vg).add_pv(device)
+        return self.__cache.get(vg)
+
+    def _op_remove_pv(self, vg, device):
+        v = self._vg(vg)
+        v.remove_pv(v.get_pv(device))
+        self.__cache.invalidate()
+
+    def _op_create_lv(self, vg, name, length, units):
+        self._vg(vg).create_lv(name, length, units)
+        return self._lv(vg, name)
+
+    def _op_remove_lv(self, vg, name):
+        v = self._vg(vg)
+        v.remove_lv(v.get_lv(name))
+
+    def _op_activate(self, vg, name):
+        self._vg(vg).get_lv(name).activate()
+        return self._lv(vg, name)
+
+    def _op_deactivate(self, vg, name):
+        self._vg(vg).get_lv(name).deactivate()
+        return self._lv(vg, name)
@@ -0,0 +1,154 @@
+#This file is part of lvm2py.
+
+#lvm2py is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#lvm2py is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with lvm2py. If not, see <http://www.gnu.org/licenses/>.
+
+from collections import namedtuple
+
+# An entry in an InventoryDiff. kind is "vg", "pv" or "lv", old and new are the
+# VGInfo, PVInfo or LVInfo records on each side (old is None for created
+# objects, new for removed ones).
+Change = namedtuple("Change", ["kind", "uuid", "old", "new"])
+
+# Record fields compared to detect resized and state-changed objects.
+_SIZE_FIELDS = {
+    "vg": ("size", "extent_size", "extent_count"),
+    "pv": ("size", "dev_size"),
+    "lv": ("size",),
+}
+_STATE_FIELDS = {
+    "vg": ("is_clustered", "is_exported", "is_partial", "tags"),
+    "pv": ("vg",),
+    "lv": ("is_active", "is_suspended", "tags"),
+}
+
+
+def _index(inventory):
+    # Returns the vg, pv and lv records of an inventory, each indexed by uuid.
+    # Records read without their volumes (pvs and lvs None) add no pv or lv records.
+    if hasattr(inventory, "values"):
+        inventory = inventory.values()
+    vgs = {}
+    pvs = {}
+    lvs = {}
+    for vg in inventory:
+        vgs[vg.uuid] = vg
+        for pv in vg.pvs or ():
+            pvs[pv.uuid] = pv
+        for lv in vg.lvs or ():
+            lvs[lv.uuid] = lv
+    return vgs, pvs, lvs
+
+
+class InventoryDiff(object):
+    """
+    *The InventoryDiff class compares two inventory states.*
+
+    An inventory is a dict of VGInfo records indexed by name, as returned by the LVM
+    method inventory, or any iterable of VGInfo records. Volume groups, physical and
+    logical volumes are matched by uuid, so the comparison takes linear time no
+    matter how many objects there are::
+
+        from lvm2py import *
+
+        lvm = LVM()
+        before = lvm.inventory()
+        ...
+        after = lvm.inventory()
+        diff = InventoryDiff(before, after)
+        for change in diff.resized:
+            print change.kind, change.new.name, change.old.size, change.new.size
+
+    Each reported entry is a Change tuple (kind, uuid, old, new) where kind is "vg",
+    "pv" or "lv". An object that was both renamed and resized shows up in both lists.
+    VGInfo records read without their volumes hold none, compare inventories read
+    the same way.
+
+    *Args:*
+
+    *       old (dict):     The inventory before.
+    *       new (dict):     The inventory after.
+    """
+    def __init__(self, old, new):
+        self.__created = []
+        self.__removed = []
+        self.__renamed = []
+        self.__resized = []
+        self.__state_changed = []
+        for kind, before, after in zip(("vg", "pv", "lv"), _index(old), _index(new)):
+            self._compare(kind, before, after)
+
+    def _compare(self, kind, before, after):
+        sizes = _SIZE_FIELDS[kind]
+        states = _STATE_FIELDS[kind]
+        for uuid, new in after.items():
+            old = before.get(uuid)
+            if old is None:
+                self.__created.append(Change(kind, uuid, None, new))
+                continue
+            if old.name != new.name:
+                self.__renamed.append(Change(kind, uuid, old, new))
+            if any(getattr(old, f) != getattr(new, f) for f in sizes):
+                self.__resized.append(Change(kind, uuid, old, new))
+            if any(getattr(old, f) != getattr(new, f) for f in states):
+                self.__state_changed.append(Change(kind, uuid, old, new))
+        for uuid, old in before.items():
+            if uuid not in after:
+                self.__removed.append(Change(kind, uuid, old, None))
+
+    def __bool__(self):
+        return bool(self.__created or self.__removed or self.__renamed or
+                    self.__resized or self.__state_changed)
+
+    __nonzero__ = __bool__
+
+    @property
+    def created(self):
+        """
+        Returns a list of Change entries for the objects only present in the new
+        inventory.
+        """
+        return self.__created
+
+    @property
+    def removed(self):
+        """
+        Returns a list of Change entries for the objects only present in the old
+        inventory.
+        """
+        return self.__removed
+
+    @property
+    def renamed(self):
+        """
+        Returns a list of Change entries for the objects whose name changed (the
+        device path for physical volumes).
+        """
+        return self.__renamed
+
+    @property
+    def resized(self):
+        """
+        Returns a list of Change entries for the objects whose size changed.
+        """
+        return self.__resized
+
+    @property
+    def state_changed(self):
+        """
+        Returns a list of Change entries for the objects whose state changed: the
+        clustered, exported and partial flags and tags of volume groups, the volume
+        group of physical volumes and the active and suspended flags and tags of
+        logical volumes.
+        """
+        return self.__state_changed
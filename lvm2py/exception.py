@@ -28,4 +28,24 @@ class CommitError(Exception):
     associated to another volume group or trying to perform operations on a
     read-only volume group.
     """
-    pass
\ No newline at end of file
+    pass
+
+class ReadOnlyError(CommitError):
+    """
+    Raised when a change is attempted through an LVM instance created with
+    read_only=True.
+    """
+    pass
+try:
+    _Timeout = TimeoutError
+except NameError:
+    # Python 2
+    _Timeout = EnvironmentError
+
+class CallTimeoutError(HandleError, _Timeout):
+    """
+    Raised when an operation given a timeout didn't return in time. The library
+    call it was blocked on is abandoned and the lvm handle quarantined, the next
+    operation initializes a new one.
+    """
+    pass
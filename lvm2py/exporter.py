@@ -0,0 +1,204 @@
+#This file is part of lvm2py.
+
+#lvm2py is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#lvm2py is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with lvm2py. If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+import os
+import tempfile
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+# (metric name, record field, help text) for each exported metric.
+VG_METRICS = [
+    ("lvm_vg_size_bytes", "size", "Volume group size in bytes."),
+    ("lvm_vg_free_bytes", "free_size", "Volume group free size in bytes."),
+    ("lvm_vg_extent_size_bytes", "extent_size", "Volume group extent size in bytes."),
+    ("lvm_vg_extent_count", "extent_count", "Volume group extent count."),
+    ("lvm_vg_free_extent_count", "free_extent_count", "Volume group free extent count."),
+    ("lvm_vg_seqno", "seqno", "Volume group metadata sequence number."),
+]
+PV_METRICS = [
+    ("lvm_pv_size_bytes", "size", "Physical volume size in bytes."),
+    ("lvm_pv_free_bytes", "free", "Physical volume free size in bytes."),
+    ("lvm_pv_dev_size_bytes", "dev_size", "Physical volume device size in bytes."),
+    ("lvm_pv_mda_count", "mda_count", "Physical volume metadata area count."),
+]
+LV_METRICS = [
+    ("lvm_lv_size_bytes", "size", "Logical volume size in bytes."),
+    ("lvm_lv_active", "is_active", "1 if the logical volume is active."),
+    ("lvm_lv_suspended", "is_suspended", "1 if the logical volume is suspended."),
+]
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels):
+    return ",".join('%s="%s"' % (k, _escape(labels[k])) for k in sorted(labels))
+
+
+def _section(lines, metrics, samples):
+    # samples is a list of (labels, record) tuples
+    for metric, field, text in metrics:
+        lines.append("# HELP %s %s" % (metric, text))
+        lines.append("# TYPE %s gauge" % metric)
+        for labels, rec in samples:
+            lines.append("%s{%s} %d" % (metric, labels, int(getattr(rec, field))))
+
+
+def render(inventory, timestamp=None):
+    """
+    Returns the Prometheus text format metrics for an inventory as returned by
+    the LVM method inventory.
+
+    *Args:*
+
+    *       inventory (dict):       VGInfo records indexed by name.
+    *       timestamp (float):      Time of the scan, defaults to now.
+    """
+    vgs = []
+    pvs = []
+    lvs = []
+    for name in sorted(inventory):
+        vg = inventory[name]
+        vgs.append((_labels(vg=name), vg))
+        for pv in vg.pvs:
+            pvs.append((_labels(vg=name, pv=pv.name), pv))
+        for lv in vg.lvs:
+            lvs.append((_labels(vg=name, lv=lv.name), lv))
+    lines = []
+    _section(lines, VG_METRICS, vgs)
+    _section(lines, PV_METRICS, pvs)
+    _section(lines, LV_METRICS, lvs)
+    lines.append("# HELP lvm_scan_timestamp_seconds Time of the last inventory scan.")
+    lines.append("# TYPE lvm_scan_timestamp_seconds gauge")
+    lines.append("lvm_scan_timestamp_seconds %.3f" % (timestamp or time.time()))
+    return "\n".join(lines) + "\n"
+
+
+def write_atomic(path, data):
+    """
+    Writes data to path through a temporary file in the same directory that is
+    renamed over path, so readers never see a partially written file. The
+    temporary file is removed if anything fails.
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)),
+                               prefix=".lvm2py-", suffix=".tmp")
+    try:
+        try:
+            os.write(fd, data.encode("ascii") if not isinstance(data, bytes) else data)
+            os.fsync(fd)
+            os.fchmod(fd, 0o644)
+        finally:
+            os.close(fd)
+        os.rename(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class TextfileExporter(threading.Thread):
+    """
+    *The TextfileExporter class writes volume group, physical and logical volume
+    capacity metrics for the node_exporter textfile collector.*
+
+    Every interval seconds the exporter reads the whole inventory in one bulk scan
+    with a single lvm handle and atomically replaces path with the rendered metrics::
+
+        from lvm2py import *
+        from lvm2py.exporter import TextfileExporter
+
+        exporter = TextfileExporter(LVM(), "/var/lib/node_exporter/lvm.prom", interval=60)
+        exporter.start()
+
+    Scans never happen more often than min_interval seconds, no matter how small
+    interval is or how often export is called, which keeps the monitoring load
+    bounded on hosts with many logical volumes.
+
+    A failed scan or write doesn't stop the exporter: the error is logged, kept
+    in last_error, and the next export is tried after interval seconds. The
+    metrics file is left as it was, so lvm_scan_timestamp_seconds shows how old
+    it is.
+
+    *Args:*
+
+    *       lvm (obj):              An LVM instance used only by this exporter.
+    *       path (str):             The .prom file to write.
+    *       interval (float):       Delay between exports in seconds.
+    *       min_interval (float):   Minimum delay between scans in seconds.
+    """
+    def __init__(self, lvm, path, interval=60.0, min_interval=15.0):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.__lvm = lvm
+        self.__path = path
+        self.__interval = max(interval, min_interval)
+        self.__min_interval = min_interval
+        self.__last_scan = None
+        self.__last_error = None
+        self.__stop = threading.Event()
+
+    @property
+    def path(self):
+        """
+        Returns the path of the metrics file.
+        """
+        return self.__path
+
+    @property
+    def last_error(self):
+        """
+        Returns the exception raised by the last failed export, None if the last
+        export succeeded.
+        """
+        return self.__last_error
+
+    def export(self):
+        """
+        Scans the inventory and writes the metrics file. Returns False without
+        scanning if the last scan was less than min_interval seconds ago, True
+        otherwise.
+
+        *Raises:*
+
+        *       HandleError, OSError
+        """
+        now = time.time()
+        if self.__last_scan is not None and now - self.__last_scan < self.__min_interval:
+            return False
+        self.__last_scan = now
+        write_atomic(self.__path, render(self.__lvm.inventory(), now))
+        return True
+
+    def run(self):
+        while not self.__stop.is_set():
+            try:
+                self.export()
+            except Exception as e:
+                log.exception("Exporting to %s failed.", self.__path)
+                self.__last_error = e
+            else:
+                self.__last_error = None
+            self.__stop.wait(self.__interval)
+
+    def stop(self):
+        """
+        Stops the exporter and waits for the running export to finish.
+        """
+        self.__stop.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join()
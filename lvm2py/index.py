@@ -0,0 +1,179 @@
+#This file is part of lvm2py.
+
+#lvm2py is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#lvm2py is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with lvm2py. If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import threading
+import time
+from conversion import *
+from exception import *
+from inventory import vg_names, refresh_vg, vgname_from_device
+
+# Misses remembered at most, the cache is emptied when it is full.
+_MAX_MISSES = 4096
+
+
+class HostIndex(object):
+    """
+    *The HostIndex class indexes the physical and logical volumes of every volume
+    group by uuid, and the volume groups by device.*
+
+    The index is built in one pass over the volume groups the first time it is
+    needed. After that a lookup is a dict access plus a check of the sequence
+    number of the volume group holding the result, which is re-read only if it
+    changed. A lookup that misses re-checks every volume group, so objects created
+    since the last pass are found too. The miss is then remembered for
+    max_miss_age seconds, or until the index sees a sequence number change, so
+    probing unknown uuids or devices that are not physical volumes doesn't re-check
+    every volume group each time; an object created meanwhile is found once the
+    miss expires. Methods take an open lvm handle, see the LVM methods
+    find_lv_by_uuid, find_pv_by_uuid and vg_for_device.
+
+    *Args:*
+
+    *       max_miss_age (float):   Seconds a miss is remembered.
+    """
+    def __init__(self, max_miss_age=1.0):
+        self.__lock = threading.RLock()
+        self.__max_miss_age = max_miss_age
+        self.__vgs = {}
+        self.__lvs = {}
+        self.__pvs = {}
+        self.__devices = {}
+        # (kind, key): (generation, time, result) of the lookups that missed,
+        # valid for max_miss_age seconds while the generation, bumped by every
+        # change seen, is the same
+        self.__misses = {}
+        self.__generation = 0
+
+    def _add(self, rec):
+        self.__generation += 1
+        self.__vgs[rec.name] = rec
+        for lv in rec.lvs:
+            self.__lvs[lv.uuid] = lv
+        for pv in rec.pvs:
+            self.__pvs[pv.uuid] = pv
+            self.__devices[pv.name] = rec.name
+            self.__devices[os.path.realpath(pv.name)] = rec.name
+
+    def _drop(self, name):
+        rec = self.__vgs.pop(name, None)
+        if rec is None:
+            return
+        self.__generation += 1
+        for lv in rec.lvs:
+            if self.__lvs.get(lv.uuid) is lv:
+                del self.__lvs[lv.uuid]
+        for pv in rec.pvs:
+            if self.__pvs.get(pv.uuid) is pv:
+                del self.__pvs[pv.uuid]
+            for device in (pv.name, os.path.realpath(pv.name)):
+                if self.__devices.get(device) == name:
+                    del self.__devices[device]
+
+    def _check(self, lvmh, name):
+        # Re-reads the named volume group if its sequence number changed, drops it
+        # if it is gone.
+        old = self.__vgs.get(name)
+        rec = refresh_vg(lvmh, name, old)
+        if rec is not old:
+            self._drop(name)
+            if rec is not None:
+                self._add(rec)
+
+    def refresh(self, lvmh):
+        """
+        Checks every volume group, re-reading those whose sequence number changed
+        and dropping those that are gone.
+
+        *Raises:*
+
+        *       HandleError
+        """
+        with self.__lock:
+            names = vg_names(lvmh)
+            for name in set(self.__vgs) - set(names):
+                self._drop(name)
+            for name in names:
+                self._check(lvmh, name)
+
+    def invalidate(self):
+        """
+        Empties the index, the next lookup rebuilds it.
+        """
+        with self.__lock:
+            self.__vgs.clear()
+            self.__lvs.clear()
+            self.__pvs.clear()
+            self.__devices.clear()
+            self.__misses.clear()
+
+    def _lookup(self, lvmh, kind, table, key, owner, fallback=None):
+        with self.__lock:
+            rec = table.get(key)
+            if rec is not None:
+                self._check(lvmh, owner(rec))
+                rec = table.get(key)
+                if rec is not None:
+                    return rec
+            now = time.time()
+            miss = self.__misses.get((kind, key))
+            if miss is not None and miss[0] == self.__generation and \
+                    now - miss[1] < self.__max_miss_age:
+                return miss[2]
+            self.refresh(lvmh)
+            rec = table.get(key)
+            if rec is None:
+                if fallback is not None:
+                    rec = fallback(lvmh, key)
+                if len(self.__misses) >= _MAX_MISSES:
+                    self.__misses.clear()
+                self.__misses[(kind, key)] = (self.__generation, now, rec)
+            return rec
+
+    def lv(self, lvmh, uuid):
+        """
+        Returns the LVInfo record of the logical volume with the given uuid, None if
+        there is none.
+
+        *Raises:*
+
+        *       HandleError
+        """
+        return self._lookup(lvmh, "lv", self.__lvs, uuid, lambda lv: lv.vg)
+
+    def pv(self, lvmh, uuid):
+        """
+        Returns the PVInfo record of the physical volume with the given uuid, None
+        if there is none.
+
+        *Raises:*
+
+        *       HandleError
+        """
+        return self._lookup(lvmh, "pv", self.__pvs, uuid, lambda pv: pv.vg)
+
+    def vg_for_device(self, lvmh, device):
+        """
+        Returns the name of the volume group the device belongs to, None if it
+        belongs to none.
+
+        *Raises:*
+
+        *       HandleError
+        """
+        # devices are indexed by their resolved path too, so symlinks match, and
+        # those in no volume group we could open are asked to lvm
+        return self._lookup(lvmh, "device", self.__devices, os.path.realpath(device),
+                            lambda n: n, vgname_from_device)
@@ -0,0 +1,188 @@
+#This file is part of lvm2py.
+
+#lvm2py is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#lvm2py is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with lvm2py. If not, see <http://www.gnu.org/licenses/>.
+
+try:
+    _intern = intern
+except NameError:
+    from sys import intern as _intern
+
+
+class _Info(object):
+    # Base for the read-only record classes. Subclasses list their attributes in
+    # fields (which are also their only slots) and the string attributes that
+    # repeat a lot across an inventory in interned.
+    __slots__ = ()
+    fields = ()
+    interned = ()
+
+    def __init__(self, *args, **kwargs):
+        values = dict(zip(self.fields, args))
+        values.update(kwargs)
+        for field in self.fields:
+            value = values.get(field)
+            if field in self.interned and type(value) is str:
+                value = _intern(value)
+            elif type(value) is list:
+                # lists come back from json, keep records hashable
+                value = tuple(value)
+            object.__setattr__(self, field, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("%s is read-only." % self.__class__.__name__)
+
+    def __delattr__(self, name):
+        raise AttributeError("%s is read-only." % self.__class__.__name__)
+
+    def _values(self):
+        return tuple(getattr(self, f) for f in self.fields)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self._values() == other._values()
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self._values())
+
+    def __reduce__(self):
+        return (self.__class__, self._values())
+
+    def __repr__(self):
+        return "%s(name=%r, uuid=%r)" % (self.__class__.__name__, self.name, self.uuid)
+
+    def as_dict(self):
+        """
+        Returns the record as a dict.
+        """
+        return dict(zip(self.fields, self._values()))
+
+    @classmethod
+    def from_dict(cls, d):
+        """
+        Returns a record built from a dict returned by as_dict.
+        """
+        return cls(**dict((str(k), v) for k, v in d.items() if k in cls.fields))
+
+
+class PVInfo(_Info):
+    """
+    *The PVInfo class is a read-only record of a physical volume.*
+
+    Attributes: uuid, name (device path), vg (volume group name), size, free,
+    dev_size (sizes are integers in bytes) and mda_count.
+    """
+    fields = ("uuid", "name", "vg", "size", "free", "dev_size", "mda_count")
+    interned = ("vg",)
+    __slots__ = fields
+
+    def live(self, lvm, mode="r"):
+        """
+        Returns the PhysicalVolume instance for this record. Orphan physical
+        volumes (vg is None) have none, since PhysicalVolume instances belong to a
+        volume group.
+
+        *Args:*
+
+        *       lvm (obj):      An LVM instance.
+        *       mode (str):     "r" or "w" for read/write respectively. Default is "r".
+
+        *Raises:*
+
+        *       HandleError, ValueError
+        """
+        if self.vg is None:
+            raise ValueError("%s is an orphan physical volume." % self.name)
+        return lvm.get_vg(self.vg, mode)._pv_from_uuid(self.uuid)
+
+
+class LVInfo(_Info):
+    """
+    *The LVInfo class is a read-only record of a logical volume.*
+
+    Attributes: uuid, name, vg (volume group name), size (integer in bytes),
+    is_active, is_suspended and tags (a tuple of strings).
+    """
+    fields = ("uuid", "name", "vg", "size", "is_active", "is_suspended", "tags")
+    interned = ("name", "vg")
+    __slots__ = fields
+
+    def live(self, lvm, mode="r"):
+        """
+        Returns the LogicalVolume instance for this record.
+
+        *Args:*
+
+        *       lvm (obj):      An LVM instance.
+        *       mode (str):     "r" or "w" for read/write respectively. Default is "r".
+
+        *Raises:*
+
+        *       HandleError
+        """
+        return lvm.get_vg(self.vg, mode)._lv_from_uuid(self.uuid)
+
+
+class VGInfo(_Info):
+    """
+    *The VGInfo class is a read-only record of a volume group.*
+
+    Attributes: uuid, name, seqno, size, free_size, extent_size (sizes are integers
+    in bytes), extent_count, free_extent_count, pv_count, is_clustered, is_exported,
+    is_partial, tags (a tuple of strings), and pvs and lvs, tuples of PVInfo and
+    LVInfo records (None when the volumes were not read).
+    """
+    fields = ("uuid", "name", "seqno", "size", "free_size", "extent_size",
+              "extent_count", "free_extent_count", "pv_count", "is_clustered",
+              "is_exported", "is_partial", "tags", "pvs", "lvs")
+    interned = ("name",)
+    __slots__ = fields
+
+    def live(self, lvm, mode="r"):
+        """
+        Returns the VolumeGroup instance for this record.
+
+        *Args:*
+
+        *       lvm (obj):      An LVM instance.
+        *       mode (str):     "r" or "w" for read/write respectively. Default is "r".
+
+        *Raises:*
+
+        *       HandleError
+        """
+        return lvm.get_vg(self.name, mode)
+
+    def as_dict(self):
+        """
+        Returns the record as a dict, physical and logical volumes included as lists
+        of dicts.
+        """
+        d = _Info.as_dict(self)
+        for key in ("pvs", "lvs"):
+            if d[key] is not None:
+                d[key] = [v.as_dict() for v in d[key]]
+        return d
+
+    @classmethod
+    def from_dict(cls, d):
+        """
+        Returns a record built from a dict returned by as_dict.
+        """
+        d = dict(d)
+        for key, info in (("pvs", PVInfo), ("lvs", LVInfo)):
+            if d.get(key) is not None:
+                d[key] = tuple(info.from_dict(v) for v in d[key])
+        return super(VGInfo, cls).from_dict(d)
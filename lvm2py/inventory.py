@@ -0,0 +1,221 @@
+#This file is part of lvm2py.
+
+#lvm2py is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#lvm2py is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with lvm2py. If not, see <http://www.gnu.org/licenses/>.
+
+from ctypes import cast
+from conversion import *
+from exception import *
+from info import VGInfo, PVInfo, LVInfo
+
+# Helpers to read VGInfo, PVInfo and LVInfo records out of an already opened lvm
+# handle. They never open or close the lvm handle themselves, so callers can
+# read as many volume groups as they need within a single lvm handle.
+
+
+def walk_dm_list(head, struct):
+    """
+    Yields the contents of each element of a dm_list returned by the api, cast
+    to the given structure (lvm_str_list, lvm_pv_list or lvm_lv_list).
+    """
+    if not bool(head):
+        return
+    item = dm_list_first(head)
+    while item:
+        yield cast(item, POINTER(struct)).contents
+        if dm_list_end(head, item):
+            # end of linked list
+            break
+        item = dm_list_next(head, item)
+
+
+def property_value(prop, name):
+    """
+    Returns the string or integer held by a lvm_property_value returned by one of
+    the *_get_property functions for the named property.
+
+    *Raises:*
+
+    *       HandleError
+    """
+    if not prop.is_valid:
+        raise HandleError("Failed to read property %s." % name)
+    if prop.is_string:
+        return prop.value.string
+    return prop.value.integer
+
+
+def vg_names(lvmh):
+    """
+    Returns a list with the volume group names known to the given lvm handle.
+    """
+    names = lvm_list_vg_names(lvmh)
+    return [c.str for c in walk_dm_list(names, lvm_str_list)]
+
+
+def tag_list(head):
+    """
+    Returns the tags of a dm_list returned by lvm_vg_get_tags or lvm_lv_get_tags
+    as a tuple of strings.
+    """
+    return tuple(c.str for c in walk_dm_list(head, lvm_str_list))
+
+
+def pv_record(pvh, vgname):
+    """
+    Returns a PVInfo record of the physical volume behind the given pv_t handle.
+    """
+    return PVInfo(
+        uuid=lvm_pv_get_uuid(pvh),
+        name=lvm_pv_get_name(pvh),
+        vg=vgname,
+        size=lvm_pv_get_size(pvh),
+        free=lvm_pv_get_free(pvh),
+        dev_size=lvm_pv_get_dev_size(pvh),
+        mda_count=lvm_pv_get_mda_count(pvh),
+    )
+
+
+def lv_record(lvh, vgname):
+    """
+    Returns a LVInfo record of the logical volume behind the given lv_t handle.
+    """
+    return LVInfo(
+        uuid=lvm_lv_get_uuid(lvh),
+        name=lvm_lv_get_name(lvh),
+        vg=vgname,
+        size=lvm_lv_get_size(lvh),
+        is_active=bool(lvm_lv_is_active(lvh)),
+        is_suspended=bool(lvm_lv_is_suspended(lvh)),
+        tags=tag_list(lvm_lv_get_tags(lvh)),
+    )
+
+
+def vgname_from_device(lvmh, device):
+    """
+    Returns the name of the volume group the device belongs to, None if it is not
+    a physical volume or an orphan one.
+    """
+    vgname = lvm_vgname_from_device(lvmh, device)
+    if not vgname or vgname.startswith("#orphans"):
+        # lvm names the pseudo volume group of orphans "#orphans_<format>"
+        return None
+    return vgname
+
+
+def host_pvs(lvmh):
+    """
+    Returns a list with the PVInfo records of every physical volume known to the
+    given lvm handle, orphans included, without opening any volume group. The vg
+    attribute of orphan physical volumes is None.
+    """
+    head = lvm_list_pvs(lvmh)
+    if not bool(head):
+        return []
+    try:
+        pvs = []
+        for c in walk_dm_list(head, lvm_pv_list):
+            vgname = vgname_from_device(lvmh, lvm_pv_get_name(c.pv))
+            pvs.append(pv_record(c.pv, vgname))
+        return pvs
+    finally:
+        lvm_list_pvs_free(head)
+
+
+def iter_pvs(vgh, vgname):
+    """
+    Yields the record of each physical volume of the given vg_t handle as the
+    dm_list is walked.
+    """
+    for c in walk_dm_list(lvm_vg_list_pvs(vgh), lvm_pv_list):
+        yield pv_record(c.pv, vgname)
+
+
+def iter_lvs(vgh, vgname):
+    """
+    Yields the record of each logical volume of the given vg_t handle as the
+    dm_list is walked.
+    """
+    for c in walk_dm_list(lvm_vg_list_lvs(vgh), lvm_lv_list):
+        yield lv_record(c.lv, vgname)
+
+
+def vg_attrs(vgh, name, pvs=None, lvs=None):
+    """
+    Returns a VGInfo record of the volume group behind the given vg_t handle. The
+    physical and logical volumes are not read, pvs and lvs are stored as given.
+    """
+    return VGInfo(
+        uuid=lvm_vg_get_uuid(vgh),
+        name=name,
+        seqno=lvm_vg_get_seqno(vgh),
+        size=lvm_vg_get_size(vgh),
+        free_size=lvm_vg_get_free_size(vgh),
+        extent_size=lvm_vg_get_extent_size(vgh),
+        extent_count=lvm_vg_get_extent_count(vgh),
+        free_extent_count=lvm_vg_get_free_extent_count(vgh),
+        pv_count=lvm_vg_get_pv_count(vgh),
+        is_clustered=bool(lvm_vg_is_clustered(vgh)),
+        is_exported=bool(lvm_vg_is_exported(vgh)),
+        is_partial=bool(lvm_vg_is_partial(vgh)),
+        tags=tag_list(lvm_vg_get_tags(vgh)),
+        pvs=pvs,
+        lvs=lvs,
+    )
+
+
+def vg_record(vgh, name):
+    """
+    Returns a VGInfo record of the volume group behind the given vg_t handle,
+    including its physical and logical volume records.
+    """
+    return vg_attrs(vgh, name, tuple(iter_pvs(vgh, name)), tuple(iter_lvs(vgh, name)))
+
+
+def refresh_vg(lvmh, name, rec):
+    """
+    Opens the named volume group read-only with the given lvm handle and returns
+    rec as is if its sequence number is still the same, a new record otherwise, or
+    None if it can't be opened. rec may be None to always read the record. This is
+    the validation every cache of VGInfo records uses (LVM.inventory, the Watcher,
+    the HostIndex and the daemon InventoryCache).
+
+    *Raises:*
+
+    *       HandleError
+    """
+    vgh = lvm_vg_open(lvmh, name, "r")
+    if not bool(vgh):
+        return None
+    try:
+        if rec is None or lvm_vg_get_seqno(vgh) != rec.seqno:
+            rec = vg_record(vgh, name)
+    except BaseException:
+        # a failed close must not hide the original error
+        lvm_vg_close(vgh)
+        raise
+    if lvm_vg_close(vgh) != 0:
+        raise HandleError("Failed to close VG handle.")
+    return rec
+
+
+def read_vg(lvmh, name):
+    """
+    Opens the named volume group read-only with the given lvm handle and returns
+    its record, None if it can't be opened (usually because it was removed).
+
+    *Raises:*
+
+    *       HandleError
+    """
+    return refresh_vg(lvmh, name, None)
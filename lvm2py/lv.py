@@ -13,9 +13,14 @@
 #You should have received a copy of the GNU General Public License
 #along with lvm2py. If not, see <http://www.gnu.org/licenses/>.
 
+from ctypes import c_ulonglong
 from conversion import *
 from exception import *
 from util import *
+from inventory import lv_record, tag_list
+from segments import lv_segment_table
+from properties import get_properties
+from watchdog import timed, serialized
 
 
 class LogicalVolume(object):
@@ -104,6 +109,7 @@ class LogicalVolume(object):
         return self.__vg
 
     @property
+    @serialized
     def name(self):
         """
         Returns the logical volume name.
@@ -121,6 +127,7 @@ class LogicalVolume(object):
         return self.__uuid
 
     @property
+    @serialized
     def is_active(self):
         """
         Returns True if the logical volume is active, False otherwise.
@@ -131,6 +138,7 @@ class LogicalVolume(object):
         return bool(active)
 
     @property
+    @serialized
     def is_suspended(self):
         """
         Returns True if the logical volume is suspended, False otherwise.
@@ -140,43 +148,273 @@ class LogicalVolume(object):
         self.close()
         return bool(susp)
 
+    @property
+    @serialized
+    def tags(self):
+        """
+        Returns the logical volume tags as a list of strings.
+        """
+        self.open()
+        tags = list(tag_list(lvm_lv_get_tags(self.__lvh)))
+        self.close()
+        return tags
+
+    @timed
+    def add_tag(self, tag):
+        """
+        Adds a tag to the logical volume::
+
+            from lvm2py import *
+
+            lvm = LVM()
+            vg = lvm.get_vg("myvg", "w")
+            lv = vg.get_lv("mylv")
+            lv.add_tag("tenant=42")
+
+        *Args:*
+
+        *       tag (str):      The tag.
+
+        *Raises:*
+
+        *       HandleError, CommitError
+
+        .. note::
+
+            The VolumeGroup instance must be in write mode, otherwise CommitError
+            is raised.
+        """
+        self.open()
+        if lvm_lv_add_tag(self.handle, tag) != 0:
+            self.close()
+            raise CommitError("Failed to add tag %s." % tag)
+        self.vg._commit()
+        self.close()
+
+    @timed
+    def remove_tag(self, tag):
+        """
+        Removes a tag from the logical volume.
+
+        *Args:*
+
+        *       tag (str):      The tag.
+
+        *Raises:*
+
+        *       HandleError, CommitError
+
+        .. note::
+
+            The VolumeGroup instance must be in write mode, otherwise CommitError
+            is raised.
+        """
+        self.open()
+        if lvm_lv_remove_tag(self.handle, tag) != 0:
+            self.close()
+            raise CommitError("Failed to remove tag %s." % tag)
+        self.vg._commit()
+        self.close()
+
+    @timed
+    def get_properties(self, names):
+        """
+        Returns a dict with the values of the named lvm properties of the logical volume,
+        read while the volume group is open once::
+
+            from lvm2py import *
+
+            lvm = LVM()
+            vg = lvm.get_vg("myvg")
+            lv = vg.get_lv("mylv")
+            props = lv.get_properties(["lv_attr", "data_percent", "origin"])
+
+        Property names are those of "lvs -o help", values are decoded as in the
+        VolumeGroup method get_properties.
+
+        *Args:*
+
+        *       names (list):   The property names.
+
+        *Raises:*
+
+        *       HandleError
+        """
+        self.open()
+        try:
+            return get_properties("lv", self.handle, names)
+        finally:
+            self.close()
+
+    @timed
+    def segments(self):
+        """
+        Returns where the logical volume is allocated as a Segments tuple of integer
+        arrays (start, length, owner, names), owners being indexes into names, the
+        physical volume names, and starts the first extent on that physical volume.
+        Striped segments have one entry per stripe.
+
+        *Raises:*
+
+        *       HandleError
+        """
+        self.open()
+        try:
+            return lv_segment_table(self.handle, lvm_vg_get_extent_size(self.vg.handle))
+        finally:
+            self.close()
+
+    @timed
+    def info(self):
+        """
+        Returns a LVInfo record of the logical volume.
+
+        *Raises:*
+
+        *       HandleError
+        """
+        self.open()
+        info = lv_record(self.handle, self.vg.name)
+        self.close()
+        return info
+
+    @timed
     def size(self, units="MiB"):
         """
         Returns the logical volume size in the given units. Default units are  MiB.
 
         *Args:*
 
-        *       units (str):    Unit label ('MiB', 'GiB', etc...). Default is MiB.
+        *       units (str):    Unit label ('MiB', 'GiB', etc...). Default is MiB. None
+                                returns the exact size as a Size instance.
         """
         self.open()
         size = lvm_lv_get_size(self.__lvh)
         self.close()
-        return size_convert(size, units)
+        return size_value(size, units)
 
+    @timed
     def activate(self):
         """
         Activates the logical volume.
 
         *Raises:*
 
-        *       HandleError
+        *       HandleError, CommitError
         """
+        self.vg.lvm._check_writable()
         self.open()
         a = lvm_lv_activate(self.handle)
         self.close()
         if a != 0:
             raise CommitError("Failed to activate LV.")
 
+    @timed
     def deactivate(self):
         """
         Deactivates the logical volume.
 
         *Raises:*
 
-        *       HandleError
+        *       HandleError, CommitError
         """
+        self.vg.lvm._check_writable()
         self.open()
         d = lvm_lv_deactivate(self.handle)
         self.close()
         if d != 0:
-            raise CommitError("Failed to deactivate LV.")
\ No newline at end of file
+            raise CommitError("Failed to deactivate LV.")
+
+    @timed
+    def resize(self, length, units=None):
+        """
+        Resizes the logical volume::
+
+            from lvm2py import *
+
+            lvm = LVM()
+            vg = lvm.get_vg("myvg", "w")
+            lv = vg.get_lv("mylv")
+            lv.resize(Size("20GiB"))
+
+        lvm rounds the size up to whole extents.
+
+        *Args:*
+
+        *       length (int):           The new size, a Size instance or a size string.
+        *       units (str):            The size units. Default is B.
+
+        *Raises:*
+
+        *       HandleError, CommitError, ValueError
+
+        .. note::
+
+            The VolumeGroup instance must be in write mode, otherwise CommitError
+            is raised. Shrinking a logical volume destroys the data past the new
+            size, shrink the filesystem on it first.
+        """
+        size = Size(length, units)
+        self.open()
+        rs = lvm_lv_resize(self.handle, c_ulonglong(size))
+        self.close()
+        if rs != 0:
+            raise CommitError("Failed to resize LV.")
+
+    @timed
+    def snapshot(self, name, length=0, units=None):
+        """
+        Creates a snapshot of the logical volume and returns its LogicalVolume
+        instance::
+
+            from lvm2py import *
+
+            lvm = LVM()
+            vg = lvm.get_vg("myvg", "w")
+            lv = vg.get_lv("mylv")
+            snap = lv.snapshot("mylv-snap", 1, "GiB")
+
+        *Args:*
+
+        *       name (str):             The snapshot name.
+        *       length (int):           The maximum snapshot size, a Size instance or a
+                                        size string. 0 (the default) creates a thin
+                                        snapshot of a thin logical volume.
+        *       units (str):            The size units. Default is B.
+
+        *Raises:*
+
+        *       HandleError, CommitError, ValueError
+
+        .. note::
+
+            The VolumeGroup instance must be in write mode, otherwise CommitError
+            is raised.
+        """
+        return self.snapshots([name], length, units)[0]
+
+    @timed
+    def snapshots(self, names, length=0, units=None):
+        """
+        Creates a snapshot of the logical volume for each name, all with the same
+        vg_t handle, and returns their LogicalVolume instances in the same order::
+
+            snaps = lv.snapshots(["mylv-%d" % i for i in range(10)], 1, "GiB")
+
+        See snapshot for the arguments.
+
+        *Raises:*
+
+        *       HandleError, CommitError, ValueError
+        """
+        size = Size(length, units)
+        snaps = []
+        self.open()
+        for name in names:
+            lvh = lvm_lv_snapshot(self.handle, name, c_ulonglong(size))
+            if not bool(lvh):
+                self.close()
+                raise CommitError("Failed to create snapshot %s." % name)
+            snaps.append(self.vg._lv(lvh))
+        self.close()
+        return snaps
@@ -18,7 +18,33 @@ from conversion import *
 from exception import *
 from util import *
 from vg import VolumeGroup
+from watch import Watcher
+from inventory import vg_names, read_vg, refresh_vg, lv_record, host_pvs
+from query import lv_matcher, iter_matching_lvs
+from index import HostIndex
+from properties import report
+from watchdog import timed, coalesced
+from coalesce import SingleFlight
+from contextlib import contextmanager
 import os
+import re
+import threading
+import weakref
+
+# lvm handles abandoned after a timeout. The call blocked on one may still be
+# using it, so they are never quit, only kept here.
+_quarantine = []
+
+
+class _HandleLock(object):
+    # Serializes the use of a lvm handle, see LVM._serialized. Reentrant, and it
+    # knows its holder, so an operation that timed out while waiting for it
+    # doesn't get the handle quarantined.
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.holder = None
+        self.depth = 0
 
 
 class LVM(object):
@@ -32,10 +58,106 @@ class LVM(object):
         from lvm2py import *
 
         lvm = LVM()
+
+        # only look at two devices
+        lvm = LVM(devices=["/dev/sdb1", "/dev/sdc1"])
+
+    Restricting the devices lvm looks at makes every scan faster on hosts with many
+    block devices, and keeps lvm2py away from devices it has no business with. The
+    restriction is applied on top of the system configuration, through a
+    configuration override each time the lvm handle is initialized.
+
+    Every operation normally initializes the lvm handle, which scans the devices,
+    and releases it when done. With auto_rescan=False the handle is initialized
+    once and kept until release is called, so every operation works from the
+    device state of the last scan, and devices are only scanned again when rescan
+    is called. inventory also serves its records from a cache, re-reading only the
+    volume groups whose sequence number moved; the other methods still read the
+    volume group metadata each time::
+
+        lvm = LVM(auto_rescan=False)
+        inventory = lvm.inventory()     # scans
+        inventory = lvm.inventory()     # sequence numbers only
+        lvm.rescan()                    # after adding a disk
+
+    An instance can be shared between threads. Each operation holds the lvm
+    handle while it runs, so the operations of different threads run one after
+    the other, and identical reads running at the same time (inventory, vgscan
+    and the VolumeGroup methods info, pvscan and lvscan) share one call and its
+    result.
+
+    A dead device can block a library call for minutes. The methods of LVM,
+    VolumeGroup, PhysicalVolume and LogicalVolume take a timeout keyword argument,
+    in seconds (the default is the timeout given here, None waits forever). With a
+    timeout the operation runs on a watchdog worker thread; if it doesn't return in
+    time it is abandoned and CallTimeoutError is raised. The lvm handle it was
+    using is quarantined, never used again, and the next operation initializes a
+    new one. The abandoned operation may still complete later, so after a timeout
+    the outcome of a change (create_lv, reconcile, remove_vg, ...) is unknown until
+    it is read again. Properties, session and watch are not timed::
+
+        lvm = LVM(timeout=30)
+        try:
+            vg = lvm.get_vg("myvg", timeout=5)
+        except CallTimeoutError:
+            ...
+
+    *Args:*
+
+    *       system_dir (str):       The lvm system directory, see set_system_dir.
+    *       devices (list):         The only devices to scan.
+    *       device_filter (list):   A lvm device filter, such as ["a|^/dev/sd|",
+                                    "r|.*|"], used instead of devices.
+    *       config (str):           Any other lvm configuration to override, in lvm.conf
+                                    syntax.
+    *       read_only (bool):       Refuse every change, see read_only.
+    *       auto_rescan (bool):     Release the lvm handle after each operation.
+    *       timeout (float):        Default timeout of every operation in seconds.
+
+    *Raises:*
+
+    *       ValueError
     """
-    def __init__(self):
+    # the class default, set by set_system_dir
+    __path = None
+
+    def __init__(self, system_dir=None, devices=None, device_filter=None, config=None,
+                 read_only=False, auto_rescan=True, timeout=None):
+        if devices is not None and device_filter is not None:
+            raise ValueError("devices and device_filter are exclusive.")
+        self.__settings = dict(system_dir=system_dir, devices=devices,
+                               device_filter=device_filter, config=config,
+                               read_only=read_only, auto_rescan=auto_rescan,
+                               timeout=timeout)
         self.__handle = None
-        self.__path = None
+        self.__timeout = timeout
+        self.__generation = 0
+        self.__abandoned = weakref.WeakSet()
+        self.__read_only = read_only
+        self.__auto_rescan = auto_rescan
+        self.__records = {}
+        if system_dir is not None:
+            self.__path = system_dir
+        self.__overrides = []
+        if devices is not None:
+            device_filter = ["a|^%s$|" % re.escape(d) for d in devices] + ["r|.*|"]
+        if device_filter is not None:
+            rules = ", ".join('"%s"' % rule for rule in device_filter)
+            self.__overrides.append("devices { filter = [ %s ] global_filter = [ %s ] }"
+                                    % (rules, rules))
+        if config:
+            self.__overrides.append(config)
+        if read_only:
+            # no locking at all, so readers never wait for or block writers, and
+            # no metadata updates lvm might do on its own (such as repairing or
+            # upgrading the format) while we only read
+            self.__overrides.append("global { locking_type = 0 metadata_read_only = 1 }")
+        self.__sessions = 0
+        self.__objects = weakref.WeakValueDictionary()
+        self.__objects_lock = threading.Lock()
+        self.__index = HostIndex()
+        self.__flight = SingleFlight()
+        self.__lock = _HandleLock()
 
     @classmethod
     def set_system_dir(self, path):
@@ -68,9 +190,22 @@ class LVM(object):
                 path = self.system_dir
             except AttributeError:
                 path = ''
-            self.__handle = lvm_init(path)
+            handle = lvm_init(path)
+            # the operation may have been abandoned while lvm_init was blocked
+            self._check_abandoned()
+            self.__handle = handle
             if not bool(self.__handle):
                 raise HandleError("Failed to initialize LVM handle.")
+            if self.__overrides:
+                self._configure()
+
+    def _configure(self):
+        # Applies the configuration overrides to the freshly initialized handle.
+        if lvm_config_override(self.__handle, "\n".join(self.__overrides)) != 0 or \
+                lvm_config_reload(self.__handle) != 0:
+            lvm_quit(self.__handle)
+            self.__handle = None
+            raise HandleError("Failed to apply the LVM configuration overrides.")
 
     def close(self):
         """
@@ -80,13 +215,221 @@ class LVM(object):
         *Raises:*
 
         *       HandleError
+
+        .. note::
+
+            Within a session this does nothing, the handle is closed when the
+            outermost session ends. With auto_rescan=False it does nothing either,
+            see release.
         """
+        if self.__auto_rescan and not self.__sessions:
+            self._quit()
+
+    def _quit(self):
         if self.handle:
             q = lvm_quit(self.handle)
             if q != 0:
                 raise HandleError("Failed to close LVM handle.")
             self.__handle = None
 
+    def release(self):
+        """
+        Closes the lvm handle even with auto_rescan=False, in which case the next
+        operation initializes a new one and scans the devices again. Cached
+        records are dropped.
+
+        *Raises:*
+
+        *       HandleError
+        """
+        with self._serialized():
+            if not self.__sessions:
+                self._quit()
+                self.__records = {}
+                self.__index.invalidate()
+
+    @timed
+    def rescan(self):
+        """
+        Scans the devices again, so new or removed physical volumes and volume
+        groups are seen without releasing the lvm handle. Cached records are
+        dropped.
+
+        *Raises:*
+
+        *       HandleError
+        """
+        self.open()
+        try:
+            if lvm_scan(self.handle) != 0:
+                raise HandleError("Failed to rescan devices.")
+        finally:
+            self.close()
+        self.__records = {}
+        self.__index.invalidate()
+
+    @contextmanager
+    def session(self):
+        """
+        Keeps the lvm handle open for the duration of a with block, so every
+        VolumeGroup, PhysicalVolume and LogicalVolume operation done inside reuses
+        it instead of initializing a new one::
+
+            from lvm2py import *
+
+            lvm = LVM()
+            with lvm.session():
+                for vg in lvm.vgscan():
+                    print vg.name, vg.size()
+
+        Sessions can be nested, the handle is closed when the outermost one ends.
+        Other threads can use the instance during a session, each operation holds
+        the handle while it runs, not the whole session.
+
+        *Raises:*
+
+        *       HandleError
+        """
+        with self._serialized():
+            self.open()
+            self.__sessions += 1
+        try:
+            yield self
+        finally:
+            with self._serialized():
+                self.__sessions -= 1
+                self.close()
+
+    @property
+    def read_only(self):
+        """
+        Returns True if the instance was created with read_only=True. lvm is then
+        configured without locking and with read-only metadata, and every method
+        that would change something (opening a volume group in write mode, creating
+        or removing volume groups, activating logical volumes...) raises
+        ReadOnlyError before calling the library.
+
+        .. note::
+
+            Without locks reads never contend with writers, but a read racing a
+            metadata update can see the previous version of a volume group, or
+            fail with HandleError if the metadata area is caught mid-write; retry
+            such reads. lvm logs a warning about disabled locking each time the
+            handle is initialized.
+        """
+        return self.__read_only
+
+    def _check_writable(self):
+        if self.__read_only:
+            raise ReadOnlyError("LVM instance is read-only.")
+
+    @property
+    def timeout(self):
+        """
+        Returns the default timeout of the operations in seconds, None if they wait
+        forever.
+        """
+        return self.__timeout
+
+    @property
+    def _generation(self):
+        # Incremented each time the lvm handle is quarantined, so VolumeGroup
+        # instances know their vg_t handle belongs to an abandoned one.
+        return self.__generation
+
+    def _check_abandoned(self):
+        # Stops an abandoned operation at its next use of a handle, once the
+        # library call it was blocked on returns.
+        if threading.current_thread() in self.__abandoned:
+            raise HandleError("Operation abandoned after a timeout.")
+
+    @contextmanager
+    def _serialized(self):
+        # Holds the lvm handle, so no other thread uses (or closes) it meanwhile.
+        # The lock is replaced when the handle is quarantined, a thread that got
+        # the old one tries again with the new one.
+        while True:
+            lock = self.__lock
+            lock.lock.acquire()
+            if lock is self.__lock:
+                break
+            lock.lock.release()
+        lock.holder = threading.current_thread()
+        lock.depth += 1
+        try:
+            self._check_abandoned()
+            yield
+        finally:
+            lock.depth -= 1
+            if not lock.depth:
+                lock.holder = None
+            lock.lock.release()
+
+    def _abandon(self, worker):
+        # Stops the worker at its next use of a handle. If it holds the lvm handle,
+        # rather than waiting for it, the handle is quarantined: the state it may
+        # be holding locks on is replaced rather than cleared.
+        self.__abandoned.add(worker)
+        if self.__lock.holder is not worker:
+            return
+        if self.__handle:
+            _quarantine.append(self.__handle)
+        self.__handle = None
+        self.__generation += 1
+        self.__records = {}
+        self.__index = HostIndex()
+        self.__lock = _HandleLock()
+        # later reads must not join the calls left on the quarantined handle
+        self.__flight = SingleFlight()
+
+    def _coalesce(self, key, fn, *args):
+        # Concurrent identical reads share one call and its result, see
+        # coalesce.SingleFlight. The call holds the lvm handle, so a thread
+        # already holding it runs fn itself rather than join a call waiting for
+        # it. Callers return copies of mutable results.
+        if self.__lock.holder is threading.current_thread():
+            return fn(*args)
+        return self.__flight.do(key, self._serialized_call, fn, *args)
+
+    def _serialized_call(self, fn, *args):
+        with self._serialized():
+            return fn(*args)
+
+    def _clone(self):
+        # Returns a new instance with the same settings, for the helpers that need
+        # their own lvm handle.
+        return self.__class__(**self.__settings)
+
+    def _identity(self, key, factory, valid=None, check=None):
+        # Returns the live object registered under key, or registers and returns
+        # a new one made by factory if there is none (or valid, which must not
+        # call the library, rejects it). check is called on a registered object
+        # before it is reused. Objects are only weakly referenced, so the map
+        # never keeps them alive. factory and check run outside the lock, as
+        # they use the lvm handle: when two threads make an object for the same
+        # key, both get the one registered first.
+        with self.__objects_lock:
+            obj = self.__objects.get(key)
+        if obj is not None and (valid is None or valid(obj)):
+            if check is not None:
+                check(obj)
+            return obj
+        new = factory()
+        with self.__objects_lock:
+            obj = self.__objects.get(key)
+            if obj is None or (valid is not None and not valid(obj)):
+                obj = self.__objects[key] = new
+            return obj
+
+    def _vg(self, name, mode):
+        # Returns the VolumeGroup instance for name and mode, see _identity. One
+        # that is reused is checked the way a new one is, so a volume group
+        # removed since still raises HandleError.
+        return self._identity(("vg", name, mode),
+                              lambda: VolumeGroup(self, name=name, mode=mode),
+                              lambda vg: vg.mode == mode,
+                              lambda vg: vg._check())
+
     def _close_vg(self, vgh):
         cl = lvm_vg_close(vgh)
         if cl != 0:
@@ -110,6 +453,7 @@ class LVM(object):
         Returns the lvm handle provided by the api represented by a ctypes opaque
         structure. After calling the close() method this will return None.
         """
+        self._check_abandoned()
         return self.__handle
 
     @property
@@ -127,6 +471,7 @@ class LVM(object):
         """
         return version()
 
+    @timed
     def get_vg(self, name, mode="r"):
         """
         Returns an instance of VolumeGroup. The name parameter should be an existing
@@ -149,13 +494,16 @@ class LVM(object):
         *       name (str):     An existing volume group name.
         *       mode (str):     "r" or "w" for read/write respectively. Default is "r".
 
+        The same VolumeGroup instance is returned for the same name and mode as
+        long as one is referenced somewhere, see VolumeGroup.
+
         *Raises:*
 
         *       HandleError
         """
-        vg = VolumeGroup(self, name=name, mode=mode)
-        return vg
+        return self._vg(name, mode)
 
+    @timed
     def create_vg(self, name, devices):
         """
         Returns a new instance of VolumeGroup with the given name and added physycal
@@ -175,6 +523,7 @@ class LVM(object):
 
         *       HandleError, CommitError, ValueError
         """
+        self._check_writable()
         self.open()
         vgh = lvm_vg_create(self.handle, name)
         if not bool(vgh):
@@ -194,9 +543,9 @@ class LVM(object):
                 self._destroy_vg(vgh)
                 raise CommitError("Failed to add %s to VolumeGroup." % device)
         self._close_vg(vgh)
-        vg = VolumeGroup(self, name)
-        return vg
+        return self._vg(name, "r")
 
+    @timed
     def remove_vg(self, vg):
         """
         Removes a volume group::
@@ -220,6 +569,7 @@ class LVM(object):
             The VolumeGroup instance must be in write mode, otherwise CommitError
             is raised.
         """
+        self._check_writable()
         vg.open()
         rm = lvm_vg_remove(vg.handle)
         if rm != 0:
@@ -231,6 +581,7 @@ class LVM(object):
             raise CommitError("Failed to commit changes to disk.")
         vg.close()
 
+    @coalesced
     def vgscan(self):
         """
         Probes the system for volume groups and returns a list of VolumeGroup
@@ -246,10 +597,17 @@ class LVM(object):
         *       HandleError
         """
         vg_list = []
+        for name in self._coalesce(("vg_names",), self._vg_names):
+            vginst = self.get_vg(name)
+            vg_list.append(vginst)
+        return vg_list
+
+    def _vg_names(self):
         self.open()
         names = lvm_list_vg_names(self.handle)
         if not bool(names):
-            return vg_list
+            self.close()
+            return []
         vgnames = []
         vg = dm_list_first(names)
         while vg:
@@ -260,7 +618,308 @@ class LVM(object):
                 break
             vg = dm_list_next(names, vg)
         self.close()
-        for name in vgnames:
-            vginst = self.get_vg(name)
-            vg_list.append(vginst)
-        return vg_list
\ No newline at end of file
+        return vgnames
+
+    @timed
+    def pvscan(self):
+        """
+        Returns a list with the PVInfo records of every physical volume on the host,
+        including the orphan ones that belong to no volume group::
+
+            from lvm2py import *
+
+            lvm = LVM()
+            for pv in lvm.pvscan():
+                print pv.name, pv.vg or "(orphan)", pv.free
+
+        The physical volumes are listed with a single library call, no volume group
+        is opened.
+
+        *Raises:*
+
+        *       HandleError
+        """
+        self.open()
+        try:
+            return host_pvs(self.handle)
+        finally:
+            self.close()
+
+    @coalesced
+    def inventory(self):
+        """
+        Reads every volume group with a single lvm handle and returns a dict of
+        VGInfo records indexed by name::
+
+            from lvm2py import *
+
+            lvm = LVM()
+            inventory = lvm.inventory()
+            for lv in inventory["myvg"].lvs:
+                print lv.name, lv.size
+
+        Each VGInfo record holds the volume group attributes plus its PVInfo and
+        LVInfo records in the pvs and lvs attributes. Sizes are integers in bytes.
+        Two inventories can be compared with InventoryDiff.
+
+        Threads asking for the inventory while a read is in flight share its
+        result instead of reading again, see LVM.
+
+        *Raises:*
+
+        *       HandleError
+        """
+        return dict(self._coalesce(("inventory",), self._inventory))
+
+    def _inventory(self):
+        inventory = {}
+        self.open()
+        try:
+            for name in vg_names(self.handle):
+                if self.__auto_rescan:
+                    rec = read_vg(self.handle, name)
+                else:
+                    rec = refresh_vg(self.handle, name, self.__records.get(name))
+                if rec is not None:
+                    inventory[name] = rec
+        finally:
+            self.close()
+        if not self.__auto_rescan:
+            self.__records = dict(inventory)
+        return inventory
+
+    @timed
+    def tag_index(self, inventory=None):
+        """
+        Returns a dict of lists of LVInfo records indexed by tag, for the logical
+        volumes of every volume group::
+
+            from lvm2py import *
+
+            lvm = LVM()
+            index = lvm.tag_index()
+            for lv in index.get("tenant=42", []):
+                print lv.vg, lv.name
+
+        The index is built from a single inventory scan, or from the given one.
+
+        *Args:*
+
+        *       inventory (dict):   VGInfo records indexed by name, as returned by
+                                    inventory. Default is to scan.
+
+        *Raises:*
+
+        *       HandleError
+        """
+        if inventory is None:
+            inventory = self.inventory()
+        index = {}
+        for name in sorted(inventory):
+            for lv in inventory[name].lvs:
+                for tag in lv.tags:
+                    index.setdefault(tag, []).append(lv)
+        return index
+
+    @timed
+    def find_lv_records(self, vgs=None, limit=None, **filters):
+        """
+        Returns a list of the LVInfo records of the logical volumes of every volume
+        group (or those named in vgs) matching every given filter::
+
+            from lvm2py import *
+
+            lvm = LVM()
+            for lv in lvm.find_lv_records(tags=["tenant=42"], active=True):
+                print lv.vg, lv.name
+
+        Volume groups are opened read-only one at a time with a single lvm handle
+        and filters are evaluated while each one is open, see the VolumeGroup method
+        find_lvs. Once limit matches are found no further volume group is opened.
+
+        *Args:*
+
+        *       vgs (list):         Names of the volume groups to search.
+        *       limit (int):        Maximum number of matches.
+        *       filters:            name, min_size, max_size, active, suspended and
+                                    tags, see query.lv_matcher.
+
+        *Raises:*
+
+        *       HandleError, ValueError, TypeError
+        """
+        match = lv_matcher(**filters)
+        found = []
+        self.open()
+        try:
+            for name in vgs or vg_names(self.handle):
+                if limit is not None and len(found) >= limit:
+                    break
+                vgh = lvm_vg_open(self.handle, name, "r")
+                if not bool(vgh):
+                    continue
+                try:
+                    left = limit - len(found) if limit is not None else None
+                    found.extend(lv_record(lvh, name)
+                                 for lvh in iter_matching_lvs(vgh, match, left))
+                except BaseException:
+                    # a failed close must not hide the original error
+                    lvm_vg_close(vgh)
+                    raise
+                if lvm_vg_close(vgh) != 0:
+                    raise HandleError("Failed to close VG handle.")
+        finally:
+            self.close()
+        return found
+
+    def _index_lookup(self, method, key):
+        self.open()
+        try:
+            return method(self.handle, key)
+        finally:
+            self.close()
+
+    @timed
+    def find_lv_by_uuid(self, uuid):
+        """
+        Returns the LVInfo record of the logical volume with the given uuid, in any
+        volume group, or None if there is none::
+
+            from lvm2py import *
+
+            lvm = LVM()
+            rec = lvm.find_lv_by_uuid("Zz1Kcn-...")
+            lv = rec.live(lvm)
+
+        Logical and physical volumes are indexed by uuid over every volume group
+        the first time one is looked up. Later lookups only check the sequence
+        number of the volume group holding the result, and misses are remembered
+        for a second, see index.HostIndex. Outside of a session each call
+        initializes the lvm handle, which scans the devices, so run repeated
+        lookups inside session or with auto_rescan=False::
+
+            with lvm.session():
+                recs = [lvm.find_lv_by_uuid(uuid) for uuid in uuids]
+
+        *Args:*
+
+        *       uuid (str):     A logical volume uuid.
+
+        *Raises:*
+
+        *       HandleError
+        """
+        return self._index_lookup(self.__index.lv, uuid)
+
+    @timed
+    def find_pv_by_uuid(self, uuid):
+        """
+        Returns the PVInfo record of the physical volume with the given uuid, or
+        None if it is in no volume group. See find_lv_by_uuid.
+
+        *Args:*
+
+        *       uuid (str):     A physical volume uuid.
+
+        *Raises:*
+
+        *       HandleError
+        """
+        return self._index_lookup(self.__index.pv, uuid)
+
+    @timed
+    def vg_for_device(self, device):
+        """
+        Returns the name of the volume group a device belongs to, or None::
+
+            from lvm2py import *
+
+            lvm = LVM()
+            name = lvm.vg_for_device("/dev/sdb1")
+
+        Devices are looked up in the same index as find_lv_by_uuid, symlinks
+        included, and lvm is asked directly for those that are not in it.
+
+        *Args:*
+
+        *       device (str):   A device path.
+
+        *Raises:*
+
+        *       HandleError
+        """
+        return self._index_lookup(self.__index.vg_for_device, device)
+
+    @timed
+    def report(self, kind, names, vgs=None):
+        """
+        Returns a list of dicts of the named lvm properties, one per volume group,
+        physical or logical volume, like the -o option of the lvm reporting
+        commands::
+
+            from lvm2py import *
+
+            lvm = LVM()
+            for row in lvm.report("lv", ["vg_name", "lv_name", "lv_attr", "data_percent"]):
+                print row
+
+        Volume groups are opened read-only one at a time with a single lvm handle.
+        Values are decoded as in the VolumeGroup method get_properties.
+
+        *Args:*
+
+        *       kind (str):     "vg", "pv" or "lv".
+        *       names (list):   The property names.
+        *       vgs (list):     Names of the volume groups to report, all by default.
+
+        *Raises:*
+
+        *       HandleError, ValueError
+        """
+        if kind not in ("vg", "pv", "lv"):
+            raise ValueError("Invalid kind %s." % kind)
+        self.open()
+        try:
+            return list(report(self.handle, kind, list(names), vgs))
+        finally:
+            self.close()
+
+    def watch(self, callback, interval=1.0, max_interval=None):
+        """
+        Starts watching the volume groups for changes and returns the running Watcher
+        instance. The callback is called from the watcher thread with a VGChange
+        instance for every volume group that was created, removed or modified::
+
+            from lvm2py import *
+
+            def changed(change):
+                if change.removed_lvs:
+                    cleanup(change.name, change.removed_lvs)
+
+            lvm = LVM()
+            watcher = lvm.watch(changed, interval=1, max_interval=30)
+            ...
+            watcher.stop()
+
+        Only the volume group sequence numbers are read on each poll, the volume
+        groups that changed are the only ones read in full. Idle polls back off up
+        to max_interval seconds.
+
+        *Args:*
+
+        *       callback (callable):    Called with a VGChange instance.
+        *       interval (float):       Minimum delay between polls in seconds.
+        *       max_interval (float):   Maximum delay between polls in seconds.
+
+        *Raises:*
+
+        *       ValueError
+
+        .. note::
+
+            The watcher uses its own lvm handle, so this instance can still be used
+            while the watcher is running.
+        """
+        watcher = Watcher(self._clone(), callback, interval, max_interval)
+        watcher.start()
+        return watcher
\ No newline at end of file
@@ -0,0 +1,187 @@
+#This file is part of lvm2py.
+
+#lvm2py is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#lvm2py is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with lvm2py. If not, see <http://www.gnu.org/licenses/>.
+
+from collections import namedtuple
+from util import *
+
+# A logical volume of an AllocationPlan. size is the requested size rounded up to
+# whole extents, segments is a list of (pv name, extent count) tuples in
+# allocation order.
+PlannedLV = namedtuple("PlannedLV", ["name", "size", "extents", "segments"])
+
+
+def parse_request(request):
+    """
+    Returns (name, length, units) for a (name, length[, units]) tuple or a
+    {"name": ..., "size": ..., "units": ...} dict.
+
+    *Raises:*
+
+    *       ValueError
+    """
+    if isinstance(request, dict):
+        if "name" not in request or "size" not in request:
+            raise ValueError("Invalid request %r, name and size are required." % request)
+        return request["name"], request["size"], request.get("units")
+    if isinstance(request, (tuple, list)):
+        if len(request) == 2:
+            return request[0], request[1], None
+        if len(request) == 3:
+            return tuple(request)
+    raise ValueError("Invalid request %r." % (request,))
+
+
+def request_size(vg, length, units):
+    """
+    Returns the size in bytes of a logical volume request as a Size instance, "%"
+    units being a percentage of the size of the volume group described by the
+    VGInfo record vg.
+
+    *Raises:*
+
+    *       ValueError, KeyError
+    """
+    if units != "%":
+        return Size(length, units)
+    if not (0 < length <= 100) or type(length) is float:
+        raise ValueError("Length not supported.")
+    return Size(vg.size) * length // 100
+
+
+class AllocationPlan(object):
+    """
+    *The AllocationPlan class describes how a list of logical volumes would be
+    allocated in a volume group.*
+
+    It is returned by the VolumeGroup method plan_lvs and computed entirely in
+    memory. fits is True when every requested logical volume can be created,
+    otherwise errors lists the reasons it can't.
+    """
+    def __init__(self, vg, extent_size, lvs, free_extents, errors):
+        self.__vg = vg
+        self.__extent_size = extent_size
+        self.__lvs = lvs
+        self.__free_extents = free_extents
+        self.__errors = errors
+
+    def __iter__(self):
+        return iter(self.__lvs)
+
+    def __len__(self):
+        return len(self.__lvs)
+
+    @property
+    def vg(self):
+        """
+        Returns the VGInfo record the plan was computed from.
+        """
+        return self.__vg
+
+    @property
+    def extent_size(self):
+        """
+        Returns the volume group extent size as a Size instance.
+        """
+        return self.__extent_size
+
+    @property
+    def lvs(self):
+        """
+        Returns the list of PlannedLV tuples, in request order.
+        """
+        return self.__lvs
+
+    @property
+    def free_extents(self):
+        """
+        Returns the number of free extents left after the plan is applied.
+        """
+        return self.__free_extents
+
+    @property
+    def errors(self):
+        """
+        Returns a list of error messages, empty when the plan fits.
+        """
+        return self.__errors
+
+    @property
+    def fits(self):
+        """
+        Returns True if every requested logical volume fits, False otherwise.
+        """
+        return not self.__errors
+
+
+def plan_allocation(vg, requests):
+    """
+    Plans the creation of a list of linear logical volumes in the volume group
+    described by a VGInfo record, without touching lvm, and returns an
+    AllocationPlan.
+
+    Each request is a (name, length) or (name, length, units) tuple, or a dict
+    with "name", "size" and optional "units" keys, where length and units are
+    what the VolumeGroup method create_lv takes ("%" being a percentage of the
+    volume group size). Sizes are rounded up to whole extents and extents are
+    taken from the physical volumes in order, a logical volume spanning as many
+    of them as needed.
+
+    *Args:*
+
+    *       vg (obj):           A VGInfo record including its PVInfo and LVInfo
+                                records.
+    *       requests (list):    The logical volumes to plan.
+    """
+    extent_size = Size(vg.extent_size)
+    free = [[pv.name, pv.free // extent_size] for pv in vg.pvs]
+    free_extents = sum(f[1] for f in free)
+    names = set(lv.name for lv in vg.lvs)
+    planned = []
+    errors = []
+    for request in requests:
+        try:
+            name, length, units = parse_request(request)
+        except ValueError as e:
+            errors.append(str(e))
+            continue
+        if name in names:
+            errors.append("%s: logical volume already exists." % name)
+            continue
+        names.add(name)
+        try:
+            size = request_size(vg, length, units)
+        except (ValueError, KeyError) as e:
+            errors.append("%s: %s" % (name, e))
+            continue
+        extents = size.extents(extent_size)
+        if extents == 0:
+            errors.append("%s: size must be greater than zero." % name)
+            continue
+        if extents > free_extents:
+            errors.append("%s: needs %d extents, %d free." % (name, extents, free_extents))
+            continue
+        segments = []
+        needed = extents
+        for pv in free:
+            if not needed:
+                break
+            take = min(pv[1], needed)
+            if take:
+                segments.append((pv[0], take))
+                pv[1] -= take
+                needed -= take
+        free_extents -= extents
+        planned.append(PlannedLV(name, Size(extents * extent_size), extents, segments))
+    return AllocationPlan(vg, extent_size, planned, free_extents, errors)
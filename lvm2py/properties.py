@@ -0,0 +1,111 @@
+#This file is part of lvm2py.
+
+#lvm2py is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#lvm2py is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with lvm2py. If not, see <http://www.gnu.org/licenses/>.
+
+from conversion import *
+from exception import *
+from util import *
+from inventory import walk_dm_list, vg_names, property_value
+
+# Properties holding a size in bytes, decoded as Size instances.
+SIZE_PROPERTIES = frozenset([
+    "vg_size", "vg_free", "vg_extent_size", "vg_mda_size", "vg_mda_free",
+    "pv_size", "pv_free", "pv_used", "dev_size", "pe_start", "pv_mda_size",
+    "pv_mda_free", "pv_ba_start", "pv_ba_size",
+    "lv_size", "lv_metadata_size", "origin_size", "seg_size", "seg_start",
+    "stripe_size", "region_size", "chunk_size",
+])
+
+# Properties holding a percentage scaled by lvm (100% is 100000000), decoded as
+# floats between 0 and 100, or None when lvm has no value.
+PERCENT_PROPERTIES = frozenset([
+    "data_percent", "metadata_percent", "snap_percent", "copy_percent",
+    "sync_percent",
+])
+_PERCENT_1 = 1000000.0
+
+_GETTERS = {
+    "vg": lvm_vg_get_property,
+    "pv": lvm_pv_get_property,
+    "lv": lvm_lv_get_property,
+}
+
+
+def decode(name, value):
+    """
+    Returns the typed value of a property as returned by inventory.property_value:
+    a Size for sizes, a float for percentages, a signed integer for other numbers
+    (lvm returns -1 as an unsigned 64 bit value) and strings as they are. Sizes
+    and percentages lvm reports as unset (-1) are returned as None.
+    """
+    if isinstance(value, str) or value is None:
+        return value
+    if value >= 2 ** 63:
+        value -= 2 ** 64
+    if name in PERCENT_PROPERTIES:
+        return value / _PERCENT_1 if value >= 0 else None
+    if name in SIZE_PROPERTIES:
+        return Size(value) if value >= 0 else None
+    return value
+
+
+def get_properties(kind, handle, names):
+    """
+    Returns a dict of the decoded values of the named properties of a vg_t, pv_t or
+    lv_t handle, kind being "vg", "pv" or "lv".
+
+    *Raises:*
+
+    *       HandleError, KeyError
+    """
+    getter = _GETTERS[kind]
+    values = {}
+    for name in names:
+        values[name] = decode(name, property_value(getter(handle, name), name))
+    return values
+
+
+def report(lvmh, kind, names, vgs=None):
+    """
+    Yields a dict of the named properties for each volume group, physical or
+    logical volume (kind being "vg", "pv" or "lv") of every volume group, or those
+    named in vgs, opening one volume group at a time with the given lvm handle.
+    This is the equivalent of the -o option of the lvm reporting commands.
+
+    *Raises:*
+
+    *       HandleError, KeyError
+    """
+    for vgname in vgs or vg_names(lvmh):
+        vgh = lvm_vg_open(lvmh, vgname, "r")
+        if not bool(vgh):
+            if vgs:
+                raise HandleError("Failed to initialize VG Handle for %s." % vgname)
+            continue
+        try:
+            if kind == "vg":
+                yield get_properties(kind, vgh, names)
+            elif kind == "pv":
+                for c in walk_dm_list(lvm_vg_list_pvs(vgh), lvm_pv_list):
+                    yield get_properties(kind, c.pv, names)
+            else:
+                for c in walk_dm_list(lvm_vg_list_lvs(vgh), lvm_lv_list):
+                    yield get_properties(kind, c.lv, names)
+        except BaseException:
+            # a failed close must not hide the original error (or the
+            # GeneratorExit of a consumer that stopped early)
+            lvm_vg_close(vgh)
+            raise
+        if lvm_vg_close(vgh) != 0:
+            raise HandleError("Failed to close VG handle.")
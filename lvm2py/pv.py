@@ -16,10 +16,15 @@
 from conversion import *
 from exception import *
 from util import *
+from inventory import pv_record
+from segments import segment_map, largest_free_run
+from properties import get_properties
+from watchdog import timed, serialized
 
 # Physical volume handling should not be needed anymore. Only physical volumes
 # bound to a vg contain useful information. Therefore the creation,
 # modification and the removal of orphan physical volumes is not suported.
+# Orphans can still be listed with the LVM method pvscan.
 
 
 class PhysicalVolume(object):
@@ -108,6 +113,7 @@ class PhysicalVolume(object):
         return self.__vg
 
     @property
+    @serialized
     def name(self):
         """
         Returns the physical volume device path.
@@ -125,6 +131,7 @@ class PhysicalVolume(object):
         return self.__uuid
 
     @property
+    @serialized
     def mda_count(self):
         """
         Returns the physical volume mda count.
@@ -134,41 +141,134 @@ class PhysicalVolume(object):
         self.close()
         return mda
 
+    @timed
+    def get_properties(self, names):
+        """
+        Returns a dict with the values of the named lvm properties of the physical volume,
+        read while the volume group is open once::
+
+            from lvm2py import *
+
+            lvm = LVM()
+            vg = lvm.get_vg("myvg")
+            pv = vg.get_pv("/dev/sdb1")
+            props = pv.get_properties(["pv_attr", "pe_start", "pv_used"])
+
+        Property names are those of "pvs -o help", values are decoded as in the
+        VolumeGroup method get_properties.
+
+        *Args:*
+
+        *       names (list):   The property names.
+
+        *Raises:*
+
+        *       HandleError
+        """
+        self.open()
+        try:
+            return get_properties("pv", self.handle, names)
+        finally:
+            self.close()
+
+    @timed
+    def segments(self):
+        """
+        Returns the segments of the physical volume as a Segments tuple of integer
+        arrays (start, length, owner, names), owners being indexes into names, the
+        logical volume names, segments.FREE (-1) for free segments or
+        segments.UNKNOWN (-2) for allocated ones whose logical volume wasn't
+        found::
+
+            from lvm2py import *
+
+            lvm = LVM()
+            vg = lvm.get_vg("myvg")
+            pv = vg.get_pv("/dev/sdb1")
+            segs = pv.segments()
+            for start, length, owner in zip(segs.start, segs.length, segs.owner):
+                print start, length, segs.names[owner] if owner >= 0 else owner
+
+        Starts and lengths are in extents.
+
+        *Raises:*
+
+        *       HandleError
+        """
+        name = self.name
+        self.vg.open()
+        try:
+            return segment_map(self.vg.handle, [name])[name]
+        finally:
+            self.vg.close()
+
+    @timed
+    def largest_free_run(self):
+        """
+        Returns the (start, length) in extents of the largest contiguous free area
+        of the physical volume, (0, 0) if it is full.
+
+        *Raises:*
+
+        *       HandleError
+        """
+        return largest_free_run(self.segments())
+
+    @timed
+    def info(self):
+        """
+        Returns a PVInfo record of the physical volume.
+
+        *Raises:*
+
+        *       HandleError
+        """
+        self.open()
+        info = pv_record(self.handle, self.vg.name)
+        self.close()
+        return info
+
+    @timed
     def size(self, units="MiB"):
         """
         Returns the physical volume size in the given units. Default units are  MiB.
 
         *Args:*
 
-        *       units (str):    Unit label ('MiB', 'GiB', etc...). Default is MiB.
+        *       units (str):    Unit label ('MiB', 'GiB', etc...). Default is MiB. None
+                                returns the exact size as a Size instance.
         """
         self.open()
         size = lvm_pv_get_size(self.handle)
         self.close()
-        return size_convert(size, units)
+        return size_value(size, units)
 
+    @timed
     def dev_size(self, units="MiB"):
         """
         Returns the device size in the given units. Default units are  MiB.
 
         *Args:*
 
-        *       units (str):    Unit label ('MiB', 'GiB', etc...). Default is MiB.
+        *       units (str):    Unit label ('MiB', 'GiB', etc...). Default is MiB. None
+                                returns the exact size as a Size instance.
         """
         self.open()
         size = lvm_pv_get_dev_size(self.handle)
         self.close()
-        return size_convert(size, units)
+        return size_value(size, units)
 
+    @timed
     def free(self, units="MiB"):
         """
         Returns the free size in the given units. Default units are  MiB.
 
         *Args:*
 
-        *       units (str):    Unit label ('MiB', 'GiB', etc...). Default is MiB.
+        *       units (str):    Unit label ('MiB', 'GiB', etc...). Default is MiB. None
+                                returns the exact size as a Size instance.
         """
         self.open()
         size = lvm_pv_get_free(self.handle)
         self.close()
-        return size_convert(size, units)
\ No newline at end of file
+        return size_value(size, units)
\ No newline at end of file
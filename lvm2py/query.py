@@ -0,0 +1,89 @@
+#This file is part of lvm2py.
+
+#lvm2py is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#lvm2py is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with lvm2py. If not, see <http://www.gnu.org/licenses/>.
+
+import fnmatch
+import re
+from conversion import *
+from util import *
+from inventory import walk_dm_list, tag_list
+
+try:
+    _basestring = basestring
+except NameError:
+    _basestring = str
+
+
+def lv_matcher(name=None, min_size=None, max_size=None, active=None,
+               suspended=None, tags=None):
+    """
+    Returns a function that takes a lv_t handle and returns True if the logical
+    volume matches every given filter. Only the attributes needed are read, the
+    cheapest first, and reading stops at the first filter that doesn't match.
+
+    *Args:*
+
+    *       name (str):         A shell-style pattern ("db-*") for the name.
+    *       min_size (int):     Minimum size, in bytes or a size string.
+    *       max_size (int):     Maximum size, in bytes or a size string.
+    *       active (bool):      Whether the logical volume is active.
+    *       suspended (bool):   Whether the logical volume is suspended.
+    *       tags (list):        Tags the logical volume must all have, or a single
+                                tag.
+
+    *Raises:*
+
+    *       ValueError
+    """
+    checks = []
+    if name is not None:
+        pattern = re.compile(fnmatch.translate(name))
+        checks.append(lambda lvh: pattern.match(lvm_lv_get_name(lvh)) is not None)
+    if min_size is not None or max_size is not None:
+        low = Size(min_size or 0)
+        high = Size(max_size) if max_size is not None else None
+        if high is not None and low > high:
+            raise ValueError("min_size is greater than max_size.")
+        checks.append(lambda lvh: low <= lvm_lv_get_size(lvh) and
+                      (high is None or lvm_lv_get_size(lvh) <= high))
+    if active is not None:
+        checks.append(lambda lvh: bool(lvm_lv_is_active(lvh)) == active)
+    if suspended is not None:
+        checks.append(lambda lvh: bool(lvm_lv_is_suspended(lvh)) == suspended)
+    if tags is not None:
+        wanted = frozenset([tags] if isinstance(tags, _basestring) else tags)
+        checks.append(lambda lvh: wanted.issubset(tag_list(lvm_lv_get_tags(lvh))))
+
+    def match(lvh):
+        for check in checks:
+            if not check(lvh):
+                return False
+        return True
+    return match
+
+
+def iter_matching_lvs(vgh, match, limit=None):
+    """
+    Yields the lv_t handle of each logical volume of the given vg_t handle for
+    which match returns True, stopping after limit matches.
+    """
+    if limit is not None and limit <= 0:
+        return
+    found = 0
+    for c in walk_dm_list(lvm_vg_list_lvs(vgh), lvm_lv_list):
+        if match(c.lv):
+            yield c.lv
+            found += 1
+            if found == limit:
+                return
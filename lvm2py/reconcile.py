@@ -0,0 +1,168 @@
+#This file is part of lvm2py.
+
+#lvm2py is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#lvm2py is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with lvm2py. If not, see <http://www.gnu.org/licenses/>.
+
+import os
+from collections import namedtuple
+from util import *
+from planner import request_size
+
+# A step of a reconciliation. action is "remove_lv", "add_pv", "remove_pv" or
+# "create_lv", name the logical volume name or the device, size the size in bytes
+# of created logical volumes (None otherwise).
+Operation = namedtuple("Operation", ["action", "name", "size"])
+
+# Operations are applied in this order: removing logical volumes first frees
+# extents for the new ones and empties the physical volumes to remove, which go
+# before logical volumes are created so none is placed on them.
+_ORDER = ("remove_lv", "add_pv", "remove_pv", "create_lv")
+
+
+class ReconcileReport(object):
+    """
+    *The ReconcileReport class describes the reconciliation of a volume group with
+    a desired state.*
+
+    It is returned by the VolumeGroup method reconcile. operations lists the
+    Operation tuples in the order they are (or, for a dry run, would be) applied,
+    mismatched lists (name, current size, desired size) tuples for the logical
+    volumes that exist with a different size, which are left untouched. writes is
+    the number of metadata writes the reconciliation took.
+    """
+    def __init__(self, operations, mismatched, dry_run=False):
+        self.__operations = operations
+        self.__mismatched = mismatched
+        self.__dry_run = dry_run
+        self.__writes = 0
+
+    def _count_write(self):
+        self.__writes += 1
+
+    def __iter__(self):
+        return iter(self.__operations)
+
+    def __len__(self):
+        return len(self.__operations)
+
+    @property
+    def operations(self):
+        """
+        Returns the list of Operation tuples, in application order.
+        """
+        return self.__operations
+
+    @property
+    def mismatched(self):
+        """
+        Returns a list of (name, current size, desired size) tuples.
+        """
+        return self.__mismatched
+
+    @property
+    def dry_run(self):
+        """
+        Returns True if nothing was applied.
+        """
+        return self.__dry_run
+
+    @property
+    def writes(self):
+        """
+        Returns the number of metadata writes applying the operations took, 0 for
+        a dry run.
+        """
+        return self.__writes
+
+    @property
+    def changed(self):
+        """
+        Returns True if there was something to apply.
+        """
+        return bool(self.__operations)
+
+
+def _same_device(device, names):
+    # lvm reports physical volumes by one of the device names, compare the
+    # resolved paths so symlinks in the spec match too.
+    return device in names or os.path.realpath(device) in names
+
+
+def plan_reconcile(vg, spec, prune=False, dry_run=False):
+    """
+    Computes the operations needed to bring the volume group described by a VGInfo
+    record to the desired state in spec, and returns a ReconcileReport. Nothing is
+    applied.
+
+    spec is a dict with optional "pvs" and "lvs" keys. "pvs" is a list of devices
+    that must be in the volume group, "lvs" a dict of logical volume sizes indexed
+    by name, each a size accepted by Size or a (length, units) tuple as taken by
+    the VolumeGroup method create_lv. Missing physical and logical volumes are
+    added, and with prune those not in spec are removed (only for the keys present
+    in spec).
+
+    *Raises:*
+
+    *       ValueError
+    """
+    operations = []
+    mismatched = []
+    extent_size = Size(vg.extent_size)
+    pv_names = set()
+    for pv in vg.pvs:
+        pv_names.add(pv.name)
+        pv_names.add(os.path.realpath(pv.name))
+    lvs = dict((lv.name, lv) for lv in vg.lvs)
+    free_extents = vg.free_extent_count
+    added = False
+    if "pvs" in spec:
+        wanted = set()
+        for device in spec["pvs"]:
+            wanted.add(device)
+            wanted.add(os.path.realpath(device))
+            if not _same_device(device, pv_names):
+                if not os.path.exists(device):
+                    raise ValueError("%s does not exist." % device)
+                operations.append(Operation("add_pv", device, None))
+                added = True
+        if prune:
+            for pv in vg.pvs:
+                if not _same_device(pv.name, wanted):
+                    operations.append(Operation("remove_pv", pv.name, None))
+                    # all its extents leave the volume group, the allocated ones
+                    # can only be those of logical volumes removed too
+                    free_extents -= Size(pv.size) // extent_size
+    if "lvs" in spec:
+        desired = spec["lvs"]
+        for name in sorted(desired):
+            length = desired[name]
+            units = None
+            if isinstance(length, tuple):
+                length, units = length
+            size = request_size(vg, length, units).round_to(extent_size)
+            if name not in lvs:
+                operations.append(Operation("create_lv", name, size))
+                free_extents -= size // extent_size
+            elif lvs[name].size != size:
+                mismatched.append((name, Size(lvs[name].size), size))
+        if prune:
+            for name in sorted(lvs):
+                if name not in desired:
+                    operations.append(Operation("remove_lv", name, None))
+                    free_extents += Size(lvs[name].size) // extent_size
+    # the size of added physical volumes is only known once they are in the
+    # volume group, so the check is left to lvm then
+    if free_extents < 0 and not added:
+        raise ValueError("Logical volumes don't fit, %d extents missing." % -free_extents)
+    operations.sort(key=lambda op: _ORDER.index(op.action))
+    return ReconcileReport(operations, mismatched, dry_run)
@@ -0,0 +1,162 @@
+#This file is part of lvm2py.
+
+#lvm2py is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#lvm2py is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with lvm2py. If not, see <http://www.gnu.org/licenses/>.
+
+import re
+from array import array
+from collections import namedtuple
+from conversion import *
+from exception import *
+from inventory import walk_dm_list, property_value
+from columnar import _U64
+
+# The segments of a physical or logical volume as parallel arrays, one entry per
+# segment. start and length are in extents. owner holds indexes into names: for
+# physical volume segments the name of the logical volume using it (FREE for free
+# segments, UNKNOWN for allocated ones whose logical volume wasn't found), for
+# logical volume segments the physical volume it is on (start is then the first
+# extent on that physical volume).
+Segments = namedtuple("Segments", ["start", "length", "owner", "names"])
+
+FREE = -1
+UNKNOWN = -2
+
+# "/dev/sdb1(0),/dev/sdc1(0)", the devices property of a logical volume segment
+_devices_re = re.compile(r"([^,()]+)\((\d+)\)")
+
+
+def _pvseg(pvseg, name):
+    return property_value(lvm_pvseg_get_property(pvseg, name), name)
+
+
+def _lvseg(lvseg, name):
+    return property_value(lvm_lvseg_get_property(lvseg, name), name)
+
+
+def pv_segments(pvh):
+    """
+    Yields (start, length) tuples, in extents, for each segment of the given pv_t
+    handle, allocated or free.
+
+    *Raises:*
+
+    *       HandleError
+    """
+    for c in walk_dm_list(lvm_pv_list_pvsegs(pvh), lvm_pvseg_list):
+        yield _pvseg(c.pvseg, "pvseg_start"), _pvseg(c.pvseg, "pvseg_size")
+
+
+def lv_segments(lvh, extent_size):
+    """
+    Yields (physical volume, start, length) tuples, in extents, for each area of
+    each segment of the given lv_t handle. Striped segments yield one area per
+    stripe.
+
+    *Raises:*
+
+    *       HandleError
+    """
+    for c in walk_dm_list(lvm_lv_list_lvsegs(lvh), lvm_lvseg_list):
+        areas = _devices_re.findall(_lvseg(c.lvseg, "devices") or "")
+        if not areas:
+            # virtual segments (zero, error, thin) use no physical extents
+            continue
+        length = _lvseg(c.lvseg, "seg_size") // extent_size // len(areas)
+        for pv, start in areas:
+            yield pv, int(start), length
+
+
+def _table(rows, names):
+    # owners are names, FREE or UNKNOWN
+    index = dict((n, i) for i, n in enumerate(names))
+    index[FREE] = FREE
+    index[UNKNOWN] = UNKNOWN
+    start = array(_U64)
+    length = array(_U64)
+    owner = array("l")
+    for s, l, o in rows:
+        start.append(s)
+        length.append(l)
+        owner.append(index[o])
+    return Segments(start, length, owner, tuple(names))
+
+
+def _pv_rows(pvh, owners, extent_size):
+    # The lvm2app physical volume segments don't tell which are free, so those
+    # no logical volume segment claims are only reported free when they add up
+    # to the free extents of the physical volume. Otherwise some belong to
+    # logical volumes that weren't matched (hidden ones such as _tdata or
+    # _rimage) and none of them can be told free.
+    rows = [(s, l, owners.get(s, UNKNOWN)) for s, l in pv_segments(pvh)]
+    unclaimed = sum(l for s, l, o in rows if o == UNKNOWN)
+    if unclaimed == lvm_pv_get_free(pvh) // extent_size:
+        rows = [(s, l, FREE if o == UNKNOWN else o) for s, l, o in rows]
+    return rows
+
+
+def segment_map(vgh, pvs=None):
+    """
+    Returns a dict of Segments indexed by physical volume name for the physical
+    volumes of the given vg_t handle (or those named in pvs), with the logical
+    volume using each segment as owner, FREE or UNKNOWN.
+
+    *Raises:*
+
+    *       HandleError
+    """
+    extent_size = lvm_vg_get_extent_size(vgh)
+    used = {}
+    for c in walk_dm_list(lvm_vg_list_lvs(vgh), lvm_lv_list):
+        name = lvm_lv_get_name(c.lv)
+        for pv, start, length in lv_segments(c.lv, extent_size):
+            used.setdefault(pv, {})[start] = name
+    result = {}
+    for c in walk_dm_list(lvm_vg_list_pvs(vgh), lvm_pv_list):
+        pvname = lvm_pv_get_name(c.pv)
+        if pvs is not None and pvname not in pvs:
+            continue
+        owners = used.get(pvname, {})
+        rows = _pv_rows(c.pv, owners, extent_size)
+        result[pvname] = _table(rows, sorted(set(owners.values())))
+    return result
+
+
+def lv_segment_table(lvh, extent_size):
+    """
+    Returns the Segments of the given lv_t handle, owners being physical volumes.
+
+    *Raises:*
+
+    *       HandleError
+    """
+    rows = list(lv_segments(lvh, extent_size))
+    names = []
+    for pv, s, l in rows:
+        if pv not in names:
+            names.append(pv)
+    return _table([(s, l, pv) for pv, s, l in rows], names)
+
+
+def largest_free_run(segments):
+    """
+    Returns the (start, length) in extents of the largest free segment of a
+    physical volume Segments, (0, 0) if it has no free extents. lvm merges
+    adjacent free areas, so this is the largest contiguous allocation possible.
+    Segments of UNKNOWN owner are not counted as free.
+    """
+    best = (0, 0)
+    for i, owner in enumerate(segments.owner):
+        if owner == FREE and segments.length[i] > best[1]:
+            best = (segments.start[i], segments.length[i])
+    return best
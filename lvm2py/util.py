@@ -13,6 +13,11 @@
 #You should have received a copy of the GNU General Public License
 #along with lvm2py. If not, see <http://www.gnu.org/licenses/>.
 
+from __future__ import division
+from decimal import Decimal
+import re
+import sys
+
 size_units = {
     "B":    1,       # byte
     "KB":   1000**1, # kilobyte
@@ -34,6 +39,209 @@ size_units = {
     "%":    1        # we've got percents!!!
 }
 
+# liblvm2app style single letter suffixes, they are binary units like in lvm.
+_short_units = {
+    "b": "B", "k": "KiB", "m": "MiB", "g": "GiB", "t": "TiB", "p": "PiB", "e": "EiB",
+}
+
+_size_re = re.compile(r"^\s*([0-9]+(?:\.[0-9]*)?|\.[0-9]+)\s*([A-Za-z]*)\s*$")
+
+try:
+    _int = long
+except NameError:
+    _int = int
+
+if sys.version_info[0] < 3:
+    # the three argument raise is a syntax error on python 3
+    exec("def _raise(tp, value, tb):\n    raise tp, value, tb\n")
+else:
+    def _raise(tp, value, tb):
+        raise value.with_traceback(tb)
+
+
+def reraise(exc_info):
+    """
+    Raises the exception of a sys.exc_info() tuple again, with its original
+    traceback on both python 2 and 3.
+    """
+    _raise(*exc_info)
+
+
 def size_convert(bytes, units):
-    size =  float(bytes) / size_units[units]
-    return size
\ No newline at end of file
+    size = bytes / size_units[units]
+    return float(size)
+
+
+def size_value(bytes, units):
+    """
+    Returns bytes as a Size instance if units is None, converted to the given units
+    with size_convert otherwise.
+    """
+    if units is None:
+        return Size(bytes)
+    return size_convert(bytes, units)
+
+
+class Size(_int):
+    """
+    *The Size class is an immutable, exact size in bytes.*
+
+    It is an integer, so it can be used anywhere a byte count is expected, and
+    arithmetic between sizes and integers stays exact and returns Size instances.
+    Any other operand of a Size, floats included, raises TypeError (a float on
+    the left gives a float, as for any integer), and subtracting a larger size
+    raises ValueError::
+
+        from lvm2py import *
+
+        Size(10, "GiB")                 # 10737418240
+        Size("1.5GiB") + Size("512MiB") # Size("2GiB")
+        Size("10G").human()             # '10.00 GiB'
+        vg.size(None)                   # exact volume group size as a Size
+
+    Strings are a number followed by one of the util.size_units labels ("10GiB",
+    "1.5 TB") or by an lvm style single letter suffix ("10g", binary units). A
+    number without units is a byte count.
+
+    *Args:*
+
+    *       value (int, float, str):    The size, or a string including its units.
+    *       units (str):                Unit label for numeric values. Default is B.
+
+    *Raises:*
+
+    *       ValueError, KeyError
+    """
+    __slots__ = ()
+
+    def __new__(cls, value=0, units=None):
+        if isinstance(value, Size) and units is None:
+            return value
+        if isinstance(value, ("".__class__, u"".__class__)):
+            value, parsed = cls._parse(value)
+            if parsed is not None:
+                if units is not None:
+                    raise ValueError("Units given twice.")
+                units = parsed
+        units = units or "B"
+        if units == "%":
+            raise ValueError("Percentages are not sizes.")
+        factor = size_units[units]
+        if isinstance(value, float):
+            value = Decimal(repr(value))
+        if isinstance(value, Decimal):
+            value = value * factor
+            if value != value.to_integral_value():
+                raise ValueError("Size is not a whole number of bytes.")
+            value = int(value)
+        else:
+            value = _int(value) * factor
+        if value < 0:
+            raise ValueError("Size can't be negative.")
+        return _int.__new__(cls, value)
+
+    @staticmethod
+    def _parse(text):
+        m = _size_re.match(text)
+        if not m:
+            raise ValueError("Invalid size %r." % text)
+        number, units = m.groups()
+        if units and units not in size_units:
+            if units.lower() not in _short_units:
+                raise ValueError("Invalid size units %r." % units)
+            units = _short_units[units.lower()]
+        if "." in number:
+            return Decimal(number), units or None
+        return _int(number), units or None
+
+    def __repr__(self):
+        return "Size(%d)" % self
+
+    @staticmethod
+    def _operand(other):
+        # Only integers keep the arithmetic exact, anything else (floats
+        # included) must be converted explicitly, with Size or round_to.
+        if isinstance(other, bool) or not isinstance(other, (int, _int)):
+            raise TypeError("Unsupported operand type for Size: %s."
+                            % type(other).__name__)
+        return _int(other)
+
+    def __add__(self, other):
+        return Size(_int(self) + self._operand(other))
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        other = self._operand(other)
+        if other > self:
+            raise ValueError("Can't subtract %d bytes from %r." % (other, self))
+        return Size(_int(self) - other)
+
+    def __rsub__(self, other):
+        return Size(self._operand(other)) - self
+
+    def __mul__(self, other):
+        if isinstance(other, Size):
+            raise TypeError("Can't multiply two sizes.")
+        return Size(_int(self) * self._operand(other))
+
+    __rmul__ = __mul__
+
+    def __floordiv__(self, other):
+        if isinstance(other, Size):
+            # how many times other fits
+            return _int(self) // _int(other)
+        return Size(_int(self) // self._operand(other))
+
+    def __mod__(self, other):
+        return Size(_int(self) % self._operand(other))
+
+    def to(self, units):
+        """
+        Returns the size converted to the given units as a float.
+        """
+        return size_convert(_int(self), units)
+
+    def human(self, binary=True, precision=2):
+        """
+        Returns the size as a string in the largest unit it holds at least one of,
+        binary units (KiB, MiB, ...) by default or decimal ones (KB, MB, ...).
+        """
+        units = ("KiB", "MiB", "GiB", "TiB", "PiB", "EiB", "ZiB", "YiB") if binary \
+            else ("KB", "MB", "GB", "TB", "PB", "EB", "ZB", "YB")
+        label = "B"
+        for u in units:
+            if self < size_units[u]:
+                break
+            label = u
+        if label == "B":
+            return "%d B" % self
+        return "%.*f %s" % (precision, self.to(label), label)
+
+    def round_to(self, extent_size, up=True):
+        """
+        Returns the size rounded to a multiple of extent_size, up by default (like
+        lvm does when allocating) or down.
+        """
+        extent_size = _int(extent_size)
+        if extent_size <= 0:
+            raise ValueError("Invalid extent size.")
+        extents = _int(self) // extent_size
+        if up and _int(self) % extent_size:
+            extents += 1
+        return Size(extents * extent_size)
+
+    def extents(self, extent_size):
+        """
+        Returns the number of extents of extent_size needed to hold the size.
+        """
+        return _int(self.round_to(extent_size)) // _int(extent_size)
+
+    @staticmethod
+    def convert(values, units):
+        """
+        Converts a batch of byte counts to the given units at once and returns a
+        list of floats. Each value is divided exactly and rounded once.
+        """
+        factor = size_units[units]
+        return [float(v / factor) for v in values]
\ No newline at end of file
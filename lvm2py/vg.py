@@ -20,6 +20,19 @@ from exception import *
 from util import *
 from pv import PhysicalVolume
 from lv import LogicalVolume
+from inventory import vg_record, tag_list
+from planner import plan_allocation, request_size, parse_request
+from reconcile import plan_reconcile
+from query import lv_matcher, iter_matching_lvs
+from segments import segment_map, largest_free_run
+from properties import get_properties
+from watchdog import timed, coalesced, serialized
+
+_DISCARDS = {
+    "ignore": LVM_THIN_DISCARDS_IGNORE,
+    "nopassdown": LVM_THIN_DISCARDS_NO_PASSDOWN,
+    "passdown": LVM_THIN_DISCARDS_PASSDOWN,
+}
 
 
 class VolumeGroup(object):
@@ -40,10 +53,22 @@ class VolumeGroup(object):
         # or just provide the LVM instance
         vg2 = VolumeGroup(lvm, "myexistingvg", mode="w")
 
+    Methods take a timeout keyword argument and default to the timeout of the LVM
+    instance, see LVM. Properties are not timed, since each timed call costs a
+    thread; info reads them all in one timed call.
+
     *Raises:*
 
     *       HandleError
 
+    The LVM methods get_vg, vgscan and create_vg (and the live method of the info
+    records) return the same instance for the same name and mode as long as one is
+    referenced somewhere, instead of a new one. Likewise, the PhysicalVolume and
+    LogicalVolume instances returned by pvscan, lvscan, get_pv, get_lv, add_pv and
+    create_lv are unique per uuid, volume group name and mode within an LVM
+    instance. Instances created with VolumeGroup directly are not shared, nor is
+    one after set_mode changed its mode.
+
     .. note::
 
         To create a new volume group use the LVM method create_vg.
@@ -51,18 +76,25 @@ class VolumeGroup(object):
     def __init__(self, handle, name, mode="r"):
         self.__name = name
         self.__vgh = None
+        self.__generation = None
         self.__mode = mode
         self.__lvm = handle
+        if mode == "w":
+            handle._check_writable()
+        self._check()
+
+    def _check(self):
         # verify we can open this vg in the desired mode
-        handle.open()
-        vgh = lvm_vg_open(handle.handle, name, mode)
-        if not bool(vgh):
-            raise HandleError("Failed to initialize VG Handle.")
-        # Close the handle so we can proceed
-        cl = lvm_vg_close(vgh)
-        if cl != 0:
-            raise HandleError("Failed to close VG handle after init check.")
-        handle.close()
+        with self.lvm._serialized():
+            self.lvm.open()
+            vgh = lvm_vg_open(self.lvm.handle, self.name, self.mode)
+            if not bool(vgh):
+                raise HandleError("Failed to initialize VG Handle.")
+            # Close the handle so we can proceed
+            cl = lvm_vg_close(vgh)
+            if cl != 0:
+                raise HandleError("Failed to close VG handle after init check.")
+            self.lvm.close()
 
     def open(self):
         """
@@ -75,9 +107,14 @@ class VolumeGroup(object):
         """
         if not self.handle:
             self.lvm.open()
-            self.__vgh = lvm_vg_open(self.lvm.handle, self.name, self.mode)
+            generation = self.lvm._generation
+            vgh = lvm_vg_open(self.lvm.handle, self.name, self.mode)
+            # the operation may have been abandoned while lvm_vg_open was blocked
+            self.lvm._check_abandoned()
+            self.__vgh = vgh
             if not bool(self.__vgh):
                 raise HandleError("Failed to initialize VG Handle.")
+            self.__generation = generation
 
     def close(self):
         """
@@ -107,6 +144,12 @@ class VolumeGroup(object):
         """
         Returns the vg_t handle.
         """
+        # an abandoned operation must not use (or close) the vg_t handle the
+        # instance was opened with since
+        self.lvm._check_abandoned()
+        if self.__vgh is not None and self.__generation != self.lvm._generation:
+            # opened with a quarantined lvm handle, drop it so open gets a new one
+            self.__vgh = None
         return self.__vgh
 
     @property
@@ -117,6 +160,7 @@ class VolumeGroup(object):
         return self.__mode
 
     @property
+    @serialized
     def uuid(self):
         """
         Returns the volume group uuid.
@@ -134,6 +178,7 @@ class VolumeGroup(object):
         return self.__name
 
     @property
+    @serialized
     def extent_count(self):
         """
         Returns the volume group extent count.
@@ -144,6 +189,7 @@ class VolumeGroup(object):
         return count
 
     @property
+    @serialized
     def free_extent_count(self):
         """
         Returns the volume group free extent count.
@@ -154,6 +200,7 @@ class VolumeGroup(object):
         return count
 
     @property
+    @serialized
     def pv_count(self):
         """
         Returns the physical volume count.
@@ -164,6 +211,7 @@ class VolumeGroup(object):
         return count
 
     @property
+    @serialized
     def max_pv_count(self):
         """
         Returns the maximum allowed physical volume count.
@@ -174,6 +222,7 @@ class VolumeGroup(object):
         return count
 
     @property
+    @serialized
     def max_lv_count(self):
         """
         Returns the maximum allowed logical volume count.
@@ -184,6 +233,7 @@ class VolumeGroup(object):
         return count
 
     @property
+    @serialized
     def is_clustered(self):
         """
         Returns True if the VG is clustered, False otherwise.
@@ -194,6 +244,7 @@ class VolumeGroup(object):
         return bool(clust)
 
     @property
+    @serialized
     def is_exported(self):
         """
         Returns True if the VG is exported, False otherwise.
@@ -204,6 +255,7 @@ class VolumeGroup(object):
         return bool(exp)
 
     @property
+    @serialized
     def is_partial(self):
         """
         Returns True if the VG is partial, False otherwise.
@@ -214,6 +266,7 @@ class VolumeGroup(object):
         return bool(part)
 
     @property
+    @serialized
     def sequence(self):
         """
         Returns the volume group sequence number. This number increases
@@ -224,44 +277,196 @@ class VolumeGroup(object):
         self.close()
         return seq
 
+    @timed
     def size(self, units="MiB"):
         """
         Returns the volume group size in the given units. Default units are  MiB.
 
         *Args:*
 
-        *       units (str):    Unit label ('MiB', 'GiB', etc...). Default is MiB.
+        *       units (str):    Unit label ('MiB', 'GiB', etc...). Default is MiB. None
+                                returns the exact size as a Size instance.
         """
         self.open()
         size = lvm_vg_get_size(self.handle)
         self.close()
-        return size_convert(size, units)
+        return size_value(size, units)
 
+    @timed
     def free_size(self, units="MiB"):
         """
         Returns the volume group free size in the given units. Default units are  MiB.
 
         *Args:*
 
-        *       units (str):    Unit label ('MiB', 'GiB', etc...). Default is MiB.
+        *       units (str):    Unit label ('MiB', 'GiB', etc...). Default is MiB. None
+                                returns the exact size as a Size instance.
         """
         self.open()
         size = lvm_vg_get_free_size(self.handle)
         self.close()
-        return size_convert(size, units)
+        return size_value(size, units)
 
+    @timed
     def extent_size(self, units="MiB"):
         """
         Returns the volume group extent size in the given units. Default units are  MiB.
 
         *Args:*
 
-        *       units (str):    Unit label ('MiB', 'GiB', etc...). Default is MiB.
+        *       units (str):    Unit label ('MiB', 'GiB', etc...). Default is MiB. None
+                                returns the exact size as a Size instance.
         """
         self.open()
         size = lvm_vg_get_extent_size(self.handle)
         self.close()
-        return size_convert(size, units)
+        return size_value(size, units)
+
+    @coalesced
+    def info(self):
+        """
+        Returns a VGInfo record of the volume group, including its PVInfo and LVInfo
+        records, read with a single vg_t handle. Concurrent calls for the same
+        volume group share one read, see the LVM method inventory.
+
+        *Raises:*
+
+        *       HandleError
+        """
+        return self.lvm._coalesce(("vg", self.name), self._info)
+
+    def _info(self):
+        self.open()
+        info = vg_record(self.handle, self.name)
+        self.close()
+        return info
+
+    @timed
+    def segment_map(self):
+        """
+        Returns a dict of Segments tuples indexed by physical volume name, the
+        layout of every physical volume read with a single vg_t handle. See the
+        PhysicalVolume method segments.
+
+        *Raises:*
+
+        *       HandleError
+        """
+        self.open()
+        try:
+            return segment_map(self.handle)
+        finally:
+            self.close()
+
+    @timed
+    def largest_free_runs(self):
+        """
+        Returns a dict of (start, length) tuples indexed by physical volume name,
+        the largest contiguous free area of each physical volume in extents.
+
+        *Raises:*
+
+        *       HandleError
+        """
+        return dict((name, largest_free_run(segs))
+                    for name, segs in self.segment_map().items())
+
+    @timed
+    def get_properties(self, names):
+        """
+        Returns a dict with the values of the named lvm properties of the volume group,
+        all read with a single vg_t handle::
+
+            from lvm2py import *
+
+            lvm = LVM()
+            vg = lvm.get_vg("myvg")
+            props = vg.get_properties(["vg_attr", "vg_mda_free", "lv_count"])
+
+        Property names are those of the lvm reporting commands (see "vgs -o help").
+        Sizes are returned as Size instances and percentages as floats, see
+        properties.decode.
+
+        *Args:*
+
+        *       names (list):   The property names.
+
+        *Raises:*
+
+        *       HandleError
+        """
+        self.open()
+        try:
+            return get_properties("vg", self.handle, names)
+        finally:
+            self.close()
+
+    @property
+    @serialized
+    def tags(self):
+        """
+        Returns the volume group tags as a list of strings.
+        """
+        self.open()
+        tags = list(tag_list(lvm_vg_get_tags(self.handle)))
+        self.close()
+        return tags
+
+    @timed
+    def add_tag(self, tag):
+        """
+        Adds a tag to the volume group::
+
+            from lvm2py import *
+
+            lvm = LVM()
+            vg = lvm.get_vg("myvg", "w")
+            vg.add_tag("tenant=42")
+
+        *Args:*
+
+        *       tag (str):      The tag.
+
+        *Raises:*
+
+        *       HandleError, CommitError
+
+        .. note::
+
+            The VolumeGroup instance must be in write mode, otherwise CommitError
+            is raised.
+        """
+        self.open()
+        if lvm_vg_add_tag(self.handle, tag) != 0:
+            self.close()
+            raise CommitError("Failed to add tag %s." % tag)
+        self._commit()
+        self.close()
+
+    @timed
+    def remove_tag(self, tag):
+        """
+        Removes a tag from the volume group.
+
+        *Args:*
+
+        *       tag (str):      The tag.
+
+        *Raises:*
+
+        *       HandleError, CommitError
+
+        .. note::
+
+            The VolumeGroup instance must be in write mode, otherwise CommitError
+            is raised.
+        """
+        self.open()
+        if lvm_vg_remove_tag(self.handle, tag) != 0:
+            self.close()
+            raise CommitError("Failed to remove tag %s." % tag)
+        self._commit()
+        self.close()
 
     def _commit(self):
         com = lvm_vg_write(self.handle)
@@ -269,6 +474,45 @@ class VolumeGroup(object):
             self.close()
             raise CommitError("Failed to commit changes to VolumeGroup.")
 
+    def _pv(self, pvh):
+        # Returns the PhysicalVolume instance for pvh, reusing the one already
+        # created by this lvm instance for the same uuid, vg name and mode if it
+        # is alive.
+        key = ("pv", lvm_pv_get_uuid(pvh), self.name, self.mode)
+        return self.lvm._identity(key, lambda: PhysicalVolume(self, pvh=pvh),
+                                  self._owns)
+
+    def _lv(self, lvh):
+        # Same as _pv for LogicalVolume instances.
+        key = ("lv", lvm_lv_get_uuid(lvh), self.name, self.mode)
+        return self.lvm._identity(key, lambda: LogicalVolume(self, lvh=lvh),
+                                  self._owns)
+
+    def _owns(self, obj):
+        # set_mode may have changed the mode of the instance obj is bound to
+        return obj.vg.name == self.name and obj.vg.mode == self.mode
+
+    def _pv_from_uuid(self, uuid):
+        self.open()
+        pvh = lvm_pv_from_uuid(self.handle, uuid)
+        if not bool(pvh):
+            self.close()
+            raise HandleError("Failed to initialize PV Handle.")
+        pv = self._pv(pvh)
+        self.close()
+        return pv
+
+    def _lv_from_uuid(self, uuid):
+        self.open()
+        lvh = lvm_lv_from_uuid(self.handle, uuid)
+        if not bool(lvh):
+            self.close()
+            raise HandleError("Failed to initialize LV Handle.")
+        lv = self._lv(lvh)
+        self.close()
+        return lv
+
+    @timed
     def add_pv(self, device):
         """
         Initializes a device as a physical volume and adds it to the volume group::
@@ -300,9 +544,15 @@ class VolumeGroup(object):
             self.close()
             raise CommitError("Failed to extend Volume Group.")
         self._commit()
+        pvh = lvm_pv_from_name(self.handle, device)
+        if not bool(pvh):
+            self.close()
+            raise HandleError("Failed to initialize PV Handle.")
+        pv = self._pv(pvh)
         self.close()
-        return PhysicalVolume(self, name=device)
+        return pv
 
+    @timed
     def get_pv(self, device):
         """
         Returns the physical volume associated with the given device::
@@ -323,8 +573,16 @@ class VolumeGroup(object):
         """
         if not os.path.exists(device):
             raise ValueError("%s does not exist." % device)
-        return PhysicalVolume(self, name=device)
+        self.open()
+        pvh = lvm_pv_from_name(self.handle, device)
+        if not bool(pvh):
+            self.close()
+            raise HandleError("Failed to initialize PV Handle.")
+        pv = self._pv(pvh)
+        self.close()
+        return pv
 
+    @timed
     def get_lv(self, name):
         """
         Returns a LogicalVolume instance given an existin logical volume name::
@@ -343,8 +601,16 @@ class VolumeGroup(object):
 
         *       HandleError
         """
-        return LogicalVolume(self, name=name)
+        self.open()
+        lvh = lvm_lv_from_name(self.handle, name)
+        if not bool(lvh):
+            self.close()
+            raise HandleError("Failed to initialize LV Handle.")
+        lv = self._lv(lvh)
+        self.close()
+        return lv
 
+    @timed
     def remove_pv(self, pv):
         """
         Removes a physical volume from the volume group::
@@ -379,6 +645,7 @@ class VolumeGroup(object):
         self._commit()
         self.close()
 
+    @coalesced
     def pvscan(self):
         """
         Probes the volume group for physical volumes and returns a list of
@@ -390,10 +657,16 @@ class VolumeGroup(object):
             vg = lvm.get_vg("myvg")
             pvs = vg.pvscan()
 
+        Concurrent calls for the same volume group and mode share one scan.
+
         *Raises:*
 
         *       HandleError
         """
+        # the instances returned depend on the mode, see _pv
+        return list(self.lvm._coalesce(("pvscan", self.name, self.mode), self._pvscan))
+
+    def _pvscan(self):
         self.open()
         pv_list = []
         pv_handles = lvm_vg_list_pvs(self.handle)
@@ -402,7 +675,7 @@ class VolumeGroup(object):
         pvh = dm_list_first(pv_handles)
         while pvh:
             c = cast(pvh, POINTER(lvm_pv_list))
-            pv = PhysicalVolume(self, pvh=c.contents.pv)
+            pv = self._pv(c.contents.pv)
             pv_list.append(pv)
             if dm_list_end(pv_handles, pvh):
                 # end of linked list
@@ -411,6 +684,7 @@ class VolumeGroup(object):
         self.close()
         return pv_list
 
+    @coalesced
     def lvscan(self):
         """
         Probes the volume group for logical volumes and returns a list of
@@ -422,10 +696,16 @@ class VolumeGroup(object):
             vg = lvm.get_vg("myvg")
             lvs = vg.lvscan()
 
+        Concurrent calls for the same volume group and mode share one scan.
+
         *Raises:*
 
         *       HandleError
         """
+        # the instances returned depend on the mode, see _lv
+        return list(self.lvm._coalesce(("lvscan", self.name, self.mode), self._lvscan))
+
+    def _lvscan(self):
         self.open()
         lv_list = []
         lv_handles = lvm_vg_list_lvs(self.handle)
@@ -434,7 +714,7 @@ class VolumeGroup(object):
         lvh = dm_list_first(lv_handles)
         while lvh:
             c = cast(lvh, POINTER(lvm_lv_list))
-            lv = LogicalVolume(self, lvh=c.contents.lv)
+            lv = self._lv(c.contents.lv)
             lv_list.append(lv)
             if dm_list_end(lv_handles, lvh):
                 # end of linked list
@@ -443,7 +723,45 @@ class VolumeGroup(object):
         self.close()
         return lv_list
 
-    def create_lv(self, name, length, units):
+    @timed
+    def find_lvs(self, limit=None, **filters):
+        """
+        Returns an iterator over the LogicalVolume instances matching every given
+        filter::
+
+            from lvm2py import *
+
+            lvm = LVM()
+            vg = lvm.get_vg("myvg")
+            for lv in vg.find_lvs(name="db-*", min_size="10GiB", active=True):
+                print lv.name
+
+            # the first match only
+            lv = next(vg.find_lvs(tags=["tenant=42"], limit=1), None)
+
+        Filters are evaluated on the lv_t handles while the volume group is open,
+        reading only the attributes needed, and the scan stops after limit matches.
+
+        *Args:*
+
+        *       limit (int):        Maximum number of matches.
+        *       filters:            name, min_size, max_size, active, suspended and
+                                    tags, see query.lv_matcher.
+
+        *Raises:*
+
+        *       HandleError, ValueError, TypeError
+        """
+        match = lv_matcher(**filters)
+        self.open()
+        try:
+            lvs = [self._lv(lvh) for lvh in iter_matching_lvs(self.handle, match, limit)]
+        finally:
+            self.close()
+        return iter(lvs)
+
+    @timed
+    def create_lv(self, name, length, units=None):
         """
         Creates a logical volume and returns the LogicalVolume instance associated with
         the lv_t handle::
@@ -454,11 +772,16 @@ class VolumeGroup(object):
             vg = lvm.get_vg("myvg", "w")
             lv = vg.create_lv("mylv", 40, "MiB")
 
+            # or with a Size instance or string
+            lv = vg.create_lv("mylv2", Size("1.5GiB"))
+
         *Args:*
 
         *       name (str):             The desired logical volume name.
-        *       length (int):           The desired size.
-        *       units (str):            The size units.
+        *       length (int):           The desired size, a Size instance or a size
+                                        string such as "10GiB".
+        *       units (str):            The size units, "%" for a percentage of the
+                                        volume group size. Default is B.
 
         *Raises:*
 
@@ -470,20 +793,312 @@ class VolumeGroup(object):
             is raised.
         """
         if units != "%":
-            size = size_units[units] * length
+            size = Size(length, units)
         else:
             if not (0 < length <= 100) or type(length) is float:
                 raise ValueError("Length not supported.")
-            size = (self.size("B") / 100) * length
+            size = self.size(None) * length // 100
         self.open()
         lvh = lvm_vg_create_lv_linear(self.handle, name, c_ulonglong(size))
         if not bool(lvh):
             self.close()
             raise CommitError("Failed to create LV.")
-        lv = LogicalVolume(self, lvh=lvh)
+        lv = self._lv(lvh)
         self.close()
         return lv
 
+    def _create(self, params, name):
+        # Creates the logical volume described by a lv_create_params_t, with the
+        # vg_t handle already open.
+        if not bool(params):
+            self.close()
+            raise CommitError("Invalid parameters for LV %s." % name)
+        lvh = lvm_lv_create(params)
+        if not bool(lvh):
+            self.close()
+            raise CommitError("Failed to create LV %s." % name)
+        return self._lv(lvh)
+
+    @timed
+    def create_thin_pool(self, name, length, units=None, chunk_size=0, meta_size=0,
+                         discards="passdown"):
+        """
+        Creates a thin pool and returns its LogicalVolume instance::
+
+            from lvm2py import *
+
+            lvm = LVM()
+            vg = lvm.get_vg("myvg", "w")
+            pool = vg.create_thin_pool("pool", 100, "GiB")
+
+        *Args:*
+
+        *       name (str):             The pool name.
+        *       length (int):           The pool size, a Size instance or a size
+                                        string. "%" units are a percentage of the
+                                        volume group size.
+        *       units (str):            The size units. Default is B.
+        *       chunk_size (int):       The chunk size in bytes (a multiple of 64KiB),
+                                        0 lets lvm choose.
+        *       meta_size (int):        The metadata size in bytes, 0 lets lvm choose.
+        *       discards (str):         "ignore", "nopassdown" or "passdown".
+
+        *Raises:*
+
+        *       HandleError,  CommitError, ValueError, KeyError
+
+        .. note::
+
+            The VolumeGroup instance must be in write mode, otherwise CommitError
+            is raised.
+        """
+        discards = _DISCARDS[discards]
+        if units == "%":
+            size = request_size(self.info(), length, units)
+        else:
+            size = Size(length, units)
+        self.open()
+        # the chunk size is given to lvm in 512 byte sectors
+        params = lvm_lv_params_create_thin_pool(self.handle, name, c_ulonglong(size),
+                                                Size(chunk_size) // 512,
+                                                c_ulonglong(Size(meta_size)), discards)
+        lv = self._create(params, name)
+        self.close()
+        return lv
+
+    @timed
+    def create_thin_lv(self, pool, name, length, units=None):
+        """
+        Creates a thin logical volume in a thin pool and returns its LogicalVolume
+        instance::
+
+            from lvm2py import *
+
+            lvm = LVM()
+            vg = lvm.get_vg("myvg", "w")
+            lv = vg.create_thin_lv("pool", "thin1", 1, "TiB")
+
+        *Args:*
+
+        *       pool (str):             The thin pool name.
+        *       name (str):             The logical volume name.
+        *       length (int):           The virtual size, a Size instance or a size
+                                        string.
+        *       units (str):            The size units. Default is B.
+
+        *Raises:*
+
+        *       HandleError,  CommitError, ValueError
+
+        .. note::
+
+            The VolumeGroup instance must be in write mode, otherwise CommitError
+            is raised.
+        """
+        return self.create_thin_lvs(pool, [(name, length, units)])[0]
+
+    @timed
+    def create_thin_lvs(self, pool, requests):
+        """
+        Creates many thin logical volumes in a thin pool with the same vg_t handle
+        and returns their LogicalVolume instances in request order::
+
+            lvs = vg.create_thin_lvs("pool", [("thin%d" % i, "10GiB") for i in range(50)])
+
+        If one can't be created, those created before it are removed again, see
+        create_lvs.
+
+        *Args:*
+
+        *       pool (str):             The thin pool name.
+        *       requests (list):        (name, length) or (name, length, units)
+                                        tuples, or dicts with "name", "size" and
+                                        "units" keys.
+
+        *Raises:*
+
+        *       HandleError,  CommitError, ValueError
+        """
+        sizes = []
+        for request in requests:
+            name, length, units = parse_request(request)
+            sizes.append((name, Size(length, units)))
+        created = []
+        self.open()
+        for name, size in sizes:
+            params = lvm_lv_params_create_thin(self.handle, pool, name, c_ulonglong(size))
+            lvh = lvm_lv_create(params) if bool(params) else None
+            if not bool(lvh):
+                self._rollback(created, name)
+            created.append((name, lvh))
+        lvs = [self._lv(lvh) for name, lvh in created]
+        self.close()
+        return lvs
+
+    @timed
+    def plan_lvs(self, requests):
+        """
+        Computes how a list of logical volumes would be allocated in the volume group
+        and returns an AllocationPlan, without changing any metadata::
+
+            from lvm2py import *
+
+            lvm = LVM()
+            vg = lvm.get_vg("myvg")
+            plan = vg.plan_lvs([("data", 10, "GiB"), ("logs", 20, "%"), ("tmp", "1.5GiB")])
+            if not plan.fits:
+                print plan.errors
+            for lv in plan:
+                print lv.name, lv.size, lv.extents, lv.segments
+
+        The volume group is read once with a single vg_t handle, the rest is done in
+        memory. Sizes are rounded up to whole extents the way lvm does when allocating.
+
+        *Args:*
+
+        *       requests (list):    (name, length) or (name, length, units) tuples,
+                                    or dicts with "name", "size" and "units" keys,
+                                    with the same meaning as in create_lv.
+
+        *Raises:*
+
+        *       HandleError
+        """
+        return plan_allocation(self.info(), requests)
+
+    @timed
+    def create_lvs(self, requests):
+        """
+        Creates a list of logical volumes once plan_lvs says all of them fit, and
+        returns their LogicalVolume instances in request order. Use plan_lvs for a
+        dry run::
+
+            from lvm2py import *
+
+            lvm = LVM()
+            vg = lvm.get_vg("myvg", "w")
+            lvs = vg.create_lvs([("data", 10, "GiB"), ("logs", 20, "%")])
+
+        All logical volumes are created with the same vg_t handle. If one can't be
+        created, those created before it are removed again and CommitError is
+        raised, naming any that couldn't be removed.
+
+        *Args:*
+
+        *       requests (list):    See plan_lvs.
+
+        *Raises:*
+
+        *       HandleError,  CommitError, ValueError
+
+        .. note::
+
+            The VolumeGroup instance must be in write mode, otherwise CommitError
+            is raised.
+        """
+        plan = self.plan_lvs(requests)
+        if not plan.fits:
+            raise ValueError("Logical volumes don't fit: %s" % "; ".join(plan.errors))
+        created = []
+        self.open()
+        for planned in plan:
+            lvh = lvm_vg_create_lv_linear(self.handle, planned.name, c_ulonglong(planned.size))
+            if not bool(lvh):
+                self._rollback(created, planned.name)
+            created.append((planned.name, lvh))
+        lvs = [self._lv(lvh) for name, lvh in created]
+        self.close()
+        return lvs
+
+    def _rollback(self, created, name):
+        # Creating the named logical volume failed: removes those created before
+        # it, (name, lv_t handle) tuples, so no part of the set is left behind,
+        # then closes the handle and raises CommitError.
+        left = [done for done, lvh in reversed(created) if lvm_vg_remove_lv(lvh) != 0]
+        self.close()
+        if left:
+            raise CommitError("Failed to create LV %s, failed to remove %s."
+                              % (name, ", ".join(left)))
+        raise CommitError("Failed to create LV %s." % name)
+
+    @timed
+    def reconcile(self, spec, prune=False, dry_run=False):
+        """
+        Brings the volume group to a desired state and returns a ReconcileReport
+        with the operations applied::
+
+            from lvm2py import *
+
+            lvm = LVM()
+            vg = lvm.get_vg("myvg", "w")
+            report = vg.reconcile({
+                "pvs": ["/dev/sdb1", "/dev/sdc1"],
+                "lvs": {"data": "10GiB", "logs": (20, "%")},
+            })
+
+        The volume group is read once and the minimal list of operations computed
+        in memory (see reconcile.plan_reconcile for the spec format). They are then
+        applied in the order of the report with a single vg_t handle: logical
+        volumes are removed, physical volumes added and removed with one metadata
+        write, and logical volumes created (lvm writes the metadata for each
+        logical volume removed or created), so none is placed on a physical volume
+        being removed.
+        Logical volumes that exist with a different size are reported in the
+        mismatched list, not resized.
+
+        *Args:*
+
+        *       spec (dict):        The desired state.
+        *       prune (bool):       Remove the physical and logical volumes not in
+                                    spec.
+        *       dry_run (bool):     Only compute the operations.
+
+        *Raises:*
+
+        *       HandleError,  CommitError, ValueError
+
+        .. note::
+
+            The VolumeGroup instance must be in write mode, otherwise CommitError
+            is raised.
+        """
+        report = plan_reconcile(self.info(), spec, prune, dry_run)
+        if dry_run or not report.changed:
+            return report
+        ops = {}
+        for op in report:
+            ops.setdefault(op.action, []).append(op)
+        self.open()
+        for op in ops.get("remove_lv", []):
+            lvh = lvm_lv_from_name(self.handle, op.name)
+            if not bool(lvh):
+                self.close()
+                raise HandleError("Failed to initialize LV Handle.")
+            if lvm_vg_remove_lv(lvh) != 0:
+                self.close()
+                raise CommitError("Failed to remove LV %s." % op.name)
+            report._count_write()
+        for op in ops.get("add_pv", []):
+            if lvm_vg_extend(self.handle, op.name) != 0:
+                self.close()
+                raise CommitError("Failed to extend Volume Group with %s." % op.name)
+        for op in ops.get("remove_pv", []):
+            if lvm_vg_reduce(self.handle, op.name) != 0:
+                self.close()
+                raise CommitError("Failed to remove %s." % op.name)
+        if "add_pv" in ops or "remove_pv" in ops:
+            self._commit()
+            report._count_write()
+        for op in ops.get("create_lv", []):
+            lvh = lvm_vg_create_lv_linear(self.handle, op.name, c_ulonglong(op.size))
+            if not bool(lvh):
+                self.close()
+                raise CommitError("Failed to create LV %s." % op.name)
+            report._count_write()
+        self.close()
+        return report
+
+    @timed
     def remove_lv(self, lv):
         """
         Removes a logical volume from the volume group::
@@ -514,6 +1129,7 @@ class VolumeGroup(object):
         if rm != 0:
             raise CommitError("Failed to remove LV.")
 
+    @timed
     def remove_all_lvs(self):
         """
         Removes all logical volumes from the volume group.
@@ -536,9 +1152,12 @@ class VolumeGroup(object):
         """
         if mode != "r" and mode != "w":
             raise ValueError("Invalid mode.")
+        if mode == "w":
+            self.lvm._check_writable()
         self.__mode = mode
 
-    def set_extent_size(self, length, units):
+    @timed
+    def set_extent_size(self, length, units=None):
         """
         Sets the volume group extent size in the given units::
 
@@ -550,19 +1169,19 @@ class VolumeGroup(object):
 
         *Args:*
 
-        *       length (int):   The desired length size.
-        *       units (str):    The desired units ("MiB", "GiB", etc...).
+        *       length (int):   The desired length size, or a Size instance.
+        *       units (str):    The desired units ("MiB", "GiB", etc...). Default is B.
 
         *Raises:*
 
-        *       HandleError,  CommitError, KeyError
+        *       HandleError,  CommitError, KeyError, ValueError
 
         .. note::
 
             The VolumeGroup instance must be in write mode, otherwise CommitError
             is raised.
         """
-        size = length * size_units[units]
+        size = Size(length, units)
         self.open()
         ext = lvm_vg_set_extent_size(self.handle, c_ulong(size))
         self._commit()
@@ -0,0 +1,281 @@
+#This file is part of lvm2py.
+
+#lvm2py is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#lvm2py is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with lvm2py. If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+import threading
+import time
+from conversion import *
+from exception import *
+from inventory import vg_names, refresh_vg
+
+log = logging.getLogger(__name__)
+
+
+class VGChange(object):
+    """
+    *Describes what changed in a volume group between two polls of a Watcher.*
+
+    Volume groups, physical and logical volumes are reported as VGInfo, PVInfo and
+    LVInfo records. A created volume group reports all its volumes as added and a
+    removed one reports them all as removed.
+    """
+    def __init__(self, name, old, new):
+        self.__name = name
+        self.__old = old
+        self.__new = new
+        self.__pvs = self._compare(old.pvs if old else (), new.pvs if new else ())
+        self.__lvs = self._compare(old.lvs if old else (), new.lvs if new else ())
+
+    @staticmethod
+    def _compare(old, new):
+        old = dict((v.uuid, v) for v in old)
+        new = dict((v.uuid, v) for v in new)
+        added = [new[k] for k in new if k not in old]
+        removed = [old[k] for k in old if k not in new]
+        modified = [new[k] for k in new if k in old and old[k] != new[k]]
+        return added, removed, modified
+
+    @property
+    def name(self):
+        """
+        Returns the volume group name.
+        """
+        return self.__name
+
+    @property
+    def old(self):
+        """
+        Returns the previous VGInfo record, None if the volume group was created.
+        """
+        return self.__old
+
+    @property
+    def new(self):
+        """
+        Returns the current VGInfo record, None if the volume group was removed.
+        """
+        return self.__new
+
+    @property
+    def created(self):
+        """
+        Returns True if the volume group appeared since the last poll.
+        """
+        return self.__old is None
+
+    @property
+    def removed(self):
+        """
+        Returns True if the volume group disappeared since the last poll.
+        """
+        return self.__new is None
+
+    @property
+    def added_pvs(self):
+        """
+        Returns a list of physical volume records added to the volume group.
+        """
+        return self.__pvs[0]
+
+    @property
+    def removed_pvs(self):
+        """
+        Returns a list of physical volume records removed from the volume group.
+        """
+        return self.__pvs[1]
+
+    @property
+    def modified_pvs(self):
+        """
+        Returns a list of physical volume records whose attributes changed.
+        """
+        return self.__pvs[2]
+
+    @property
+    def added_lvs(self):
+        """
+        Returns a list of logical volume records added to the volume group.
+        """
+        return self.__lvs[0]
+
+    @property
+    def removed_lvs(self):
+        """
+        Returns a list of logical volume records removed from the volume group.
+        """
+        return self.__lvs[1]
+
+    @property
+    def modified_lvs(self):
+        """
+        Returns a list of logical volume records whose attributes changed.
+        """
+        return self.__lvs[2]
+
+
+class Watcher(threading.Thread):
+    """
+    *The Watcher class polls the volume group sequence numbers and reports changes.*
+
+    A Watcher holds a single lvm handle for its whole life. On every poll it opens
+    each volume group read-only just long enough to read its sequence number, and
+    only the volume groups whose sequence number moved are read in full. When a
+    poll finds nothing new, the delay before the next one grows by the backoff
+    factor up to max_interval, and drops back to interval as soon as something
+    changes. Usually you would create it through the LVM method watch::
+
+        from lvm2py import *
+
+        def changed(change):
+            for lv in change.added_lvs:
+                print lv.name
+
+        lvm = LVM()
+        watcher = lvm.watch(changed, interval=1)
+        ...
+        watcher.stop()
+
+    The first poll only records the current state, the callback is called with a
+    VGChange instance for each volume group that changes afterwards. Volume groups
+    created on new devices are picked up by the device rescan done every
+    scan_interval seconds.
+
+    *Args:*
+
+    *       lvm (obj):              An LVM instance used only by this watcher.
+    *       callback (callable):    Called with a VGChange instance.
+    *       interval (float):       Minimum delay between polls in seconds.
+    *       max_interval (float):   Maximum delay between polls in seconds.
+    *       backoff (float):        Delay growth factor for idle polls.
+    *       scan_interval (float):  Delay between device rescans in seconds.
+
+    .. note::
+
+        A failed poll or an exception raised by the callback doesn't stop the
+        watcher: the error is logged and kept in last_error, and the delay before
+        the next poll grows as for idle polls. After a failed poll the lvm handle
+        is initialized again. Changes not yet passed to a callback that raised are
+        lost.
+    """
+    def __init__(self, lvm, callback, interval=1.0, max_interval=None, backoff=2.0,
+                 scan_interval=60.0):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        if interval <= 0 or backoff < 1:
+            raise ValueError("Invalid polling interval.")
+        if max_interval is None:
+            max_interval = interval * 16
+        self.__lvm = lvm
+        self.__callback = callback
+        self.__interval = interval
+        self.__max_interval = max(interval, max_interval)
+        self.__backoff = backoff
+        self.__scan_interval = scan_interval
+        self.__last_scan = None
+        self.__state = None
+        self.__last_error = None
+        self.__stop = threading.Event()
+
+    @property
+    def lvm(self):
+        """
+        Returns the LVM instance holding the watcher lvm handle.
+        """
+        return self.__lvm
+
+    @property
+    def state(self):
+        """
+        Returns a dict of VGInfo records indexed by name as of the last poll.
+        """
+        return self.__state
+
+    @property
+    def last_error(self):
+        """
+        Returns the exception raised by the last failed poll or callback, None if
+        the last poll succeeded.
+        """
+        return self.__last_error
+
+    def poll(self):
+        """
+        Polls every volume group once and returns a list of VGChange instances. The
+        first call only records the current state and returns an empty list.
+
+        *Raises:*
+
+        *       HandleError
+        """
+        self.lvm.open()
+        now = time.time()
+        if self.__last_scan is None:
+            self.__last_scan = now
+        elif now - self.__last_scan >= self.__scan_interval:
+            lvm_scan(self.lvm.handle)
+            self.__last_scan = now
+        old = self.__state or {}
+        new = {}
+        for name in vg_names(self.lvm.handle):
+            rec = refresh_vg(self.lvm.handle, name, old.get(name))
+            if rec is not None:
+                new[name] = rec
+        first = self.__state is None
+        self.__state = new
+        if first:
+            return []
+        changes = []
+        for name in new:
+            if new[name] is not old.get(name):
+                changes.append(VGChange(name, old.get(name), new[name]))
+        for name in old:
+            if name not in new:
+                changes.append(VGChange(name, old[name], None))
+        return changes
+
+    def run(self):
+        delay = self.__interval
+        try:
+            while not self.__stop.is_set():
+                try:
+                    changes = self.poll()
+                    for change in changes:
+                        self.__callback(change)
+                except Exception as e:
+                    log.exception("Watching volume groups failed.")
+                    self.__last_error = e
+                    changes = []
+                    # start over with a new lvm handle
+                    try:
+                        self.lvm.release()
+                    except HandleError:
+                        pass
+                else:
+                    self.__last_error = None
+                if changes:
+                    delay = self.__interval
+                else:
+                    delay = min(delay * self.__backoff, self.__max_interval)
+                self.__stop.wait(delay)
+        finally:
+            self.lvm.release()
+
+    def stop(self):
+        """
+        Stops the watcher and waits for it to release its lvm handle.
+        """
+        self.__stop.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join()
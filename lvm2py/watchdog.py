@@ -0,0 +1,129 @@
+#This file is part of lvm2py.
+
+#lvm2py is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#lvm2py is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with lvm2py. If not, see <http://www.gnu.org/licenses/>.
+
+import functools
+import sys
+import threading
+from exception import *
+from util import reraise
+
+
+class _Worker(threading.Thread):
+    # Runs one operation. Daemon, so a call that never returns doesn't keep the
+    # process alive.
+
+    def __init__(self, fn, args, kwargs):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.result = None
+        self.error = None
+
+    def run(self):
+        try:
+            self.result = self.fn(*self.args, **self.kwargs)
+        except BaseException:
+            self.error = sys.exc_info()
+        finally:
+            self.fn = self.args = self.kwargs = None
+
+
+def in_worker():
+    """
+    Returns True when called from a watchdog worker, where operations already run
+    under a deadline.
+    """
+    return isinstance(threading.current_thread(), _Worker)
+
+
+def call(timeout, abandon, fn, *args, **kwargs):
+    """
+    Runs fn(*args, **kwargs) on a watchdog worker thread and returns its result.
+    If it didn't return after timeout seconds, abandon is called with the worker
+    and CallTimeoutError is raised. The worker can't be interrupted while blocked
+    in the library, it is left to finish on its own: whatever it was changing may
+    still be committed after the timeout, or not, so the outcome of a timed out
+    change is unknown until the state is read again.
+
+    *Raises:*
+
+    *       CallTimeoutError
+    """
+    worker = _Worker(fn, args, kwargs)
+    worker.start()
+    worker.join(timeout)
+    if worker.is_alive():
+        abandon(worker)
+        raise CallTimeoutError("Operation didn't complete in %s seconds." % timeout)
+    if worker.error:
+        reraise(worker.error)
+    return worker.result
+
+
+def _lvm(obj):
+    # Returns the LVM instance of a LVM, VolumeGroup, PhysicalVolume or
+    # LogicalVolume instance. Physical and logical volumes reach it through
+    # their vg.
+    lvm = getattr(obj, "vg", obj)
+    return getattr(lvm, "lvm", lvm)
+
+
+def serialized(method):
+    """
+    Decorates a LVM, VolumeGroup, PhysicalVolume or LogicalVolume method (or
+    property getter) so it holds the lvm handle of the LVM instance while it runs,
+    see the LVM method session.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with _lvm(self)._serialized():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _timed(method, run):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        timeout = kwargs.pop("timeout", None)
+        lvm = _lvm(self)
+        if timeout is None:
+            timeout = lvm.timeout
+        if timeout is None or in_worker():
+            return run(self, *args, **kwargs)
+        return call(timeout, lvm._abandon, run, self, *args, **kwargs)
+    return wrapper
+
+
+def timed(method):
+    """
+    Decorates a LVM, VolumeGroup, PhysicalVolume or LogicalVolume method so it
+    takes a timeout keyword argument, in seconds, defaulting to the timeout of the
+    LVM instance. With a timeout the method runs on a watchdog worker, see call,
+    which costs a thread per call. Methods called from a worker run directly,
+    under the deadline of the outermost operation. The method holds the lvm
+    handle while it runs, see serialized.
+    """
+    return _timed(method, serialized(method))
+
+
+def coalesced(method):
+    """
+    Same as timed, for the methods that share their calls through the LVM method
+    _coalesce: the shared call holds the lvm handle, so callers can join it while
+    it does.
+    """
+    return _timed(method, method)
@@ -0,0 +1,493 @@
+#This file is part of lvm2py.
+
+#lvm2py is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#lvm2py is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with lvm2py. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+An in-memory stand-in for liblvm2app, so the modules of lvm2py can be imported
+and exercised without the library or any device.
+
+conversion is imported with ctypes.CDLL returning a FakeLibrary, so every
+wrapper it declares is a function forwarding its calls to the Backend method of
+the same name. The structures and pointers are the real ctypes ones: handles
+are pointers to fake addresses, dm_lists real linked structures. Tests replace
+backend methods on the instance to make a call hang or fail::
+
+    backend = fakelvm.reset()
+    backend.add_vg("vg0", ["/dev/fake0"])
+    lvm = LVM()
+"""
+
+import ctypes
+import ctypes.util
+import os
+import sys
+import threading
+from collections import defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, "lvm2py"))
+
+EXTENT = 4 * 1024 ** 2
+
+
+class _Function(object):
+    # A library function, calls go to the backend method of the same name.
+
+    def __init__(self, library, name):
+        self.library = library
+        self.name = name
+        self.argtypes = None
+        self.restype = None
+
+    def __call__(self, *args):
+        return self.library.backend.call(self.name, args)
+
+
+class FakeLibrary(object):
+
+    def __init__(self):
+        self.backend = None
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        function = _Function(self, name)
+        setattr(self, name, function)
+        return function
+
+
+library = FakeLibrary()
+
+
+def _load():
+    if "conversion" in sys.modules:
+        return sys.modules["conversion"]
+    find_library, cdll = ctypes.util.find_library, ctypes.CDLL
+    ctypes.util.find_library = lambda name: name
+    ctypes.CDLL = lambda name: library
+    try:
+        import conversion
+    finally:
+        ctypes.util.find_library, ctypes.CDLL = find_library, cdll
+    return conversion
+
+conversion = _load()
+
+
+def _bytes(s):
+    # c_char_p fields hold bytes on python 3
+    if s is not None and not isinstance(s, bytes):
+        return s.encode()
+    return s
+
+
+def _str(s):
+    if isinstance(s, bytes) and not isinstance(s, str):
+        return s.decode()
+    return s
+
+
+def _address(ptr):
+    return ctypes.cast(ptr, ctypes.c_void_p).value
+
+
+class PV(object):
+
+    def __init__(self, name, size, uuid):
+        self.name = name
+        self.uuid = uuid
+        self.size = size
+        self.vg = None
+        # allocated extents by lv name
+        self.allocated = {}
+
+    @property
+    def free(self):
+        return self.size - sum(self.allocated.values()) * EXTENT
+
+
+class LV(object):
+
+    def __init__(self, name, size, uuid, pool=None):
+        self.name = name
+        self.uuid = uuid
+        self.size = size
+        self.pool = pool
+        self.tags = []
+
+
+class VG(object):
+
+    def __init__(self, name, uuid):
+        self.name = name
+        self.uuid = uuid
+        self.seqno = 1
+        self.pvs = []
+        self.lvs = []
+        self.tags = []
+
+    @property
+    def extent_count(self):
+        return sum(pv.size // EXTENT for pv in self.pvs)
+
+    @property
+    def free_extent_count(self):
+        return sum(pv.free // EXTENT for pv in self.pvs)
+
+
+class Backend(object):
+    """
+    The state of the fake host: volume groups, physical volumes (orphans
+    included) and logical volumes, plus the calls made and the handles in use.
+    """
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.vgs = {}
+        self.orphans = []
+        self.calls = defaultdict(int)
+        self.handles = set()
+        self.vghs = {}
+        self.closed = set()
+        self.__objects = {}
+        self.__lists = {}
+        self.__next = 0x1000
+        self.__uuid = 0
+
+    # model
+
+    def _uuid(self):
+        self.__uuid += 1
+        return "uuid-%04d" % self.__uuid
+
+    def _handle(self, kind, obj):
+        with self.lock:
+            self.__next += 0x10
+            address = self.__next
+            self.__objects[address] = obj
+        return ctypes.cast(ctypes.c_void_p(address), kind)
+
+    def _get(self, ptr):
+        return self.__objects[_address(ptr)]
+
+    def add_pv(self, device, size=100 * EXTENT):
+        """
+        Adds an orphan physical volume and returns it.
+        """
+        pv = PV(device, size, self._uuid())
+        self.orphans.append(pv)
+        return pv
+
+    def add_vg(self, name, devices, size=100 * EXTENT):
+        """
+        Adds a volume group made of new physical volumes and returns it.
+        """
+        vg = VG(name, self._uuid())
+        for device in devices:
+            pv = PV(device, size, self._uuid())
+            pv.vg = vg
+            vg.pvs.append(pv)
+        self.vgs[name] = vg
+        return vg
+
+    def add_lv(self, vgname, name, size):
+        """
+        Adds a logical volume to a volume group and returns it, None if it
+        doesn't fit.
+        """
+        vg = self.vgs[vgname]
+        extents = -(-size // EXTENT)
+        if extents > vg.free_extent_count:
+            return None
+        lv = LV(name, extents * EXTENT, self._uuid())
+        for pv in vg.pvs:
+            take = min(extents, pv.free // EXTENT)
+            if take:
+                pv.allocated[name] = take
+                extents -= take
+        vg.lvs.append(lv)
+        return lv
+
+    def vgextend(self, vgname, device):
+        """
+        Moves an orphan physical volume into a volume group, as vgextend does.
+        """
+        pv = [pv for pv in self.orphans if pv.name == device][0]
+        self.orphans.remove(pv)
+        vg = self.vgs[vgname]
+        pv.vg = vg
+        vg.pvs.append(pv)
+        vg.seqno += 1
+
+    def call(self, name, args):
+        with self.lock:
+            self.calls[name] += 1
+        return getattr(self, name)(*args)
+
+    def _list(self, struct, items):
+        # Returns a real dm_list of the given structures, built from the field
+        # dicts in items.
+        head = conversion.dm_list()
+        nodes = [struct(**fields) for fields in items]
+        pointers = [ctypes.cast(ctypes.pointer(node), ctypes.POINTER(conversion.dm_list))
+                    for node in nodes]
+        headp = ctypes.pointer(head)
+        with self.lock:
+            self.__lists[_address(headp)] = (head, nodes, pointers)
+        return headp
+
+    def _strings(self, strings):
+        return self._list(conversion.lvm_str_list, [{"str": _bytes(s)} for s in strings])
+
+    # library
+
+    def dm_list_first(self, head):
+        pointers = self.__lists[_address(head)][2]
+        if not pointers:
+            return ctypes.POINTER(conversion.dm_list)()
+        return pointers[0]
+
+    def _position(self, head, item):
+        pointers = self.__lists[_address(head)][2]
+        addresses = [_address(p) for p in pointers]
+        return pointers, addresses.index(_address(item))
+
+    def dm_list_end(self, head, item):
+        pointers, i = self._position(head, item)
+        return int(i == len(pointers) - 1)
+
+    def dm_list_next(self, head, item):
+        pointers, i = self._position(head, item)
+        return pointers[i + 1]
+
+    def lvm_library_get_version(self):
+        return "2.02.fake"
+
+    def lvm_init(self, path):
+        handle = self._handle(conversion.lvm_t, "lvm")
+        self.handles.add(_address(handle))
+        return handle
+
+    def lvm_quit(self, lvmh):
+        self.handles.discard(_address(lvmh))
+        return 0
+
+    def lvm_config_override(self, lvmh, config):
+        return 0
+
+    def lvm_config_reload(self, lvmh):
+        return 0
+
+    def lvm_scan(self, lvmh):
+        return 0
+
+    def lvm_list_vg_names(self, lvmh):
+        return self._strings(sorted(self.vgs))
+
+    def lvm_vgname_from_device(self, lvmh, device):
+        device = _str(device)
+        for vg in self.vgs.values():
+            for pv in vg.pvs:
+                if pv.name == device:
+                    return vg.name
+        for pv in self.orphans:
+            if pv.name == device:
+                return "#orphans_lvm2"
+        return None
+
+    def lvm_list_pvs(self, lvmh):
+        pvs = [pv for vg in self.vgs.values() for pv in vg.pvs] + self.orphans
+        return self._list(conversion.lvm_pv_list,
+                          [{"pv": self._handle(conversion.pv_t, pv)} for pv in pvs])
+
+    def lvm_list_pvs_free(self, head):
+        return 0
+
+    def lvm_vg_open(self, lvmh, name, mode):
+        vg = self.vgs.get(_str(name))
+        if vg is None:
+            return conversion.vg_t()
+        vgh = self._handle(conversion.vg_t, vg)
+        self.vghs[_address(vgh)] = vg
+        return vgh
+
+    def lvm_vg_close(self, vgh):
+        address = _address(vgh)
+        if address in self.closed:
+            raise AssertionError("vg handle closed twice")
+        self.closed.add(address)
+        return 0
+
+    def lvm_vg_write(self, vgh):
+        self._get(vgh).seqno += 1
+        return 0
+
+    def lvm_vg_get_uuid(self, vgh):
+        return self._get(vgh).uuid
+
+    def lvm_vg_get_name(self, vgh):
+        return self._get(vgh).name
+
+    def lvm_vg_get_seqno(self, vgh):
+        return self._get(vgh).seqno
+
+    def lvm_vg_get_size(self, vgh):
+        return self._get(vgh).extent_count * EXTENT
+
+    def lvm_vg_get_free_size(self, vgh):
+        return self._get(vgh).free_extent_count * EXTENT
+
+    def lvm_vg_get_extent_size(self, vgh):
+        return EXTENT
+
+    def lvm_vg_get_extent_count(self, vgh):
+        return self._get(vgh).extent_count
+
+    def lvm_vg_get_free_extent_count(self, vgh):
+        return self._get(vgh).free_extent_count
+
+    def lvm_vg_get_pv_count(self, vgh):
+        return len(self._get(vgh).pvs)
+
+    def lvm_vg_is_clustered(self, vgh):
+        return 0
+
+    lvm_vg_is_exported = lvm_vg_is_partial = lvm_vg_is_clustered
+
+    def lvm_vg_get_tags(self, vgh):
+        return self._strings(self._get(vgh).tags)
+
+    def lvm_vg_list_pvs(self, vgh):
+        return self._list(conversion.lvm_pv_list,
+                          [{"pv": self._handle(conversion.pv_t, pv)}
+                           for pv in self._get(vgh).pvs])
+
+    def lvm_vg_list_lvs(self, vgh):
+        return self._list(conversion.lvm_lv_list,
+                          [{"lv": self._handle(conversion.lv_t, lv)}
+                           for lv in self._get(vgh).lvs])
+
+    def lvm_vg_extend(self, vgh, device):
+        device = _str(device)
+        if not [pv for pv in self.orphans if pv.name == device]:
+            return -1
+        vg = self._get(vgh)
+        self.vgextend(vg.name, device)
+        vg.seqno -= 1
+        return 0
+
+    def lvm_vg_reduce(self, vgh, device):
+        device = _str(device)
+        vg = self._get(vgh)
+        for pv in vg.pvs:
+            if pv.name == device:
+                if pv.allocated:
+                    return -1
+                vg.pvs.remove(pv)
+                pv.vg = None
+                self.orphans.append(pv)
+                return 0
+        return -1
+
+    def lvm_vg_create_lv_linear(self, vgh, name, size):
+        lv = self.add_lv(self._get(vgh).name, _str(name), getattr(size, "value", size))
+        if lv is None:
+            return conversion.lv_t()
+        self._get(vgh).seqno += 1
+        return self._handle(conversion.lv_t, lv)
+
+    def lvm_lv_params_create_thin(self, vgh, pool, name, size):
+        return self._handle(conversion.lv_create_params_t,
+                            (self._get(vgh), _str(pool), _str(name),
+                             getattr(size, "value", size)))
+
+    def lvm_lv_create(self, params):
+        vg, pool, name, size = self._get(params)
+        lv = LV(name, size, self._uuid(), pool)
+        vg.lvs.append(lv)
+        vg.seqno += 1
+        return self._handle(conversion.lv_t, lv)
+
+    def lvm_vg_remove_lv(self, lvh):
+        lv = self._get(lvh)
+        for vg in self.vgs.values():
+            if lv in vg.lvs:
+                vg.lvs.remove(lv)
+                for pv in vg.pvs:
+                    pv.allocated.pop(lv.name, None)
+                vg.seqno += 1
+                return 0
+        return -1
+
+    def _find(self, vgh, kind, attr, value):
+        value = _str(value)
+        for obj in getattr(self._get(vgh), kind):
+            if getattr(obj, attr) == value:
+                return self._handle(conversion.pv_t if kind == "pvs" else conversion.lv_t,
+                                    obj)
+        return conversion.pv_t() if kind == "pvs" else conversion.lv_t()
+
+    def lvm_pv_from_name(self, vgh, name):
+        return self._find(vgh, "pvs", "name", name)
+
+    def lvm_pv_from_uuid(self, vgh, uuid):
+        return self._find(vgh, "pvs", "uuid", uuid)
+
+    def lvm_lv_from_name(self, vgh, name):
+        return self._find(vgh, "lvs", "name", name)
+
+    def lvm_lv_from_uuid(self, vgh, uuid):
+        return self._find(vgh, "lvs", "uuid", uuid)
+
+    def lvm_pv_get_name(self, pvh):
+        return self._get(pvh).name
+
+    def lvm_pv_get_uuid(self, pvh):
+        return self._get(pvh).uuid
+
+    def lvm_pv_get_size(self, pvh):
+        return self._get(pvh).size
+
+    lvm_pv_get_dev_size = lvm_pv_get_size
+
+    def lvm_pv_get_free(self, pvh):
+        return self._get(pvh).free
+
+    def lvm_pv_get_mda_count(self, pvh):
+        return 1
+
+    def lvm_lv_get_name(self, lvh):
+        return self._get(lvh).name
+
+    def lvm_lv_get_uuid(self, lvh):
+        return self._get(lvh).uuid
+
+    def lvm_lv_get_size(self, lvh):
+        return self._get(lvh).size
+
+    def lvm_lv_is_active(self, lvh):
+        return 1
+
+    def lvm_lv_is_suspended(self, lvh):
+        return 0
+
+    def lvm_lv_get_tags(self, lvh):
+        return self._strings(self._get(lvh).tags)
+
+
+def reset():
+    """
+    Installs a new, empty Backend and returns it.
+    """
+    library.backend = Backend()
+    return library.backend
@@ -0,0 +1,70 @@
+#This file is part of lvm2py.
+
+#lvm2py is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#lvm2py is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with lvm2py. If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import sys
+import unittest
+
+# diff and info have no dependency on liblvm2app, import them without the
+# package (whose __init__ loads the library)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, "lvm2py"))
+
+from diff import InventoryDiff
+from info import VGInfo, PVInfo, LVInfo
+
+
+def vg(name="vg0", size=100, pvs=(), lvs=()):
+    return VGInfo(uuid="vg-" + name, name=name, seqno=1, size=size, free_size=0,
+                  extent_size=4, extent_count=size // 4, free_extent_count=0,
+                  pv_count=len(pvs or ()), tags=(), pvs=pvs, lvs=lvs)
+
+
+def lv(name, size, uuid=None):
+    return LVInfo(uuid=uuid or "lv-" + name, name=name, vg="vg0", size=size,
+                  is_active=True, is_suspended=False, tags=())
+
+
+class InventoryDiffTest(unittest.TestCase):
+
+    def test_changes(self):
+        pv = PVInfo(uuid="pv-0", name="/dev/sdb1", vg="vg0", size=100, free=0,
+                    dev_size=100, mda_count=1)
+        old = {"vg0": vg(pvs=(pv,), lvs=(lv("data", 10), lv("logs", 10)))}
+        new = {"vg0": vg(pvs=(pv,), lvs=(lv("data", 20), lv("db", 10, uuid="lv-logs"),
+                                        lv("tmp", 10)))}
+        diff = InventoryDiff(old, new)
+        self.assertTrue(diff)
+        self.assertEqual([c.new.name for c in diff.created], ["tmp"])
+        self.assertEqual(diff.removed, [])
+        self.assertEqual([(c.old.name, c.new.name) for c in diff.renamed], [("logs", "db")])
+        self.assertEqual([(c.old.size, c.new.size) for c in diff.resized], [(10, 20)])
+        self.assertFalse(InventoryDiff(old, dict(old)))
+
+    def test_removed_vg(self):
+        diff = InventoryDiff([vg(lvs=(lv("data", 10),))], [])
+        self.assertEqual(sorted(c.kind for c in diff.removed), ["lv", "vg"])
+
+    def test_volumes_not_read(self):
+        # records read without their volumes hold None for pvs and lvs
+        diff = InventoryDiff({"vg0": vg(pvs=None, lvs=None)},
+                             {"vg0": vg(size=200, pvs=None, lvs=None)})
+        self.assertEqual([c.kind for c in diff.resized], ["vg"])
+        self.assertEqual(diff.created, [])
+        self.assertEqual(diff.removed, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+#This file is part of lvm2py.
+
+#lvm2py is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#lvm2py is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with lvm2py. If not, see <http://www.gnu.org/licenses/>.
+
+import time
+import unittest
+
+import fakelvm
+from fakelvm import EXTENT, _str
+from lvm import LVM
+from index import HostIndex
+
+
+class HostIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = fakelvm.reset()
+        self.backend.add_vg("vg0", ["/dev/fake0"])
+        self.lv = self.backend.add_lv("vg0", "data", 10 * EXTENT)
+        self.backend.add_pv("/dev/fake1")
+        self.lvm = LVM()
+
+    def lookup(self, index, method, key):
+        with self.lvm.session():
+            return getattr(index, method)(self.lvm.handle, key)
+
+    def test_hit(self):
+        index = HostIndex()
+        self.assertEqual(self.lookup(index, "lv", self.lv.uuid).name, "data")
+        self.assertEqual(_str(self.lookup(index, "vg_for_device", "/dev/fake0")), "vg0")
+        # a hit only checks the volume group holding it
+        names = self.backend.calls["lvm_list_vg_names"]
+        self.lookup(index, "lv", self.lv.uuid)
+        self.assertEqual(self.backend.calls["lvm_list_vg_names"], names)
+
+    def test_removed(self):
+        index = HostIndex()
+        self.lookup(index, "lv", self.lv.uuid)
+        self.backend.vgs["vg0"].lvs.remove(self.lv)
+        self.backend.vgs["vg0"].seqno += 1
+        self.assertEqual(self.lookup(index, "lv", self.lv.uuid), None)
+
+    def test_miss_cached(self):
+        index = HostIndex(max_miss_age=60)
+        self.assertEqual(self.lookup(index, "lv", "unknown"), None)
+        names = self.backend.calls["lvm_list_vg_names"]
+        self.assertEqual(self.lookup(index, "lv", "unknown"), None)
+        self.assertEqual(self.backend.calls["lvm_list_vg_names"], names)
+
+    def test_miss_expires(self):
+        index = HostIndex(max_miss_age=0.05)
+        self.assertEqual(self.lookup(index, "vg_for_device", "/dev/fake1"), None)
+        # vgextend by another tool, the index sees no change of its own
+        self.backend.vgextend("vg0", "/dev/fake1")
+        time.sleep(0.1)
+        self.assertEqual(_str(self.lookup(index, "vg_for_device", "/dev/fake1")), "vg0")
+
+    def test_orphan(self):
+        # lvm reports orphans in the "#orphans_lvm2" pseudo volume group
+        self.assertEqual(self.lvm.vg_for_device("/dev/fake1"), None)
+        self.assertEqual(self.lvm.vg_for_device("/dev/unknown"), None)
+        pvs = dict((pv.name, pv.vg) for pv in self.lvm.pvscan())
+        self.assertEqual(pvs, {"/dev/fake0": "vg0", "/dev/fake1": None})
+
+    def test_orphan_live(self):
+        orphan = [pv for pv in self.lvm.pvscan() if pv.vg is None][0]
+        self.assertRaises(ValueError, orphan.live, self.lvm)
+
+
+if __name__ == "__main__":
+    unittest.main()
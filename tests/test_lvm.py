@@ -0,0 +1,170 @@
+#This file is part of lvm2py.
+
+#lvm2py is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#lvm2py is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with lvm2py. If not, see <http://www.gnu.org/licenses/>.
+
+import threading
+import unittest
+
+import fakelvm
+from fakelvm import EXTENT, _address, _str
+import lvm as lvm_module
+import watchdog
+from lvm import LVM
+from exception import CallTimeoutError, HandleError
+
+
+class IdentityTest(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = fakelvm.reset()
+        self.backend.add_vg("vg0", ["/dev/fake0"])
+        self.backend.add_lv("vg0", "lv0", 10 * EXTENT)
+        self.lvm = LVM()
+
+    def test_vg(self):
+        vg = self.lvm.get_vg("vg0")
+        self.assertTrue(self.lvm.get_vg("vg0") is vg)
+        self.assertTrue(self.lvm.get_vg("vg0", "w") is not vg)
+        # names read from the library are bytes on python 3
+        scanned = self.lvm.vgscan()[0]
+        self.assertTrue(self.lvm.get_vg(scanned.name) is scanned)
+
+    def test_lv(self):
+        lv = self.lvm.get_vg("vg0").get_lv("lv0")
+        self.assertTrue(self.lvm.get_vg("vg0").get_lv("lv0") is lv)
+        self.assertTrue(self.lvm.get_vg("vg0").lvscan()[0] is lv)
+        rec = list(self.lvm.inventory().values())[0].lvs[0]
+        self.assertTrue(rec.live(self.lvm) is self.lvm.get_vg(rec.vg).get_lv(rec.name))
+        self.assertTrue(self.lvm.get_vg("vg0", "w").get_lv("lv0") is not lv)
+
+    def test_set_mode(self):
+        vg = self.lvm.get_vg("vg0")
+        vg.set_mode("w")
+        other = self.lvm.get_vg("vg0")
+        self.assertTrue(other is not vg)
+        self.assertEqual(other.mode, "r")
+
+    def test_removed(self):
+        self.lvm.get_vg("vg0")
+        del self.backend.vgs["vg0"]
+        self.assertRaises(HandleError, self.lvm.get_vg, "vg0")
+
+
+class TimeoutTest(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = fakelvm.reset()
+        self.backend.add_vg("vg0", ["/dev/fake0"])
+        self.release = threading.Event()
+
+    def tearDown(self):
+        self.release.set()
+        for thread in threading.enumerate():
+            if isinstance(thread, watchdog._Worker):
+                thread.join(2)
+
+    def hang(self, name, count=1):
+        # makes the first count calls of the named library function block until
+        # the test releases them
+        original = getattr(self.backend, name)
+
+        def hanging(*args):
+            if self.backend.calls[name] <= count:
+                self.release.wait()
+            return original(*args)
+        setattr(self.backend, name, hanging)
+
+    def test_quarantine(self):
+        lvm = LVM(timeout=0.2)
+        self.hang("lvm_list_vg_names")
+        self.assertRaises(CallTimeoutError, lvm.vgscan)
+        quarantined = set(self.backend.handles)
+        self.assertEqual(len(quarantined), 1)
+        self.assertEqual(_address(lvm_module._quarantine[-1]), list(quarantined)[0])
+        # the next call neither waits for the blocked one nor joins it
+        self.assertEqual([_str(vg.name) for vg in lvm.vgscan()], ["vg0"])
+        self.assertEqual(self.backend.calls["lvm_list_vg_names"], 2)
+        # the quarantined handle is never quit
+        self.assertTrue(quarantined <= self.backend.handles)
+        self.release.set()
+        self.assertEqual([_str(vg.name) for vg in lvm.vgscan()], ["vg0"])
+
+    def test_waiting_not_quarantined(self):
+        lvm = LVM()
+        self.hang("lvm_list_vg_names")
+        holder = threading.Thread(target=lvm.inventory)
+        holder.start()
+        while not self.backend.calls["lvm_list_vg_names"]:
+            self.release.wait(0.01)
+        generation = lvm._generation
+        # pvscan waits for the handle held by inventory
+        self.assertRaises(CallTimeoutError, lvm.pvscan, timeout=0.2)
+        self.assertEqual(lvm._generation, generation)
+        self.release.set()
+        holder.join(2)
+        self.assertEqual(len(lvm.pvscan()), 1)
+
+    def test_reopened_vg(self):
+        lvm = LVM()
+        vg = lvm.get_vg("vg0")
+        self.hang("lvm_vg_get_size")
+        self.assertRaises(CallTimeoutError, vg.size, timeout=0.2)
+        with lvm.session():
+            vg.open()
+            handle = vg.handle
+            # the abandoned operation ends without closing the new handle
+            self.tearDown()
+            self.assertFalse(_address(handle) in self.backend.closed)
+            vg.close()
+        self.assertEqual(vg.size(), 400)
+
+
+class ConcurrencyTest(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = fakelvm.reset()
+        self.backend.add_vg("vg0", ["/dev/fake0"])
+
+    def test_coalesced(self):
+        lvm = LVM()
+        release = threading.Event()
+        original = self.backend.lvm_list_vg_names
+        active = [0]
+        peak = [0]
+
+        def listing(lvmh):
+            active[0] += 1
+            if active[0] > peak[0]:
+                peak[0] = active[0]
+            release.wait()
+            active[0] -= 1
+            return original(lvmh)
+        self.backend.lvm_list_vg_names = listing
+        threads = [threading.Thread(target=lvm.inventory) for i in range(3)]
+        threads.append(threading.Thread(target=lvm.vgscan))
+        for thread in threads:
+            thread.start()
+        while not self.backend.calls["lvm_list_vg_names"]:
+            release.wait(0.01)
+        release.wait(0.1)
+        release.set()
+        for thread in threads:
+            thread.join(2)
+        # the inventory calls share one, vgscan waits for the handle
+        self.assertEqual(self.backend.calls["lvm_list_vg_names"], 2)
+        self.assertEqual(peak[0], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+#This file is part of lvm2py.
+
+#lvm2py is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#lvm2py is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with lvm2py. If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import fakelvm
+from fakelvm import EXTENT
+from lvm import LVM
+from reconcile import plan_reconcile
+from exception import CommitError
+
+
+class ReconcileTest(unittest.TestCase):
+
+    def setUp(self):
+        # the planner checks that added devices exist
+        self.dir = tempfile.mkdtemp()
+        self.devices = []
+        for name in ("a", "b", "c"):
+            path = os.path.join(self.dir, name)
+            open(path, "w").close()
+            self.devices.append(path)
+        self.backend = fakelvm.reset()
+        self.backend.add_vg("vg0", self.devices[:2])
+        self.backend.add_lv("vg0", "old", 10 * EXTENT)
+        self.backend.add_pv(self.devices[2])
+        self.lvm = LVM()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_plan_order(self):
+        spec = {"pvs": self.devices[1:], "lvs": {"new": "40MiB"}}
+        report = plan_reconcile(self.lvm.get_vg("vg0").info(), spec, prune=True)
+        self.assertEqual([(op.action, op.name) for op in report],
+                         [("remove_lv", "old"), ("add_pv", self.devices[2]),
+                          ("remove_pv", self.devices[0]), ("create_lv", "new")])
+        self.assertEqual(report.operations[-1].size, 40 * 1024 ** 2)
+
+    def test_plan_counts_pruned_extents(self):
+        # the remaining physical volume holds 100 extents
+        spec = {"pvs": self.devices[1:2], "lvs": {"new": 101 * EXTENT}}
+        vg = self.lvm.get_vg("vg0").info()
+        self.assertRaises(ValueError, plan_reconcile, vg, spec, prune=True)
+        spec["lvs"]["new"] = 100 * EXTENT
+        self.assertTrue(plan_reconcile(vg, spec, prune=True).changed)
+
+    def test_apply(self):
+        # the allocator uses the first physical volume first: a new logical volume
+        # would land on the pruned one if it was created before the removal
+        vg = self.lvm.get_vg("vg0", "w")
+        report = vg.reconcile({"pvs": self.devices[1:], "lvs": {"new": "40MiB"}},
+                              prune=True)
+        self.assertEqual(report.writes, 3)
+        state = self.backend.vgs["vg0"]
+        self.assertEqual([pv.name for pv in state.pvs], self.devices[1:])
+        self.assertEqual([lv.name for lv in state.lvs], ["new"])
+        self.assertFalse(vg.reconcile({"pvs": self.devices[1:], "lvs": {"new": "40MiB"}},
+                                      prune=True).changed)
+
+    def test_dry_run(self):
+        vg = self.lvm.get_vg("vg0", "w")
+        report = vg.reconcile({"lvs": {"new": "40MiB"}}, dry_run=True)
+        self.assertTrue(report.dry_run)
+        self.assertEqual(report.writes, 0)
+        self.assertEqual([lv.name for lv in self.backend.vgs["vg0"].lvs], ["old"])
+
+
+class CreateLVsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = fakelvm.reset()
+        self.backend.add_vg("vg0", ["/dev/fake0"])
+        self.vg = LVM().get_vg("vg0", "w")
+
+    def fail_on(self, name, count):
+        # makes the count-th call of the named library function fail
+        original = getattr(self.backend, name)
+
+        def failing(*args):
+            if self.backend.calls[name] == count:
+                return fakelvm.conversion.lv_t()
+            return original(*args)
+        setattr(self.backend, name, failing)
+
+    def test_rollback(self):
+        self.fail_on("lvm_vg_create_lv_linear", 3)
+        self.assertRaises(CommitError, self.vg.create_lvs,
+                          [("lv%d" % i, "8MiB") for i in range(5)])
+        self.assertEqual(self.backend.vgs["vg0"].lvs, [])
+
+    def test_thin_rollback(self):
+        self.fail_on("lvm_lv_create", 3)
+        self.assertRaises(CommitError, self.vg.create_thin_lvs, "pool",
+                          [("thin%d" % i, "1GiB") for i in range(5)])
+        self.assertEqual(self.backend.vgs["vg0"].lvs, [])
+        lvs = self.vg.create_thin_lvs("pool", [("thin0", "1GiB"), ("thin1", "1GiB")])
+        self.assertEqual([lv.name for lv in lvs], ["thin0", "thin1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+#This file is part of lvm2py.
+
+#lvm2py is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#lvm2py is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with lvm2py. If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import sys
+import unittest
+
+# util has no dependency on liblvm2app, import it without the package (whose
+# __init__ loads the library)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir, "lvm2py"))
+
+from util import Size
+
+
+class SizeParseTest(unittest.TestCase):
+
+    def test_units(self):
+        self.assertEqual(Size(10, "GiB"), 10 * 1024 ** 3)
+        self.assertEqual(Size("1.5GiB"), 1536 * 1024 ** 2)
+        self.assertEqual(Size("10g"), Size(10, "GiB"))
+        self.assertEqual(Size("4096"), 4096)
+
+    def test_string_without_units(self):
+        self.assertEqual(Size("10", "GiB"), Size(10, "GiB"))
+        self.assertRaises(ValueError, Size, "10GiB", "GiB")
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, Size, -1)
+        self.assertRaises(ValueError, Size, "0.1", "B")
+        self.assertRaises(ValueError, Size, "ten")
+        self.assertRaises(ValueError, Size, 50, "%")
+
+
+class SizeArithmeticTest(unittest.TestCase):
+
+    def test_exact(self):
+        total = Size("1.5GiB") + Size("512MiB")
+        self.assertEqual(total, Size("2GiB"))
+        self.assertTrue(isinstance(total, Size))
+        self.assertEqual(Size("1GiB") - Size("512MiB"), Size("512MiB"))
+        self.assertEqual(Size("1GiB") * 3, Size("3GiB"))
+        self.assertEqual(3 * Size("1GiB"), Size("3GiB"))
+        self.assertEqual(1024 + Size(1), Size(1025))
+        self.assertEqual(Size(10) % 4, Size(2))
+        self.assertEqual(Size(10) // 4, Size(2))
+        self.assertEqual(Size("1GiB") // Size("4MiB"), 256)
+
+    def test_floats_refused(self):
+        self.assertRaises(TypeError, lambda: Size("1GiB") * 1.5)
+        self.assertRaises(TypeError, lambda: Size("1GiB") + 0.7)
+        self.assertRaises(TypeError, lambda: Size("1GiB") - 0.7)
+        self.assertRaises(TypeError, lambda: Size("1GiB") // 2.0)
+        self.assertRaises(TypeError, lambda: Size("1GiB") % 2.0)
+        self.assertRaises(TypeError, lambda: Size(1) * Size(2))
+
+    def test_negative_result(self):
+        self.assertRaises(ValueError, lambda: Size(1) - Size(2))
+        self.assertRaises(ValueError, lambda: 1 - Size(2))
+
+    def test_rounding(self):
+        extent = Size("4MiB")
+        self.assertEqual(Size("5MiB").round_to(extent), Size("8MiB"))
+        self.assertEqual(Size("5MiB").round_to(extent, up=False), Size("4MiB"))
+        self.assertEqual(Size("5MiB").extents(extent), 2)
+        self.assertRaises(ValueError, Size(1).round_to, 0)
+
+    def test_human(self):
+        self.assertEqual(Size("10G").human(), "10.00 GiB")
+        self.assertEqual(Size(512).human(), "512 B")
+
+
+if __name__ == "__main__":
+    unittest.main()